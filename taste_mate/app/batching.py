@@ -0,0 +1,59 @@
+"""
+asyncio 마이크로 배칭: submit()된 항목을 window 동안(또는 max_size가 찰 때까지) 모았다가 handler 한 번으로 처리.
+handler(items) -> 결과 리스트 (items와 같은 순서·길이). 결과가 예외 객체면 그 항목 호출자에게 예외로 전달된다.
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Sequence[Any]], Awaitable[Sequence[Any]]]
+
+
+class MicroBatcher:
+    def __init__(self, handler: Handler, window_s: float, max_size: int):
+        self.handler = handler
+        self.window_s = window_s
+        self.max_size = max(1, max_size)
+        self._pending: List[tuple] = []  # (item, future)
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+
+    async def submit(self, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_s, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        # 기다리다 취소된 항목(요청 timeout 등)은 빼고 보낸다
+        batch = [(item, f) for item, f in self._pending if not f.done()]
+        self._pending = []
+        for start in range(0, len(batch), self.max_size):
+            task = asyncio.get_running_loop().create_task(self._run(batch[start:start + self.max_size]))
+            self._tasks.add(task)  # 실행 중 task가 GC되지 않게 참조 유지
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[tuple]) -> None:
+        try:
+            results = await self.handler([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"handler returned {len(results)} results for {len(batch)} items")
+        except Exception as e:
+            logger.exception("배치 처리 실패 (%d건): %s", len(batch), e)
+            results = [e] * len(batch)
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
@@ -0,0 +1,102 @@
+"""
+서버 측 후보 카탈로그 레지스트리.
+
+클라이언트가 후보 리스트를 한 번 올려 두면(PUT /v1/catalogs/{catalog_id}) 이후 요청은
+catalog_id만 보내면 된다. 카탈로그마다 검증된 Candidate와 랭커용 CandidateMatrix,
+menu_id → Candidate 맵(큰 카탈로그는 태그 역색인·가격 인덱스까지)을 미리 만들어 두고 요청 사이에 재사용한다.
+프로세스 메모리에만 보관하므로 서버 재시작 후에는 다시 올려야 한다.
+"""
+import hashlib
+import threading
+from datetime import datetime
+from functools import cached_property
+from typing import Dict, List, Optional
+
+from app.engine import PRUNE_MIN_CANDIDATES, CandidateMatrix
+from app.models import Candidate
+from app.serialization import dumps_bytes
+
+
+def candidates_fingerprint(candidates: List[Candidate]) -> str:
+    """후보 리스트 내용 해시 (순서 포함). 같은 내용이면 같은 값."""
+    payload = dumps_bytes([c.model_dump() for c in candidates], sort_keys=True)
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+
+def ranking_fingerprint(candidates: List[Candidate]) -> str:
+    """랭킹에 쓰이는 필드(menu_id, 카테고리, 태그, 가격)만으로 만든 빠른 해시.
+    내장 hash()는 문자열 해시가 프로세스마다 달라서(PYTHONHASHSEED) 메모리 캐시 키로만 쓴다 — 파일에 남기거나
+    다른 프로세스 값과 비교하지 말 것 (그런 용도는 candidates_fingerprint)."""
+    key = tuple((c.menu_id, c.category, tuple(c.tags), c.price_est) for c in candidates)
+    return f"inline:{hash(key) & 0xFFFFFFFFFFFFFFFF:016x}"
+
+
+class Catalog:
+    """후보 세트 하나와 랭킹 구조. 행렬·id 맵은 처음 쓸 때 만든다 (레지스트리에 올린 카탈로그는 업로드 시 생성)."""
+
+    def __init__(self, catalog_id: Optional[str], version: int, candidates: List[Candidate],
+                 fingerprint: Optional[str] = None):
+        self.catalog_id = catalog_id
+        self.version = version
+        if fingerprint is not None:
+            self.fingerprint = fingerprint  # cached_property 자리를 미리 채움
+        self.candidates = candidates
+        self.updated_at = datetime.utcnow().isoformat() + "Z"
+
+    @classmethod
+    def inline(cls, candidates: List[Candidate]) -> "Catalog":
+        """요청에 인라인으로 온 후보 (레지스트리에 등록하지 않음). fingerprint는 랭킹 결과 캐시가 쓸 때만 계산."""
+        return cls(None, 0, candidates)
+
+    @cached_property
+    def fingerprint(self) -> str:
+        return ranking_fingerprint(self.candidates)
+
+    @cached_property
+    def matrix(self) -> CandidateMatrix:
+        return CandidateMatrix(self.candidates)
+
+    @cached_property
+    def id_to_candidate(self) -> Dict[int, Candidate]:
+        return {c.menu_id: c for c in self.candidates}
+
+    def prepare(self) -> None:
+        """랭킹 구조를 미리 생성 (큰 카탈로그는 가지치기 인덱스까지)."""
+        if len(self.candidates) >= PRUNE_MIN_CANDIDATES:
+            self.matrix.index
+        self.id_to_candidate
+
+
+class CatalogRegistry:
+    """catalog_id → Catalog. 같은 id로 다시 올리면 version이 1 올라간다 (내용이 같으면 그대로)."""
+
+    def __init__(self):
+        self._catalogs: Dict[str, Catalog] = {}
+        self._lock = threading.Lock()
+
+    def put(self, catalog_id: str, candidates: List[Candidate]) -> Catalog:
+        fingerprint = candidates_fingerprint(candidates)
+        current = self.get(catalog_id)
+        if current is not None and current.fingerprint == fingerprint:
+            return current
+        # 랭킹 구조 생성은 락 밖에서 (큰 카탈로그 업로드가 다른 요청의 조회를 막지 않도록)
+        catalog = Catalog(catalog_id, 0, candidates, fingerprint)
+        catalog.prepare()
+        with self._lock:
+            latest = self._catalogs.get(catalog_id)
+            if latest is not None and latest.fingerprint == fingerprint:
+                return latest
+            catalog.version = latest.version + 1 if latest is not None else 1
+            self._catalogs[catalog_id] = catalog
+        return catalog
+
+    def get(self, catalog_id: str) -> Optional[Catalog]:
+        with self._lock:
+            return self._catalogs.get(catalog_id)
+
+    def delete(self, catalog_id: str) -> Optional[Catalog]:
+        with self._lock:
+            return self._catalogs.pop(catalog_id, None)
+
+
+registry = CatalogRegistry()
@@ -0,0 +1,152 @@
+"""
+외부 호출(LLM 등)용 circuit breaker.
+
+closed: 최근 window_s 동안의 호출 결과를 모아, min_calls 이상이고 실패 비율이 failure_rate 이상이면 open.
+        예외·시간 초과·빈 응답은 실패, slow_s보다 오래 걸린 호출도 실패로 센다.
+open: 호출하지 않고 바로 CircuitOpenError (호출자는 fallback). open_s가 지나면 half_open.
+half_open: probes개까지만 시험 호출을 보낸다. 모두 성공하면 closed, 하나라도 실패하면 다시 open.
+"""
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from app.metrics import CIRCUIT_STATE, CIRCUIT_TRANSITIONS_TOTAL
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+STATES = (CLOSED, OPEN, HALF_OPEN)
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float,
+        min_calls: int,
+        window_s: float,
+        open_s: float,
+        probes: int,
+        slow_s: float = 0.0,
+    ):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = max(1, min_calls)
+        self.window_s = window_s
+        self.open_s = open_s
+        self.probes = max(1, probes)
+        self.slow_s = slow_s
+        self._lock = threading.Lock()
+        self._calls: deque = deque()  # (끝난 시각, 실패 여부)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probing = 0
+        self._probe_successes = 0
+        self.rejected = 0
+        self._set_gauge()
+
+    @property
+    def enabled(self) -> bool:
+        return self.failure_rate > 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open(time.monotonic())
+            return self._state
+
+    def before_call(self) -> bool:
+        """호출 직전에 부른다. 막히면 CircuitOpenError, 통과하면 half_open 시험 호출인지를 돌려준다
+        (after_call에 그대로 넘길 것)."""
+        if not self.enabled:
+            return False
+        with self._lock:
+            self._maybe_half_open(time.monotonic())
+            if self._state == CLOSED:
+                return False
+            if self._state == HALF_OPEN and self._probing < self.probes:
+                self._probing += 1
+                return True
+            self.rejected += 1
+            state = self._state
+        raise CircuitOpenError(f"circuit '{self.name}' is {state}")
+
+    def after_call(self, probe: bool, ok: Optional[bool], latency_s: float) -> None:
+        """호출 결과 기록. ok=None이면 실제로 호출하지 못한 경우(대기 중 취소 등)로, 시험 호출 자리만 돌려준다."""
+        if not self.enabled:
+            return
+        failed = ok is False or (ok is not None and self.slow_s > 0 and latency_s > self.slow_s)
+        now = time.monotonic()
+        with self._lock:
+            if probe:
+                self._probing = max(0, self._probing - 1)
+            if ok is None:
+                return
+            if self._state == HALF_OPEN:
+                if not probe:
+                    return  # open 전에 나간 호출이 늦게 끝난 것: 회복 판단에 쓰지 않음
+                if failed:
+                    self._transition(OPEN, now)
+                else:
+                    self._probe_successes += 1
+                    if self._probe_successes >= self.probes:
+                        self._transition(CLOSED, now)
+                return
+            if self._state == OPEN:
+                return
+            self._calls.append((now, failed))
+            self._prune(now)
+            if len(self._calls) >= self.min_calls and self._failures() / len(self._calls) >= self.failure_rate:
+                self._transition(OPEN, now)
+
+    def _maybe_half_open(self, now: float) -> None:
+        if self._state == OPEN and now - self._opened_at >= self.open_s:
+            self._transition(HALF_OPEN, now)
+
+    def _transition(self, state: str, now: float) -> None:
+        self._state = state
+        self._probing = 0
+        self._probe_successes = 0
+        if state == OPEN:
+            self._opened_at = now
+        if state == CLOSED:
+            self._calls.clear()
+        CIRCUIT_TRANSITIONS_TOTAL.inc(breaker=self.name, to=state)
+        self._set_gauge()
+
+    def _set_gauge(self) -> None:
+        for state in STATES:
+            CIRCUIT_STATE.set(1.0 if state == self._state else 0.0, breaker=self.name, state=state)
+
+    def _prune(self, now: float) -> None:
+        while self._calls and self._calls[0][0] < now - self.window_s:
+            self._calls.popleft()
+
+    def _failures(self) -> int:
+        return sum(1 for _, failed in self._calls if failed)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._transition(CLOSED, time.monotonic())
+            self.rejected = 0
+
+    def stats(self) -> Dict[str, object]:
+        now = time.monotonic()
+        with self._lock:
+            self._maybe_half_open(now)
+            self._prune(now)
+            calls = len(self._calls)
+            stats = {
+                "state": self._state if self.enabled else "disabled",
+                "calls": calls,
+                "failure_rate": round(self._failures() / calls, 3) if calls else 0.0,
+                "rejected": self.rejected,
+            }
+            if self._state == OPEN:
+                stats["retry_in_s"] = round(max(0.0, self.open_s - (now - self._opened_at)), 1)
+            return stats
@@ -0,0 +1,270 @@
+"""
+NumPy 벡터화 점수 엔진.
+
+후보 리스트를 태그 incidence 행렬(후보 × 태그 어휘) + 가격/카테고리 배열로 한 번 변환해 두고,
+ScoringPlan(컴파일된 context) 하나에 대한 전체 후보 점수를 몇 번의 배열 연산으로 계산한다.
+점수 식은 app/ranker.py 의 ScoringPlan.score 와 동일하며, 부동소수점 연산 순서까지 맞춰
+기존 랭커와 같은 점수(→ 같은 순위, 동점 시 같은 순서)를 낸다.
+
+후보가 많으면(PRUNE_MIN_CANDIDATES 이상) 역색인(태그 → 행)과 가격 정렬 인덱스로
+선호 태그가 있거나 예산 범위 안인 후보만 먼저 채점하고, 나머지 후보 점수의 상한보다
+k번째 점수가 확실히 높으면 거기서 멈춘다. 결과는 전체 채점과 항상 같다.
+"""
+from functools import cached_property
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from app.models import Candidate
+from app.ranker import TAG_TERMS, WEIGHT_BUDGET, WEIGHT_RECENT_PENALTY, ScoringPlan, TagGroup
+
+# 이 수 이상이면 인덱스 기반 가지치기 사용 (작은 리스트는 전체 채점이 더 빠름)
+PRUNE_MIN_CANDIDATES = 5000
+# 선호 태그를 가진 후보가 이 비율보다 많으면 가지치기 이득이 없으므로 바로 전체 채점
+PRUNE_MAX_TAGGED_FRACTION = 0.5
+# batch_top_k에서 한 번에 만드는 (plan × 후보) 점수 행렬 최대 칸 수 (float64 기준 약 32MB)
+BATCH_MAX_CELLS = 4_000_000
+
+# 선호 태그가 하나도 없는 후보는 태그 항이 0이라 점수 = 예산 점수 + 최근 감점.
+# 예산 점수 최댓값(범위 안 만점)과 감점 최댓값으로 상한을 잡는다.
+_MAX_BUDGET_SCORE = max(WEIGHT_BUDGET, WEIGHT_BUDGET * 0.8, 0.0)
+_MAX_RECENT_SCORE = max(WEIGHT_RECENT_PENALTY, 0.0)
+
+
+class CandidateIndex:
+    """CandidateMatrix 위의 검색용 인덱스: 태그 → 행 번호(역색인), 가격 오름차순 행 번호."""
+
+    def __init__(self, matrix: "CandidateMatrix"):
+        self.n = len(matrix)
+        self.tag_rows = {t: np.flatnonzero(matrix.incidence[:, col]) for t, col in matrix.tag_vocab.items()}
+        self.price_order = np.argsort(matrix.prices, kind="stable")
+        self.sorted_prices = matrix.prices[self.price_order]
+
+    def rows_with_any(self, tags: Iterable[str]) -> np.ndarray:
+        """tags 중 하나라도 가진 행 번호 (오름차순)."""
+        mask = np.zeros(self.n, dtype=bool)
+        for t in tags:
+            rows = self.tag_rows.get(t)
+            if rows is not None:
+                mask[rows] = True
+        return np.flatnonzero(mask)
+
+    def price_bounds(self, low: float, high: float) -> tuple[int, int]:
+        """sorted_prices에서 [low, high] 구간의 위치 (lo, hi). price_order[lo:hi]가 예산 범위 안 행."""
+        lo = int(np.searchsorted(self.sorted_prices, low, side="left"))
+        hi = int(np.searchsorted(self.sorted_prices, high, side="right"))
+        return lo, max(lo, hi)
+
+
+class CandidateMatrix:
+    """후보 리스트의 배열 표현. 한 번 만들면 여러 plan 채점에 재사용 가능."""
+
+    def __init__(self, candidates: Sequence[Candidate]):
+        self.candidates = list(candidates)
+        n = len(self.candidates)
+        self.menu_ids = np.fromiter((c.menu_id for c in self.candidates), dtype=np.int64, count=n)
+        self.prices = np.fromiter((c.price_est for c in self.candidates), dtype=np.float64, count=n)
+
+        # 태그 어휘 → 열 번호. 같은 태그가 중복돼도 incidence는 bool이라 한 번만 센다 (`t in c.tags`와 동일).
+        self.tag_vocab: dict[str, int] = {}
+        rows: list[int] = []
+        cols: list[int] = []
+        for i, c in enumerate(self.candidates):
+            for t in c.tags:
+                rows.append(i)
+                cols.append(self.tag_vocab.setdefault(t, len(self.tag_vocab)))
+        # 태그(열) 단위로 잘라 쓰므로 열 우선(F) 배치
+        self.incidence = np.zeros((n, len(self.tag_vocab)), dtype=bool, order="F")
+        if rows:
+            self.incidence[rows, cols] = True
+
+        self.category_vocab: dict[str, int] = {}
+        self.category_codes = np.fromiter(
+            (self.category_vocab.setdefault(c.category, len(self.category_vocab)) for c in self.candidates),
+            dtype=np.int64,
+            count=n,
+        )
+
+    def __len__(self) -> int:
+        return len(self.candidates)
+
+    @cached_property
+    def index(self) -> CandidateIndex:
+        """가지치기용 인덱스. 처음 쓸 때 한 번 만든다 (카탈로그는 업로드 시 미리 생성)."""
+        return CandidateIndex(self)
+
+    def match_counts(self, tags: Sequence[str], rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """후보별로 tags 중 몇 개를 갖고 있는지 (int 배열). rows를 주면 그 행만."""
+        cols = [self.tag_vocab[t] for t in tags if t in self.tag_vocab]
+        n = len(self) if rows is None else len(rows)
+        if not cols:
+            return np.zeros(n, dtype=np.int64)
+        sub = self.incidence[:, cols] if rows is None else self.incidence[np.ix_(rows, cols)]
+        return sub.sum(axis=1, dtype=np.int64)
+
+    def _budget_scores(self, plan: ScoringPlan, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """ScoringPlan.score_budget 의 배열 버전."""
+        p = self.prices if rows is None else self.prices[rows]
+        low, high = plan.budget_low, plan.budget_high
+        # 초과 시 초과량에 비례 감점을 먼저 채우고, 미만/범위 안은 상수로 덮어쓴다
+        out = WEIGHT_BUDGET - (p - high) / 5000.0
+        np.maximum(out, 0.0, out=out)
+        out[p < low] = WEIGHT_BUDGET * 0.8
+        out[(low <= p) & (p <= high)] = WEIGHT_BUDGET
+        return out
+
+    def _recent_scores(self, plan: ScoringPlan, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """ScoringPlan.score_recent 의 배열 버전 (카테고리 코드 → 감점 조회표)."""
+        codes = self.category_codes if rows is None else self.category_codes[rows]
+        table = np.zeros(len(self.category_vocab), dtype=np.float64)
+        for cat in plan.penalized_categories:
+            if cat in self.category_vocab:
+                table[self.category_vocab[cat]] = WEIGHT_RECENT_PENALTY
+        return table[codes]
+
+    def scores(self, plan: ScoringPlan, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """후보 점수 배열 (rows를 주면 그 행만). plan.score(후보)와 원소별로 동일 (항을 더하는 순서까지 같음)."""
+        zeros = np.zeros(len(self) if rows is None else len(rows), dtype=np.float64)
+        terms = dict.fromkeys(TAG_TERMS, zeros)
+        for g in plan.groups:
+            # (match / len(tags)) * weight — TagGroup.score 와 같은 연산 순서
+            terms[g.term] = terms[g.term] + (self.match_counts(g.tags, rows) / len(g.tags)) * g.weight
+        return (
+            terms["meal_slot"]
+            + terms["weather"]
+            + terms["effort"]
+            + self._budget_scores(plan, rows)
+            + self._recent_scores(plan, rows)
+            + terms["mood"]
+        )
+
+    def _untagged_scores(self, plan: ScoringPlan, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """선호 태그가 없는 행의 점수. 태그 항이 모두 0.0이라 예산 + 최근 감점과 정확히 같다."""
+        return self._budget_scores(plan, rows) + self._recent_scores(plan, rows)
+
+    def top_k(self, plan: ScoringPlan, k: int) -> List[int]:
+        """상위 k개 menu_id. 동점이면 입력 순서가 앞선 후보가 먼저 (기존 stable sort와 동일)."""
+        if len(self) >= PRUNE_MIN_CANDIDATES:
+            rows = self._pruned_top_k_rows(plan, k)
+        else:
+            rows = top_k_indices(self.scores(plan), k)
+        return self.menu_ids[rows].tolist()
+
+    def _pruned_top_k_rows(self, plan: ScoringPlan, k: int) -> np.ndarray:
+        """
+        인덱스로 후보를 줄여 채점. 단계마다 아직 안 본 후보 점수의 상한(bound)을 구하고,
+        지금까지 본 후보의 k번째 점수가 bound보다 '엄격히' 크면 확정 (같으면 동점 순서 때문에 계속).
+        1) 선호 태그가 하나라도 있는 후보 (역색인) — 나머지는 예산 만점 이하
+        2) + 예산 범위 안 후보 (가격 인덱스) — 나머지는 범위 밖 가격 중 가장 유리한 쪽 이하
+        3) 전부 — 태그 없는 후보는 가격·카테고리만으로 싸게 채점
+        """
+        index = self.index
+        n = len(self)
+        k = min(k, n)
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
+
+        tagged = index.rows_with_any(plan.tag_groups)
+        if len(tagged) > n * PRUNE_MAX_TAGGED_FRACTION:
+            return top_k_indices(self.scores(plan), k)
+        tagged_scores = self.scores(plan, tagged)
+        if len(tagged) >= k and _kth_largest(tagged_scores, k) > _MAX_BUDGET_SCORE + _MAX_RECENT_SCORE:
+            return tagged[top_k_indices(tagged_scores, k)]
+
+        lo, hi = index.price_bounds(plan.budget_low, plan.budget_high)
+        window = index.price_order[lo:hi]
+        window = window[~np.isin(window, tagged, assume_unique=True)]
+        rows = np.concatenate([tagged, window])
+        if len(rows) >= k:
+            outside = []
+            if lo > 0:  # 예산 미만: 0.8배 고정
+                outside.append(plan.score_budget(float(index.sorted_prices[lo - 1])))
+            if hi < n:  # 예산 초과: 가격이 낮을수록 유리 → 범위 바로 위 가격이 최댓값
+                outside.append(plan.score_budget(float(index.sorted_prices[hi])))
+            scores = np.concatenate([tagged_scores, self._untagged_scores(plan, window)])
+            if not outside or _kth_largest(scores, k) > max(outside) + _MAX_RECENT_SCORE:
+                return rows[top_k_indices(scores, k, tiebreak=rows)]
+
+        scores = self._untagged_scores(plan)
+        scores[tagged] = tagged_scores
+        return top_k_indices(scores, k)
+
+    def batch_scores(self, plans: Sequence[ScoringPlan]) -> np.ndarray:
+        """
+        plan 여러 개 × 전체 후보 점수 행렬 (len(plans) × len(self)). 행 i는 scores(plans[i])와 같다.
+        context 공간이 작아 plan끼리 겹치는 부분이 많으므로, 태그 묶음 점수·(시간대+날씨+노력) 합·
+        예산 점수·최근 감점 배열을 서로 다른 값마다 한 번씩만 계산하고 행마다 더하기만 한다.
+        더하는 순서는 scores()와 같다.
+        """
+        n = len(self)
+        zeros = np.zeros(n, dtype=np.float64)
+        group_values: dict[TagGroup, np.ndarray] = {}
+
+        def term_values(groups: Iterable[TagGroup]) -> np.ndarray:
+            acc = zeros
+            for g in groups:
+                if g not in group_values:
+                    group_values[g] = (self.match_counts(g.tags) / len(g.tags)) * g.weight
+                acc = acc + group_values[g]
+            return acc
+
+        prefixes: dict[tuple, np.ndarray] = {}
+        budgets: dict[tuple, np.ndarray] = {}
+        recents: dict[frozenset, np.ndarray] = {}
+        moods: dict[tuple, np.ndarray] = {}
+        out = np.empty((len(plans), n), dtype=np.float64)
+        for i, plan in enumerate(plans):
+            by_term = {term: tuple(g for g in plan.groups if g.term == term) for term in TAG_TERMS}
+            key = (by_term["meal_slot"], by_term["weather"], by_term["effort"])
+            if key not in prefixes:
+                prefixes[key] = term_values(key[0]) + term_values(key[1]) + term_values(key[2])
+            budget_key = (plan.budget_low, plan.budget_high)
+            if budget_key not in budgets:
+                budgets[budget_key] = self._budget_scores(plan)
+            if plan.penalized_categories not in recents:
+                recents[plan.penalized_categories] = self._recent_scores(plan)
+            if by_term["mood"] not in moods:
+                moods[by_term["mood"]] = term_values(by_term["mood"])
+
+            row = out[i]
+            np.add(prefixes[key], budgets[budget_key], out=row)
+            row += recents[plan.penalized_categories]
+            row += moods[by_term["mood"]]
+        return out
+
+    def batch_top_k(self, plans: Sequence[ScoringPlan], k: int) -> List[List[int]]:
+        """plan마다 top_k(plan, k)와 같은 결과. 메모리를 묶기 위해 plan을 BATCH_MAX_CELLS 단위로 나눠 채점."""
+        chunk = max(1, BATCH_MAX_CELLS // max(1, len(self)))
+        results: List[List[int]] = []
+        for start in range(0, len(plans), chunk):
+            for row in self.batch_scores(plans[start:start + chunk]):
+                results.append(self.menu_ids[top_k_indices(row, k)].tolist())
+        return results
+
+
+def _kth_largest(scores: np.ndarray, k: int) -> float:
+    n = len(scores)
+    return scores[np.argpartition(scores, n - k)[n - k]]
+
+
+def top_k_indices(scores: np.ndarray, k: int, tiebreak: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    점수 배열에서 상위 k개 위치를 점수 내림차순·tiebreak 오름차순(기본: 위치)으로 반환.
+    전체 정렬 대신 argpartition으로 k번째 점수를 찾고, 그 점수와 같은 동점 후보는
+    tiebreak가 작은 것부터 채워서 stable sort(reverse=True)와 결과를 맞춘다.
+    """
+    n = len(scores)
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if tiebreak is None:
+        tiebreak = np.arange(n)
+    if k < n:
+        kth = _kth_largest(scores, k)
+        above = np.flatnonzero(scores > kth)
+        ties = np.flatnonzero(scores == kth)
+        ties = ties[np.argsort(tiebreak[ties], kind="stable")][: k - len(above)]
+        picked = np.concatenate([above, ties])
+    else:
+        picked = np.arange(n)
+    return picked[np.lexsort((tiebreak[picked], -scores[picked]))]
@@ -1,21 +1,116 @@
 """LLM client for recommendation reason generation with fallback."""
+import asyncio
 import json
 import logging
 import os
+import time
 from pathlib import Path
+from typing import NamedTuple, Optional, Sequence
+
 from google import genai
 from pydantic import ValidationError
 
+from app import reason_table
+from app.batching import MicroBatcher
+from app.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.llm_backends import GeminiBackend, LLMBackend, create_backend
+from app.metrics import LLM_BATCH_SIZE, LLM_COALESCED_TOTAL, LLM_FALLBACK_TOTAL, LLM_PARSE_FAILURES_TOTAL
+from app.reason_cache import cache as reason_cache, reason_key
+from app.reason_table import REASON_TABLE_MISS
+from app.serialization import extract_json
 from app.models import Candidate, Context, ReasonResponse
+from app.singleflight import AsyncSingleFlight, SingleFlight
+from app.tracing import span
 
 logger = logging.getLogger(__name__)
 
 PROMPT_TEMPLATE_PATH = Path(__file__).resolve().parent.parent / "prompts" / "reason.txt"
 FALLBACK_REASON = "선택한 메뉴가 현재 상황에 잘 맞습니다."
+# 후보·상황을 프롬프트에 넣는 방식: verbose(기존 형식) | compact(짧은 표 형식, 입력 토큰 절약)
+PROMPT_FORMAT = os.getenv("PROMPT_FORMAT", "verbose")
+LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", "0.3"))  # 사유 캐시 키에도 들어감
+
+LLM_WARMUP = os.getenv("LLM_WARMUP", "0") == "1"
+
+# 비동기 경로(acall_llm): 동시에 진행 중인 Gemini 호출 수 상한(연결 풀 크기와 맞출 것), 요청당 제한 시간(초).
+# 상한을 넘는 요청은 이벤트 루프에서 대기만 하므로 스레드를 잡지 않는다.
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "100"))
+LLM_TIMEOUT_S = float(os.getenv("LLM_TIMEOUT_S", "10"))
+# 요청당 지연 예산(ms, 요청 시작부터). 넘기면 캐시된 사유나 fallback으로 바로 응답하고, LLM 호출은 뒤에서 끝까지
+# 진행해 결과를 사유 캐시에 남긴다 (다음 같은 요청부터 cached). 0이면 끔.
+LLM_LATENCY_BUDGET_MS = float(os.getenv("LLM_LATENCY_BUDGET_MS", "0"))
+
+# 마이크로 배칭 (비동기 경로만): 대기 중인 요청을 최대 LLM_BATCH_WINDOW_MS 동안, LLM_BATCH_MAX_SIZE개까지 모아
+# 프롬프트 하나로 보낸다. 0이면 끔.
+LLM_BATCH_WINDOW_MS = float(os.getenv("LLM_BATCH_WINDOW_MS", "0"))
+LLM_BATCH_MAX_SIZE = int(os.getenv("LLM_BATCH_MAX_SIZE", "8"))
+
+# LLM circuit breaker: 최근 LLM_BREAKER_WINDOW_S초 호출 중 LLM_BREAKER_MIN_CALLS건 이상이고 실패(예외·시간 초과·빈 응답·
+# LLM_BREAKER_SLOW_MS 초과) 비율이 LLM_BREAKER_FAILURE_RATE 이상이면 LLM_BREAKER_OPEN_S초 동안 호출 없이 바로 fallback,
+# 이후 LLM_BREAKER_PROBES건 시험 호출이 모두 성공하면 복구. FAILURE_RATE=0이면 끔.
+LLM_BREAKER_FAILURE_RATE = float(os.getenv("LLM_BREAKER_FAILURE_RATE", "0.5"))
+LLM_BREAKER_MIN_CALLS = int(os.getenv("LLM_BREAKER_MIN_CALLS", "10"))
+LLM_BREAKER_WINDOW_S = float(os.getenv("LLM_BREAKER_WINDOW_S", "30"))
+LLM_BREAKER_OPEN_S = float(os.getenv("LLM_BREAKER_OPEN_S", "15"))
+LLM_BREAKER_PROBES = int(os.getenv("LLM_BREAKER_PROBES", "3"))
+LLM_BREAKER_SLOW_MS = float(os.getenv("LLM_BREAKER_SLOW_MS", "5000"))
+
+# 프롬프트 → 응답 텍스트를 맡는 백엔드 (LLM_BACKEND: gemini | simulated, app/llm_backends.py)
+_backend: LLMBackend = create_backend()
+_semaphore: Optional[tuple] = None  # (event loop, asyncio.Semaphore)
+_batcher: Optional[tuple] = None  # (event loop, MicroBatcher)
+
+# 같은 reason_key의 호출이 진행 중이면 새로 부르지 않고 그 결과(fallback 포함)를 함께 받는다.
+_inflight = SingleFlight()
+_ainflight = AsyncSingleFlight()
+
+breaker = CircuitBreaker(
+    "llm",
+    failure_rate=LLM_BREAKER_FAILURE_RATE,
+    min_calls=LLM_BREAKER_MIN_CALLS,
+    window_s=LLM_BREAKER_WINDOW_S,
+    open_s=LLM_BREAKER_OPEN_S,
+    probes=LLM_BREAKER_PROBES,
+    slow_s=LLM_BREAKER_SLOW_MS / 1000,
+)
+
+def get_backend() -> LLMBackend:
+    return _backend
+
+def set_backend(backend: LLMBackend) -> LLMBackend:
+    """백엔드 교체 (테스트의 가짜 백엔드 등). 이전 백엔드를 돌려준다."""
+    global _backend
+    previous, _backend = _backend, backend
+    return previous
+
+def get_client() -> Optional[genai.Client]:
+    """Gemini 백엔드면 공유 클라이언트 (count_tokens 등 직접 쓰는 스크립트용), 아니면 None."""
+    return _backend.client() if isinstance(_backend, GeminiBackend) else None
+
+async def init_client(warm_up: bool = LLM_WARMUP) -> None:
+    """app 기동 시 호출 (lifespan). Gemini면 클라이언트를 미리 만들고, warm_up이면 짧은 호출로 연결까지 연다."""
+    logger.info("LLM 백엔드: %s", _backend.name)
+    await _backend.start(warm_up)
+
+async def close_client() -> None:
+    """app 종료 시 호출 (lifespan). Gemini면 풀의 HTTP 연결을 닫는다."""
+    await _backend.close()
+
+# 프롬프트 템플릿은 메모리에 두고, 파일 mtime이 바뀌었을 때만 다시 읽는다 (서버 재시작 없이 수정 반영).
+_template_cache: Optional[tuple] = None  # (mtime_ns, text)
 
 def _load_prompt_template() -> str:
+    global _template_cache
+    mtime = PROMPT_TEMPLATE_PATH.stat().st_mtime_ns
+    cached = _template_cache
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
     with open(PROMPT_TEMPLATE_PATH, "r", encoding="utf-8") as f:
-        return f.read()
+        text = f.read()
+    _template_cache = (mtime, text)
+    if cached is not None:
+        logger.info("프롬프트 템플릿 다시 읽음: %s", PROMPT_TEMPLATE_PATH)
+    return text
 
 def _format_candidates(candidates: list[Candidate]) -> str:
     lines = []
@@ -26,11 +121,53 @@ def _format_candidates(candidates: list[Candidate]) -> str:
         )
     return "\n".join(lines)
 
-def _build_prompt(context: Context, candidates: list[Candidate]) -> str:
+def _format_candidates_compact(candidates: list[Candidate]) -> str:
+    """한 줄에 후보 하나, 필드는 |로 구분 (머리글 한 줄로 필드 이름을 한 번만 적는다)."""
+    lines = ["menu_id|이름|카테고리|태그|가격(원)|조리(분)"]
+    for c in candidates:
+        lines.append(f"{c.menu_id}|{c.menu_name}|{c.category}|{','.join(c.tags)}|{c.price_est}|{c.prep_time_est}")
+    return "\n".join(lines)
+
+def _format_context_compact(context: Context) -> str:
+    """값이 있는 필드만 key=value 한 줄씩. 최근 식사는 '카테고리/메뉴/n일전', 날씨는 'condition 기온℃'."""
+    lines = [
+        f"{key}={value}"
+        for key, value in (
+            ("meal_slot", context.meal_slot),
+            ("hunger_level", context.hunger_level),
+            ("mood", context.mood),
+            ("company", context.company),
+            ("effort_level", context.effort_level),
+            ("budget_range", context.budget_range),
+        )
+        if value is not None and value != ""
+    ]
+    if context.recent_meals:
+        meals = ", ".join(f"{m.category}/{m.menu}/{m.days_ago}일전" for m in context.recent_meals)
+        lines.append(f"recent_meals={meals}")
+    if context.weather:
+        weather = f"weather={context.weather.condition} {context.weather.temp_c:g}℃"
+        if context.weather.feels_like_c is not None:
+            weather += f" (체감 {context.weather.feels_like_c:g}℃)"
+        lines.append(weather)
+    return "\n".join(lines)
+
+def _format_context(context: Context) -> str:
+    """verbose 프롬프트의 상황 JSON. 프롬프트 문구가 바뀌지 않도록 stdlib json 기본 구분자(", ", ": ")를 그대로 쓴다."""
+    context_data = context.model_dump() if hasattr(context, "model_dump") else context.dict()
+    return json.dumps(context_data, ensure_ascii=False)
+
+def _build_prompt(context: Context, candidates: list[Candidate], prompt_format: Optional[str] = None) -> str:
+    """prompt_format: verbose(기본) | compact. None이면 PROMPT_FORMAT 환경 변수."""
     template = _load_prompt_template()
+    if (prompt_format or PROMPT_FORMAT) == "compact":
+        return (
+            f"{template.format(candidates_text=_format_candidates_compact(candidates))}\n\n"
+            f"## 현재 상황\n{_format_context_compact(context)}\n\n"
+            f"JSON으로만 응답."
+        )
     candidates_text = _format_candidates(candidates)
-    context_data = context.model_dump() if hasattr(context, "model_dump") else context.dict()
-    context_str = json.dumps(context_data, ensure_ascii=False)
+    context_str = _format_context(context)
     # JSON 출력을 명시적으로 요구하는 지시어 추가
     return (
         f"{template.format(candidates_text=candidates_text)}\n\n"
@@ -38,66 +175,311 @@ def _build_prompt(context: Context, candidates: list[Candidate]) -> str:
         f"결과는 반드시 JSON 형식으로만 응답하세요."
     )
 
+def _generate_config() -> dict:
+    return {
+        "response_mime_type": "application/json",  # JSON으로 달라고 강제함
+        "temperature": LLM_TEMPERATURE,
+    }
+
+def _reason_from_data(data: dict, top_k: list[int]) -> ReasonResponse:
+    return ReasonResponse(
+        selected_menu_id=int(data.get("selected_menu_id", top_k[0])),
+        reason_one_liner=data.get("reason_one_liner", FALLBACK_REASON),
+        reason_tags=list(data.get("reason_tags", ["추천"])),
+        reason_source="live",
+    )
+
+def _parse_response(text: Optional[str], top_k: list[int]) -> ReasonResponse:
+    """LLM 응답 텍스트 → ReasonResponse. 비어 있거나 파싱/검증에 실패하면 fallback."""
+    # 1. response.text가 비어있는지 먼저 확인
+    if not text:
+        logger.error("LLM(%s)이 빈 응답을 반환했습니다.", _backend.name)
+        LLM_FALLBACK_TOTAL.inc(reason="empty_response")
+        return _fallback(top_k)
+
+    try:
+        # 2. 마크다운 펜스·앞뒤 설명을 걷어내고 JSON 추출 → 검증 (top_k 밖을 고르면 실패로 봄, 배치 경로와 같음)
+        result = _reason_from_data(extract_json(text), top_k)
+        if result.selected_menu_id not in top_k:
+            raise ValueError(f"selected_menu_id {result.selected_menu_id} not in top_k")
+    except (ValueError, TypeError, AttributeError, ValidationError) as e:
+        # JSONDecodeError(stdlib·orjson)는 ValueError의 하위 클래스
+        LLM_PARSE_FAILURES_TOTAL.inc()
+        LLM_FALLBACK_TOTAL.inc(reason="parse_error")
+        logger.error("LLM(%s) 응답 파싱 실패: %s (원본: %s)", _backend.name, e, text)
+        return _fallback(top_k)
+
+    logger.info("LLM(%s) 성공: selected_menu_id=%s", _backend.name, result.selected_menu_id)
+    return result
+
+def _precomputed(context: Context, candidates: list[Candidate], top_k: list[int]) -> Optional[ReasonResponse]:
+    """사유 표(REASON_TABLE_PATH)에 있으면 그 사유. 표에 없고 REASON_TABLE_MISS=fallback이면 LLM 없이 fallback."""
+    table = reason_table.get_table()
+    if table is None:
+        return None
+    response = table.lookup(context, candidates)
+    if response is None and REASON_TABLE_MISS == "fallback":
+        LLM_FALLBACK_TOTAL.inc(reason="table_miss")
+        return _fallback(top_k)
+    return response
+
 def call_llm(context: Context, candidates: list[Candidate], top_k: list[int]) -> ReasonResponse:
-    """Vertex AI Gemini를 호출하여 메뉴 선택 및 이유 생성."""
+    """Vertex AI Gemini를 호출하여 메뉴 선택 및 이유 생성 (동기, 스크립트용)."""
+    precomputed = _precomputed(context, candidates, top_k)
+    if precomputed is not None:
+        return precomputed
+
     prompt = _build_prompt(context, candidates)
     
     # 환경 변수 로드
-    project_id = os.getenv("GOOGLE_CLOUD_PROJECT")
-    location = os.getenv("GOOGLE_CLOUD_LOCATION", "us-central1")
     model_name = os.getenv("LLM_MODEL", "gemini-2.0-flash")
 
-    if not project_id:
-        logger.warning("GOOGLE_CLOUD_PROJECT가 설정되지 않음. fallback 사용")
+    # 같은 프롬프트·모델·온도로 받은 사유가 있으면 재사용
+    key = reason_key(prompt, model_name, LLM_TEMPERATURE)
+    cached = reason_cache.get(key)
+    if cached is not None:
+        return cached.model_copy(update={"reason_source": "cached"})
+
+    if not _backend.available():
+        logger.warning("LLM 백엔드(%s) 설정 없음 (GOOGLE_CLOUD_PROJECT 등). fallback 사용", _backend.name)
+        LLM_FALLBACK_TOTAL.inc(reason=_backend.unavailable_reason)
         return _fallback(top_k)
 
+    result, shared = _inflight.do(key, lambda: _generate(key, prompt, model_name, top_k))
+    if shared:
+        LLM_COALESCED_TOTAL.inc()
+    return result
+
+def _generate(key: str, prompt: str, model_name: str, top_k: list[int]) -> ReasonResponse:
     try:
-        # 1. 클라이언트 생성 (이 부분이 빠져있었습니다)
-        client = genai.Client(
-            vertexai=True,
-            project=project_id,
-            location=location
-        )
+        text = _call_backend(model_name, prompt)
+    except CircuitOpenError:
+        return _circuit_open_fallback(top_k)
+    except Exception as e:
+        logger.exception("LLM(%s) 호출 실패: %s", _backend.name, e)
+        LLM_FALLBACK_TOTAL.inc(reason="call_error")
+        return _fallback(top_k)
+    result = _parse_response(text, top_k)
+    reason_cache.put(key, result)  # fallback은 캐시가 거른다
+    return result
 
-        # 2. Gemini 호출
-        response = client.models.generate_content(
-            model=model_name,
-            contents=prompt,
-            config={
-                "response_mime_type": "application/json", # JSON으로 달라고 강제함
-                "temperature": 0.3
-            }
-        )
+def _call_backend(model_name: str, prompt: str) -> Optional[str]:
+    """breaker를 거쳐 백엔드 호출 (동기). 예외·빈 응답·지연을 breaker에 기록."""
+    probe = breaker.before_call()
+    ok, t0 = False, time.perf_counter()
+    try:
+        text = _backend.generate(prompt, model_name, _generate_config())
+        ok = bool(text)
+        return text
+    finally:
+        breaker.after_call(probe, ok, time.perf_counter() - t0)
 
-        # 3. response.text가 비어있는지 먼저 확인
-        if not response.text:
-            logger.error("Gemini가 빈 응답을 반환했습니다.")
-            return _fallback(top_k)
-
-        # 4. JSON 파싱 및 마크다운 제거
-        clean_text = response.text.strip()
-        if clean_text.startswith("```"):
-            # 앞뒤 마크다운 태그 (```json ... ```) 제거
-            clean_text = clean_text.split("\n", 1)[-1].rsplit("```", 1)[0].strip()
-        
-        data = json.loads(clean_text)
-
-        # 5. 데이터 추출 및 반환
-        result = ReasonResponse(
-            selected_menu_id=int(data.get("selected_menu_id", top_k[0])),
-            reason_one_liner=data.get("reason_one_liner", FALLBACK_REASON),
-            reason_tags=list(data.get("reason_tags", ["추천"])),
-        )
-        
-        logger.info("Gemini 성공: selected_menu_id=%s", result.selected_menu_id)
-        return result
+def _circuit_open_fallback(top_k: list[int]) -> ReasonResponse:
+    logger.debug("LLM circuit open: 호출 없이 fallback")
+    LLM_FALLBACK_TOTAL.inc(reason="circuit_open")
+    return _fallback(top_k)
+
+def _llm_semaphore() -> asyncio.Semaphore:
+    """이벤트 루프별 동시 LLM 호출 제한 (테스트 등에서 루프가 바뀌어도 안전하게)."""
+    global _semaphore
+    loop = asyncio.get_running_loop()
+    if _semaphore is None or _semaphore[0] is not loop:
+        _semaphore = (loop, asyncio.Semaphore(LLM_MAX_CONCURRENCY))
+    return _semaphore[1]
+
+async def _agenerate(model_name: str, prompt: str) -> Optional[str]:
+    """breaker 확인 → 세마포어 → 백엔드 호출. 세마포어를 얻은 뒤의 결과(예외·시간 초과로 인한 취소·빈 응답)와
+    지연을 breaker에 기록한다. breaker가 열려 있으면 대기열에 서지 않고 바로 CircuitOpenError."""
+    probe = breaker.before_call()
+    ok: Optional[bool] = None
+    t0 = time.perf_counter()
+    try:
+        async with _llm_semaphore():
+            queued_s, t0 = time.perf_counter() - t0, time.perf_counter()
+            ok = False
+            with span("llm_call", backend=_backend.name, model=model_name, probe=probe,
+                      queue_ms=round(queued_s * 1000, 1)) as attrs:
+                text = await _backend.agenerate(prompt, model_name, _generate_config())
+                attrs["empty"] = not text
+            ok = bool(text)
+            return text
+    finally:
+        breaker.after_call(probe, ok, time.perf_counter() - t0)
+
+async def acall_llm(
+    context: Context, candidates: list[Candidate], top_k: list[int], budget_s: Optional[float] = None
+) -> ReasonResponse:
+    """call_llm의 비동기 버전 (SDK async API). 동시 호출은 LLM_MAX_CONCURRENCY개까지,
+    대기 시간을 포함해 LLM_TIMEOUT_S를 넘기면 fallback.
+    budget_s가 있으면 그 시간까지만 기다리고, 넘으면 캐시된 사유나 fallback을 돌려준다 (호출은 뒤에서 계속)."""
+    with span("reason_table"):
+        precomputed = _precomputed(context, candidates, top_k)
+    if precomputed is not None:
+        return precomputed
+
+    with span("prompt_build") as attrs:
+        prompt = _build_prompt(context, candidates)
+        attrs["prompt_chars"] = len(prompt)
+    model_name = os.getenv("LLM_MODEL", "gemini-2.0-flash")
+
+    key = reason_key(prompt, model_name, LLM_TEMPERATURE)
+    with span("reason_cache") as attrs:
+        cached = await reason_cache.aget(key)
+        attrs["hit"] = cached is not None
+    if cached is not None:
+        return cached.model_copy(update={"reason_source": "cached"})
+
+    if not _backend.available():
+        logger.warning("LLM 백엔드(%s) 설정 없음 (GOOGLE_CLOUD_PROJECT 등). fallback 사용", _backend.name)
+        LLM_FALLBACK_TOTAL.inc(reason=_backend.unavailable_reason)
+        return _fallback(top_k)
+
+    item = _ReasonItem(key, prompt, context, candidates, top_k)
+    task, shared = _ainflight.start(key, lambda: _agenerate_reason(item, model_name))
+    if shared:
+        LLM_COALESCED_TOTAL.inc()
+    try:
+        with span("llm_wait", coalesced=shared, budget_ms=None if budget_s is None else round(budget_s * 1000, 1)):
+            return await asyncio.wait_for(asyncio.shield(task), timeout=budget_s)
+    except asyncio.TimeoutError:
+        # 예산 초과: task는 계속 돌아 끝나면 사유 캐시에 저장된다 (다음 같은 요청부터 cached)
+        logger.info("LLM 지연 예산 초과 (%.0fms). fallback으로 응답, 호출은 백그라운드에서 계속", budget_s * 1000)
+        LLM_FALLBACK_TOTAL.inc(reason="latency_budget")
+        return _fallback(top_k)
+
+class _ReasonItem(NamedTuple):
+    key: str
+    prompt: str
+    context: Context
+    candidates: list[Candidate]
+    top_k: list[int]
 
+async def _agenerate_reason(item: _ReasonItem, model_name: str) -> ReasonResponse:
+    if LLM_BATCH_WINDOW_MS <= 0:
+        return await _agenerate_single(item, model_name)
+    try:
+        return await asyncio.wait_for(_reason_batcher().submit(item), timeout=LLM_TIMEOUT_S)
+    except asyncio.TimeoutError:
+        logger.warning("LLM(%s) 배치 응답 대기 시간 초과 (%.1fs). fallback 사용", _backend.name, LLM_TIMEOUT_S)
+        LLM_FALLBACK_TOTAL.inc(reason="timeout")
+        return _fallback(item.top_k)
+    except Exception as e:
+        logger.exception("LLM(%s) 배치 처리 실패: %s", _backend.name, e)
+        LLM_FALLBACK_TOTAL.inc(reason="call_error")
+        return _fallback(item.top_k)
+
+async def _agenerate_single(item: _ReasonItem, model_name: str) -> ReasonResponse:
+    top_k = item.top_k
+    try:
+        text = await asyncio.wait_for(_agenerate(model_name, item.prompt), timeout=LLM_TIMEOUT_S)
+    except CircuitOpenError:
+        return _circuit_open_fallback(top_k)
+    except asyncio.TimeoutError:
+        logger.warning("LLM(%s) 호출 시간 초과 (%.1fs). fallback 사용", _backend.name, LLM_TIMEOUT_S)
+        LLM_FALLBACK_TOTAL.inc(reason="timeout")
+        return _fallback(top_k)
     except Exception as e:
-        # 에러 발생 시 response 객체가 존재할 때만 text를 찍도록 안전하게 처리
-        res_text = response.text if 'response' in locals() else "No Response"
-        logger.error(f"파싱 에러 발생! 원본 데이터: {res_text}")
-        logger.exception("Gemini 호출 또는 파싱 실패: %s", e)
+        logger.exception("LLM(%s) 호출 실패: %s", _backend.name, e)
+        LLM_FALLBACK_TOTAL.inc(reason="call_error")
         return _fallback(top_k)
+    result = _parse_response(text, top_k)
+    await reason_cache.aput(item.key, result)
+    return result
+
+def _reason_batcher() -> MicroBatcher:
+    """이벤트 루프별 배처 (세마포어와 같은 이유)."""
+    global _batcher
+    loop = asyncio.get_running_loop()
+    if _batcher is None or _batcher[0] is not loop:
+        _batcher = (loop, MicroBatcher(_generate_batch, LLM_BATCH_WINDOW_MS / 1000, LLM_BATCH_MAX_SIZE))
+    return _batcher[1]
+
+async def _generate_batch(items: Sequence[_ReasonItem]) -> list[ReasonResponse]:
+    """배처 handler. 한 건이면 평소 프롬프트 그대로, 여러 건이면 배치 프롬프트 하나로 호출해 항목별로 나눈다."""
+    model_name = os.getenv("LLM_MODEL", "gemini-2.0-flash")
+    LLM_BATCH_SIZE.observe(len(items))
+    if len(items) == 1:
+        return [await _agenerate_single(items[0], model_name)]
+    with span("prompt_build", batch_size=len(items)):
+        prompt = _build_batch_prompt(items)
+    try:
+        text = await asyncio.wait_for(_agenerate(model_name, prompt), timeout=LLM_TIMEOUT_S)
+    except CircuitOpenError:
+        LLM_FALLBACK_TOTAL.inc(len(items), reason="circuit_open")
+        return [_fallback(item.top_k) for item in items]
+    except asyncio.TimeoutError:
+        logger.warning("LLM(%s) 배치 호출 시간 초과 (%.1fs, %d건). fallback 사용", _backend.name, LLM_TIMEOUT_S, len(items))
+        LLM_FALLBACK_TOTAL.inc(len(items), reason="timeout")
+        return [_fallback(item.top_k) for item in items]
+    except Exception as e:
+        logger.exception("LLM(%s) 배치 호출 실패 (%d건): %s", _backend.name, len(items), e)
+        LLM_FALLBACK_TOTAL.inc(len(items), reason="call_error")
+        return [_fallback(item.top_k) for item in items]
+    results = _parse_batch_response(text, items)
+    for item, result in zip(items, results):
+        try:
+            await reason_cache.aput(item.key, result)  # 단건 경로와 같은 저장 경로, 한 건 실패가 나머지를 막지 않게
+        except Exception as e:
+            logger.warning("사유 캐시 저장 실패 (배치 항목): %s", e)
+    return results
+
+def _build_batch_prompt(items: Sequence[_ReasonItem]) -> str:
+    template = _load_prompt_template()
+    compact = PROMPT_FORMAT == "compact"
+    sections = []
+    for i, item in enumerate(items, 1):
+        if compact:
+            candidates_text, context_text = _format_candidates_compact(item.candidates), _format_context_compact(item.context)
+        else:
+            candidates_text, context_text = _format_candidates(item.candidates), _format_context(item.context)
+        sections.append(f"### 항목 {i}\n후보:\n{candidates_text}\n상황:\n{context_text}")
+    return (
+        f"{template.format(candidates_text='(아래 항목별 후보 목록 참고)')}\n\n"
+        f"## 여러 요청 일괄 처리 ({len(items)}건)\n"
+        "아래 항목마다 그 항목의 후보 중 하나만 골라 위 규칙대로 사유를 작성하세요.\n"
+        "위 출력 형식 대신, 항목 순서대로 객체를 담은 JSON 배열 하나만 출력합니다:\n"
+        '[{"item": 1, "selected_menu_id": <number>, "reason_one_liner": "<한 줄 이유>", "reason_tags": ["키워드1"]}, ...]\n\n'
+        + "\n\n".join(sections)
+    )
+
+def _parse_batch_response(text: Optional[str], items: Sequence[_ReasonItem]) -> list[ReasonResponse]:
+    """JSON 배열 → 항목별 ReasonResponse. 항목이 없거나, 파싱에 실패하거나, 그 항목의 top_k 밖을 고르면 그 항목만 fallback."""
+    if not text:
+        logger.error("LLM(%s)이 빈 배치 응답을 반환했습니다.", _backend.name)
+        LLM_FALLBACK_TOTAL.inc(len(items), reason="empty_response")
+        return [_fallback(item.top_k) for item in items]
+    try:
+        data = extract_json(text)
+        if isinstance(data, dict):
+            data = data.get("results") or data.get("items")
+        if not isinstance(data, list):
+            raise ValueError("JSON 배열이 아님")
+    except (ValueError, TypeError) as e:
+        LLM_PARSE_FAILURES_TOTAL.inc()
+        LLM_FALLBACK_TOTAL.inc(len(items), reason="parse_error")
+        logger.error("LLM(%s) 배치 응답 파싱 실패: %s (원본: %s)", _backend.name, e, text)
+        return [_fallback(item.top_k) for item in items]
+
+    # "item" 번호가 있으면 그걸로, 없으면 배열 위치로 항목에 대응
+    by_item: dict = {}
+    for pos, obj in enumerate(data, 1):
+        n = obj.get("item") if isinstance(obj, dict) else None
+        by_item.setdefault(n if isinstance(n, int) and 1 <= n <= len(items) else pos, obj)
+
+    results = []
+    for i, item in enumerate(items, 1):
+        try:
+            result = _reason_from_data(by_item[i], item.top_k)
+            if result.selected_menu_id not in item.top_k:
+                raise ValueError(f"selected_menu_id {result.selected_menu_id} not in top_k")
+        except (KeyError, ValueError, TypeError, AttributeError, ValidationError) as e:
+            LLM_PARSE_FAILURES_TOTAL.inc()
+            LLM_FALLBACK_TOTAL.inc(reason="parse_error")
+            logger.error("LLM(%s) 배치 응답 %d번 항목 처리 실패: %s", _backend.name, i, e)
+            result = _fallback(item.top_k)
+        results.append(result)
+    logger.info("LLM(%s) 배치 성공: %d건", _backend.name, len(items))
+    return results
 
 def _fallback(top_k: list[int]) -> ReasonResponse:
     selected = top_k[0] if top_k else 0
@@ -105,4 +487,5 @@ def _fallback(top_k: list[int]) -> ReasonResponse:
         selected_menu_id=selected,
         reason_one_liner=FALLBACK_REASON,
         reason_tags=["fallback"],
-    )
\ No newline at end of file
+        reason_source="fallback",
+    )
@@ -0,0 +1,261 @@
+"""
+LLM 백엔드: 프롬프트 → 응답 텍스트. LLM_BACKEND 환경 변수로 선택.
+- gemini (기본): Vertex AI Gemini. 프로세스당 클라이언트 하나를 만들어 HTTP 연결 풀을 재사용.
+- simulated: 네트워크 없이 프롬프트의 후보·상황으로 유효한 JSON 사유를 만든다. 지연 분포·오류율·깨진 출력 비율을
+  설정할 수 있어 자격 증명 없는 머신에서도 동시성·캐시·fallback 동작을 그대로 부하 테스트할 수 있다.
+파싱·검증·fallback은 app/llm.py가 백엔드와 무관하게 처리한다.
+"""
+import asyncio
+import logging
+import math
+import os
+import random
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Optional
+
+import httpx
+from google import genai
+from google.genai import types
+
+from app.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+
+# Gemini 클라이언트는 프로세스당 하나 (app 기동 시 생성, 종료 시 close). HTTP 연결은 풀에서 재사용.
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+LLM_KEEPALIVE_EXPIRY_S = float(os.getenv("LLM_KEEPALIVE_EXPIRY_S", "60"))
+
+# simulated 백엔드: 지연 중앙값(ms), 분포(fixed | uniform | normal | lognormal), 퍼짐 정도
+# (uniform: ±비율, normal: 표준편차/중앙값, lognormal: sigma), 예외 비율, 깨진 출력 비율, 난수 seed
+LLM_SIM_LATENCY_MS = float(os.getenv("LLM_SIM_LATENCY_MS", "800"))
+LLM_SIM_LATENCY_DIST = os.getenv("LLM_SIM_LATENCY_DIST", "lognormal")
+LLM_SIM_LATENCY_SPREAD = float(os.getenv("LLM_SIM_LATENCY_SPREAD", "0.5"))
+LLM_SIM_ERROR_RATE = float(os.getenv("LLM_SIM_ERROR_RATE", "0"))
+LLM_SIM_MALFORMED_RATE = float(os.getenv("LLM_SIM_MALFORMED_RATE", "0"))
+LLM_SIM_SEED = os.getenv("LLM_SIM_SEED")
+
+
+class LLMBackend(ABC):
+    """백엔드 공통 인터페이스. generate/agenerate를 구현하지 않은 백엔드는 만들 때 TypeError."""
+
+    name = "base"
+
+    def available(self) -> bool:
+        """호출 가능한 설정인지. False면 llm.py가 호출 없이 fallback (사유: unavailable_reason)."""
+        return True
+
+    unavailable_reason = "unavailable"
+
+    async def start(self, warm_up: bool = False) -> None:
+        """app 기동 시 호출 (lifespan)."""
+
+    async def close(self) -> None:
+        """app 종료 시 호출 (lifespan)."""
+
+    @abstractmethod
+    def generate(self, prompt: str, model: str, config: dict) -> Optional[str]:
+        """동기 호출 (스크립트용). 응답 텍스트."""
+
+    @abstractmethod
+    async def agenerate(self, prompt: str, model: str, config: dict) -> Optional[str]:
+        """비동기 호출 (요청 경로). 응답 텍스트."""
+
+
+class GeminiBackend(LLMBackend):
+    name = "gemini"
+    unavailable_reason = "no_project"
+
+    def __init__(self):
+        self._client: Optional[genai.Client] = None
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        return bool(os.getenv("GOOGLE_CLOUD_PROJECT"))
+
+    def _create_client(self, project_id: str, location: str) -> genai.Client:
+        limits = httpx.Limits(
+            max_connections=LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_MAX_CONNECTIONS,
+            keepalive_expiry=LLM_KEEPALIVE_EXPIRY_S,
+        )
+        return genai.Client(
+            vertexai=True,
+            project=project_id,
+            location=location,
+            http_options=types.HttpOptions(
+                client_args={"limits": limits},
+                async_client_args={"limits": limits},
+            ),
+        )
+
+    def client(self) -> Optional[genai.Client]:
+        """공유 Gemini 클라이언트. 아직 없으면 만든다 (GOOGLE_CLOUD_PROJECT 없으면 None)."""
+        if self._client is not None:
+            return self._client
+        project_id = os.getenv("GOOGLE_CLOUD_PROJECT")
+        if not project_id:
+            return None
+        with self._lock:
+            if self._client is None:
+                self._client = self._create_client(project_id, os.getenv("GOOGLE_CLOUD_LOCATION", "us-central1"))
+                logger.info("Gemini 클라이언트 생성 (max_connections=%s)", LLM_MAX_CONNECTIONS)
+        return self._client
+
+    async def start(self, warm_up: bool = False) -> None:
+        """클라이언트(자격 증명 해석 포함)를 미리 만들고, warm_up이면 짧은 호출로 연결까지 연다.
+        요청은 async 클라이언트(client.aio)로 나가므로 warm-up도 그 풀로 보낸다."""
+        try:
+            client = self.client()
+        except Exception as e:
+            logger.exception("Gemini 클라이언트 생성 실패 (요청 시 재시도): %s", e)
+            return
+        if client is None or not warm_up:
+            return
+        try:
+            await client.aio.models.generate_content(
+                model=os.getenv("LLM_MODEL", "gemini-2.0-flash"),
+                contents="ping",
+                config={"max_output_tokens": 1},
+            )
+            logger.info("Gemini warm-up 완료")
+        except Exception as e:
+            logger.warning("Gemini warm-up 실패 (무시): %s", e)
+
+    async def close(self) -> None:
+        """풀의 HTTP 연결을 닫는다 (요청용 async 풀, 스크립트용 sync 풀 모두)."""
+        with self._lock:
+            client, self._client = self._client, None
+        if client is None:
+            return
+        try:
+            await client.aio.aclose()
+            client.close()
+        except Exception as e:
+            logger.warning("Gemini 클라이언트 종료 중 오류: %s", e)
+
+    def generate(self, prompt: str, model: str, config: dict) -> Optional[str]:
+        return self.client().models.generate_content(model=model, contents=prompt, config=config).text
+
+    async def agenerate(self, prompt: str, model: str, config: dict) -> Optional[str]:
+        response = await self.client().aio.models.generate_content(model=model, contents=prompt, config=config)
+        return response.text
+
+
+class SimulatedLLMError(RuntimeError):
+    pass
+
+
+_ITEM_SPLIT = re.compile(r"^### 항목 \d+\s*$", re.MULTILINE)
+_VERBOSE_ID = re.compile(r"menu_id=(\d+)")
+_COMPACT_ID = re.compile(r"^(\d+)\|", re.MULTILINE)
+
+
+def _context_value(text: str, key: str) -> Optional[str]:
+    """verbose(JSON: "key": "값") / compact(key=값) 둘 다에서 값 하나."""
+    m = re.search(rf'"?{key}"?\s*[:=]\s*"?([^",\n}}]+)', text)
+    return m.group(1).strip() if m else None
+
+
+class SimulatedBackend(LLMBackend):
+    name = "simulated"
+
+    def __init__(
+        self,
+        latency_ms: float = LLM_SIM_LATENCY_MS,
+        dist: str = LLM_SIM_LATENCY_DIST,
+        spread: float = LLM_SIM_LATENCY_SPREAD,
+        error_rate: float = LLM_SIM_ERROR_RATE,
+        malformed_rate: float = LLM_SIM_MALFORMED_RATE,
+        seed: Optional[str] = LLM_SIM_SEED,
+    ):
+        if dist not in ("fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"unknown LLM_SIM_LATENCY_DIST: {dist}")
+        self.latency_ms = latency_ms
+        self.dist = dist
+        self.spread = spread
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()  # random.Random은 스레드 간 공유 시 잠금
+
+    def _latency_s(self) -> float:
+        with self._lock:
+            if self.dist == "uniform":
+                ms = self.latency_ms * (1 + self._rng.uniform(-self.spread, self.spread))
+            elif self.dist == "normal":
+                ms = self._rng.gauss(self.latency_ms, self.latency_ms * self.spread)
+            elif self.dist == "lognormal":
+                ms = self.latency_ms * math.exp(self._rng.gauss(0.0, self.spread))
+            else:
+                ms = self.latency_ms
+        return max(0.0, ms) / 1000
+
+    def _roll(self) -> str:
+        """이번 호출 결과 종류: error | malformed | ok."""
+        with self._lock:
+            r = self._rng.random()
+        if r < self.error_rate:
+            return "error"
+        if r < self.error_rate + self.malformed_rate:
+            return "malformed"
+        return "ok"
+
+    def _respond(self, prompt: str, outcome: str) -> Optional[str]:
+        if outcome == "error":
+            raise SimulatedLLMError("simulated LLM error")
+        if outcome == "malformed":
+            with self._lock:
+                kind = self._rng.choice(("truncated", "prose", "empty"))
+            if kind == "empty":
+                return ""
+            if kind == "prose":
+                return "추천 메뉴는 첫 번째 후보입니다."
+            return self._answer(prompt)[:-7]
+        return self._answer(prompt)
+
+    def _answer(self, prompt: str) -> str:
+        """후보 중 첫 번째를 고르고, 상황 값(meal_slot, company, mood)으로 25~45자 사유를 만든다."""
+        sections = _ITEM_SPLIT.split(prompt)
+        if len(sections) > 1:  # 배치 프롬프트: 항목마다 하나씩 JSON 배열로
+            items = [dict(item=i, **self._reason(section)) for i, section in enumerate(sections[1:], 1)]
+            return dumps(items)
+        return dumps(self._reason(prompt))
+
+    def _reason(self, text: str) -> dict:
+        ids = _VERBOSE_ID.findall(text) or _COMPACT_ID.findall(text)
+        meal_slot = _context_value(text, "meal_slot") or "식사"
+        company = _context_value(text, "company") or "혼자"
+        mood = _context_value(text, "mood") or "보통"
+        reason = f"{meal_slot}에 {company} 먹기 좋고 {mood} 기분에도 잘 어울리는 메뉴예요"
+        if len(reason) < 25:
+            reason += ", 부담 없이 즐겨 보세요"
+        return {
+            "selected_menu_id": int(ids[0]) if ids else 0,
+            "reason_one_liner": reason[:45],
+            "reason_tags": [t for t in (meal_slot, mood) if t][:4] or ["추천"],
+        }
+
+    def generate(self, prompt: str, model: str, config: dict) -> Optional[str]:
+        outcome = self._roll()
+        time.sleep(self._latency_s())
+        return self._respond(prompt, outcome)
+
+    async def agenerate(self, prompt: str, model: str, config: dict) -> Optional[str]:
+        outcome = self._roll()
+        await asyncio.sleep(self._latency_s())
+        return self._respond(prompt, outcome)
+
+
+BACKENDS = {"gemini": GeminiBackend, "simulated": SimulatedBackend}
+
+
+def create_backend(name: str = LLM_BACKEND) -> LLMBackend:
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"unknown LLM_BACKEND: {name} (choose from {', '.join(BACKENDS)})") from None
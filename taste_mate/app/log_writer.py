@@ -0,0 +1,270 @@
+"""
+JSONL 로그용 백그라운드 writer.
+
+write()는 레코드를 bounded queue에 넣기만 하고 바로 돌아온다 (큐가 가득 차면 버리고 센다 — 로깅이 요청을 늦추지 않게).
+writer 스레드가 batch_size개가 모이거나 flush_interval_s가 지나면 한 번에 써서 flush하고, fsync 정책에 따라 디스크에 내린다.
+파일이 max_bytes를 넘거나 rotate_s가 지나면 `<이름>.<시각>.jsonl`로 돌려 두고(선택적으로 gzip) 새 파일에 이어 쓴다.
+close()는 큐에 남은 레코드까지 모두 쓰고 닫는다 (정상 종료 시 유실 없음).
+"""
+import gzip
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, List, Optional
+
+from app.metrics import LOG_QUEUE_DEPTH, LOG_RECORDS_TOTAL
+from app.serialization import dumps_bytes
+
+logger = logging.getLogger(__name__)
+
+FSYNC_POLICIES = ("never", "interval", "always")
+_STOP = object()
+
+
+class JsonlWriter:
+    def __init__(
+        self,
+        path: Path,
+        queue_size: int = 10000,
+        batch_size: int = 256,
+        flush_interval_s: float = 0.2,
+        fsync: str = "interval",
+        fsync_interval_s: float = 1.0,
+        max_bytes: int = 0,
+        rotate_s: float = 0,
+        compress: bool = False,
+        keep: int = 0,
+    ):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"unknown fsync policy: {fsync} (choose from {', '.join(FSYNC_POLICIES)})")
+        self.path = Path(path)
+        self.name = self.path.name
+        self.batch_size = max(1, batch_size)
+        self.flush_interval_s = flush_interval_s
+        self.fsync = fsync
+        self.fsync_interval_s = fsync_interval_s
+        self.max_bytes = max_bytes
+        self.rotate_s = rotate_s
+        self.compress = compress
+        self.keep = keep
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+        self._lock = threading.Lock()
+        self._close_lock = threading.Lock()  # close()끼리만 직렬화 (write()는 막지 않음)
+        self._prune_lock = threading.Lock()  # 로테이션·압축 스레드의 조각 정리 직렬화
+        self._compressing: set = set()  # 압축 중인 조각 이름 (정리 대상에서 제외)
+        self._thread: Optional[threading.Thread] = None
+        self._compressors: List[threading.Thread] = []
+        self._file = None
+        self._size = 0
+        self._opened_at = 0.0
+        self._last_fsync = 0.0
+        self._dirty = False  # 마지막 fsync 뒤에 쓴 내용이 있는지
+
+    def write(self, record: Any) -> bool:
+        """레코드(JSON으로 직렬화할 값)를 큐에 넣는다. 큐가 가득 차 버렸으면 False."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_TOTAL.inc(log=self.name, result="dropped")
+            return False
+        return True
+
+    def _ensure_started(self) -> None:
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            return
+        with self._lock:
+            # 이전 writer가 아직 살아 있으면(close 시간 초과 등) 같은 파일에 두 번째 writer를 띄우지 않는다
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=f"log-writer-{self.name}", daemon=True)
+                self._thread.start()
+
+    def close(self, timeout: float = 10.0) -> None:
+        """남은 레코드를 모두 쓰고 파일을 닫는다. 이후 write()가 오면 writer를 다시 시작한다.
+        timeout 안에 끝나지 않으면 writer를 그대로 두고 돌아온다 (끝나기 전에는 새 writer를 띄우지 않음)."""
+        with self._close_lock:
+            thread = self._thread
+            if thread is None or not thread.is_alive():
+                if self._queue.empty():
+                    return
+                self._ensure_started()  # 이전 writer가 늦게 끝나 큐에 남은 레코드: 새 writer로 마저 쓴다
+                thread = self._thread
+            try:
+                self._queue.put(_STOP, timeout=timeout)  # 잠금 밖: 큐가 가득 차도 write()는 막히지 않는다
+            except queue.Full:
+                logger.warning("로그 writer 종료 요청 실패: 큐가 비지 않음 (%s)", self.name)
+                return
+            thread.join(timeout)
+            if thread.is_alive():
+                logger.warning("로그 writer 종료 대기 시간 초과 (%s, 남은 레코드 %d)", self.name, self._queue.qsize())
+                return
+            with self._lock:
+                if self._thread is thread:
+                    self._thread = None
+        for t in list(self._compressors):
+            t.join(timeout)
+        self._compressors = [t for t in self._compressors if t.is_alive()]
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            try:
+                item = self._queue.get(timeout=self.flush_interval_s)
+            except queue.Empty:
+                self._maintain()
+                continue
+            batch = []
+            deadline = time.monotonic() + self.flush_interval_s
+            while True:
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if stopping:  # close() 뒤에 들어온 레코드까지
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is not _STOP:
+                        batch.append(item)
+            if batch:
+                self._write_batch(batch)
+            LOG_QUEUE_DEPTH.set(self._queue.qsize(), log=self.name)
+        self._close_file(fsync=self.fsync != "never")
+
+    def _write_batch(self, batch: list) -> None:
+        data = b"".join(dumps_bytes(record) + b"\n" for record in batch)
+        try:
+            if self._file is not None and self._should_rotate(len(data)):
+                self._rotate()
+            if self._file is None:
+                self._open()
+            self._file.write(data)
+            self._file.flush()
+            self._size += len(data)
+            self._dirty = True
+            self._sync()
+        except (OSError, ValueError) as e:  # ValueError: 닫힌 파일
+            logger.warning("로그 기록 실패 (%s, %d건 버림): %s", self.name, len(batch), e)
+            LOG_RECORDS_TOTAL.inc(len(batch), log=self.name, result="dropped")
+            self._close_file(fsync=False)
+            return
+        LOG_RECORDS_TOTAL.inc(len(batch), log=self.name, result="written")
+
+    def _maintain(self) -> None:
+        """쉬는 동안: 시간 기준 로테이션과 interval fsync."""
+        try:
+            if self._file is not None and self.rotate_s > 0 and time.monotonic() - self._opened_at >= self.rotate_s:
+                self._rotate()
+            elif self._file is not None:
+                self._sync()
+        except OSError as e:
+            logger.warning("로그 파일 정리 실패 (%s): %s", self.name, e)
+
+    def _should_rotate(self, incoming: int) -> bool:
+        if self.max_bytes > 0 and self._size > 0 and self._size + incoming > self.max_bytes:
+            return True
+        return self.rotate_s > 0 and time.monotonic() - self._opened_at >= self.rotate_s
+
+    def _open(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "ab")
+        self._size = self._file.tell()
+        self._opened_at = time.monotonic()
+
+    def _sync(self) -> None:
+        if not self._dirty:
+            return
+        if self.fsync == "always" or (
+            self.fsync == "interval" and time.monotonic() - self._last_fsync >= self.fsync_interval_s
+        ):
+            os.fsync(self._file.fileno())
+            self._last_fsync = time.monotonic()
+            self._dirty = False
+
+    def _close_file(self, fsync: bool) -> None:
+        if self._file is None:
+            return
+        try:
+            self._file.flush()
+            if fsync:
+                os.fsync(self._file.fileno())
+            self._file.close()
+        except (OSError, ValueError) as e:
+            logger.warning("로그 파일 닫기 실패 (%s): %s", self.name, e)
+        self._file = None
+        self._dirty = False
+
+    def _rotate(self) -> None:
+        """현재 파일을 `<stem>.<시각><suffix>`로 옮기고, 필요하면 gzip(별도 스레드)·오래된 조각 삭제."""
+        self._close_file(fsync=self.fsync != "never")
+        if not self.path.exists() or self.path.stat().st_size == 0:
+            return
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")  # 이름순 = 시간순
+        target = self.path.with_name(f"{self.path.stem}.{stamp}{self.path.suffix}")
+        n = 1
+        while target.exists() or target.with_name(target.name + ".gz").exists():
+            target = self.path.with_name(f"{self.path.stem}.{stamp}-{n}{self.path.suffix}")
+            n += 1
+        os.replace(self.path, target)
+        logger.info("로그 로테이션: %s → %s", self.path.name, target.name)
+        if self.compress:
+            with self._prune_lock:
+                self._compressing.add(target.name)
+            t = threading.Thread(target=self._compress, args=(target,), name=f"log-gzip-{self.name}", daemon=True)
+            t.start()
+            self._compressors = [c for c in self._compressors if c.is_alive()] + [t]
+        else:
+            self._prune()
+
+    def _compress(self, path: Path) -> None:
+        gz = path.with_name(path.name + ".gz")
+        try:
+            with open(path, "rb") as src, gzip.open(gz.with_name(gz.name + ".tmp"), "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.replace(gz.with_name(gz.name + ".tmp"), gz)
+            path.unlink()
+        except OSError as e:
+            logger.warning("로그 압축 실패 (%s): %s", path.name, e)
+            return
+        finally:
+            with self._prune_lock:
+                self._compressing.discard(path.name)
+        self._prune()
+
+    def segments(self) -> List[Path]:
+        """로테이션된 조각들 (오래된 것부터)."""
+        pattern = f"{self.path.stem}.*{self.path.suffix}"
+        found = list(self.path.parent.glob(pattern)) + list(self.path.parent.glob(pattern + ".gz"))
+        return sorted(p for p in found if p != self.path)
+
+    def _prune(self) -> None:
+        """오래된 조각을 keep개만 남기고 지운다. 압축 직후 잠깐 .jsonl과 .jsonl.gz가 같이 있어도 한 조각으로 세고,
+        압축 중인 조각은 지우지 않는다."""
+        if self.keep <= 0:
+            return
+        with self._prune_lock:
+            groups: dict = {}
+            for p in self.segments():
+                groups.setdefault(p.name[:-3] if p.name.endswith(".gz") else p.name, []).append(p)
+            for name in sorted(groups)[:-self.keep]:
+                if name in self._compressing:
+                    continue
+                for old in groups[name]:
+                    try:
+                        old.unlink()
+                    except OSError as e:
+                        logger.warning("오래된 로그 삭제 실패 (%s): %s", old.name, e)
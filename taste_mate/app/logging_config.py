@@ -1,27 +1,60 @@
-"""Logging: input context summary + output to file."""
-import json
+"""Logging: input context summary + output to file (background writer, app/log_writer.py)."""
+import atexit
 import logging
+import os
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
+from app.log_writer import JsonlWriter
 from app.models import Context, ReasonResponse
+from app.tracing import RequestIdFilter, request_id
 
 LOG_DIR = Path(__file__).resolve().parent.parent / "logs"
 
+# logs/reason_calls.jsonl writer: 큐 크기(가득 차면 버리고 셈), 한 번에 쓰는 최대 건수, flush 주기(ms),
+# fsync 정책(never | interval | always)과 interval 주기(초)
+REASON_LOG_QUEUE_SIZE = int(os.getenv("REASON_LOG_QUEUE_SIZE", "10000"))
+REASON_LOG_BATCH_SIZE = int(os.getenv("REASON_LOG_BATCH_SIZE", "256"))
+REASON_LOG_FLUSH_MS = float(os.getenv("REASON_LOG_FLUSH_MS", "200"))
+REASON_LOG_FSYNC = os.getenv("REASON_LOG_FSYNC", "interval")
+REASON_LOG_FSYNC_INTERVAL_S = float(os.getenv("REASON_LOG_FSYNC_INTERVAL_S", "1"))
+# 로테이션: 파일 크기(바이트) 또는 파일을 연 뒤 경과 시간(초) 기준 (0이면 해당 기준 끔), 돌린 조각 gzip 여부,
+# 남길 조각 수 (0이면 모두 보관)
+REASON_LOG_MAX_BYTES = int(os.getenv("REASON_LOG_MAX_BYTES", str(100 * 1024 * 1024)))
+REASON_LOG_ROTATE_S = float(os.getenv("REASON_LOG_ROTATE_S", "0"))
+REASON_LOG_GZIP = os.getenv("REASON_LOG_GZIP", "1") == "1"
+REASON_LOG_KEEP = int(os.getenv("REASON_LOG_KEEP", "0"))
+
+reason_log = JsonlWriter(
+    LOG_DIR / "reason_calls.jsonl",
+    queue_size=REASON_LOG_QUEUE_SIZE,
+    batch_size=REASON_LOG_BATCH_SIZE,
+    flush_interval_s=REASON_LOG_FLUSH_MS / 1000,
+    fsync=REASON_LOG_FSYNC,
+    fsync_interval_s=REASON_LOG_FSYNC_INTERVAL_S,
+    max_bytes=REASON_LOG_MAX_BYTES,
+    rotate_s=REASON_LOG_ROTATE_S,
+    compress=REASON_LOG_GZIP,
+    keep=REASON_LOG_KEEP,
+)
+atexit.register(reason_log.close)  # lifespan 밖(스크립트 등)에서 써도 종료 시 남은 레코드를 쓴다
+
 
 def setup_logging() -> None:
     LOG_DIR.mkdir(parents=True, exist_ok=True)
     logging.basicConfig(
         level=logging.INFO,
-        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+        format="%(asctime)s [%(levelname)s] [%(request_id)s] %(name)s: %(message)s",
         datefmt="%Y-%m-%d %H:%M:%S",
     )
+    for handler in logging.getLogger().handlers:  # 전파된 레코드에도 붙도록 logger가 아닌 핸들러에 단다
+        if not any(isinstance(f, RequestIdFilter) for f in handler.filters):
+            handler.addFilter(RequestIdFilter())
 
 
 def log_reason_call(context: Context, top_k: list[int], response: ReasonResponse, case_id: Optional[str] = None) -> None:
-    """Append one log line (context summary + output) to logs/reason_calls.jsonl."""
-    LOG_DIR.mkdir(parents=True, exist_ok=True)
+    """Queue one log line (context summary + output) for logs/reason_calls.jsonl. 파일 I/O 없이 바로 반환."""
     context_summary = {
         "meal_slot": context.meal_slot,
         "hunger_level": context.hunger_level,
@@ -37,6 +70,7 @@ def log_reason_call(context: Context, top_k: list[int], response: ReasonResponse
         }
     summary = {
         "timestamp": datetime.utcnow().isoformat() + "Z",
+        "request_id": request_id(),
         "case_id": case_id,
         "context_summary": context_summary,
         "top_k": top_k,
@@ -44,8 +78,12 @@ def log_reason_call(context: Context, top_k: list[int], response: ReasonResponse
             "selected_menu_id": response.selected_menu_id,
             "reason_one_liner": response.reason_one_liner,
             "reason_tags": response.reason_tags,
+            "reason_source": response.reason_source,
         },
     }
-    path = LOG_DIR / "reason_calls.jsonl"
-    with open(path, "a", encoding="utf-8") as f:
-        f.write(json.dumps(summary, ensure_ascii=False) + "\n")
+    reason_log.write(summary)
+
+
+def close_reason_log() -> None:
+    """남은 로그를 모두 쓰고 닫는다 (app 종료 시)."""
+    reason_log.close()
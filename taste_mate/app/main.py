@@ -1,21 +1,40 @@
 """FastAPI app: context + candidates → 룰 랭커 → LLM → JSON."""
 import logging
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import Optional
 
 from dotenv import load_dotenv
 
 load_dotenv(Path(__file__).resolve().parent.parent / ".env")
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-
-from app.models import Candidate, RecommendRequest, ReasonResponse, TopKResponse
-from app.llm import call_llm
-from app.logging_config import setup_logging, log_reason_call
-from app.ranker import rule_based_top_k
+from starlette.concurrency import run_in_threadpool
+
+from app import topk_cache
+from app.catalog import Catalog, registry as catalogs
+from app.models import (
+    BatchTopKRequest,
+    BatchTopKResponse,
+    Candidate,
+    CandidateSource,
+    CatalogInfo,
+    CatalogUploadRequest,
+    RecommendRequest,
+    ReasonResponse,
+    TopKResponse,
+)
+from app.llm import LLM_LATENCY_BUDGET_MS, acall_llm, breaker as llm_breaker, close_client, init_client
+from app.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from app.metrics import RECOMMEND_TOTAL, MetricsMiddleware, registry as metrics_registry, request_elapsed
+from app.logging_config import close_reason_log, log_reason_call, setup_logging
+from app.ranker import compile_context
+from app.serialization import ORJSONResponse, dumps
+from app.tracing import TracingMiddleware, annotate, close_traces, observe_validation, stage
 
 setup_logging()
 logger = logging.getLogger(__name__)
@@ -31,53 +50,211 @@ ROOT = Path(__file__).resolve().parent.parent
 
 # 수정 후 (Vertex AI/GCP 기준)
 _gcp_project = (os.getenv("GOOGLE_CLOUD_PROJECT") or "").strip()
-if _gcp_project:
+if os.getenv("LLM_BACKEND", "gemini") != "gemini":
+    logger.info("LLM_BACKEND=%s (Gemini 사용 안 함)", os.getenv("LLM_BACKEND"))
+elif _gcp_project:
     logger.info("Vertex AI 활성화됨 (프로젝트 ID: %s)", _gcp_project)
 else:
     logger.error("GOOGLE_CLOUD_PROJECT 설정 없음! Vertex AI 기능을 사용할 수 없습니다.")
 
-app = FastAPI(title="Recommendation API", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Gemini 클라이언트를 기동 시 한 번 만들고(LLM_WARMUP=1이면 warm-up 호출까지), 종료 시 닫는다.
+    await init_client()
+    yield
+    await close_client()
+    close_reason_log()  # 큐에 남은 추천 로그까지 기록
+    close_traces()
+
+
+app = FastAPI(title="Recommendation API", version="0.1.0", lifespan=lifespan, default_response_class=ORJSONResponse)
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)  # 가장 바깥: request id·trace가 다른 미들웨어까지 감싼다
 
 
-def _map_top_k_to_candidates(top_k: list[int], candidates: list[Candidate]) -> list[Candidate]:
-    id_to_candidate = {c.menu_id: c for c in candidates}
+def _map_top_k_to_candidates(top_k: list[int], id_to_candidate: dict[int, Candidate]) -> list[Candidate]:
     return [id_to_candidate[mid] for mid in top_k if mid in id_to_candidate]
 
 
+def _resolve_candidates(req: CandidateSource) -> Catalog:
+    """요청의 후보 세트 → Catalog. 등록된 카탈로그면 미리 만든 랭킹 구조를 그대로 사용."""
+    if req.catalog_id is None:
+        return Catalog.inline(req.candidates)
+    catalog = catalogs.get(req.catalog_id)
+    if catalog is None:
+        raise HTTPException(status_code=404, detail=f"Catalog not found: {req.catalog_id}")
+    if req.catalog_version is not None and req.catalog_version != catalog.version:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Catalog version mismatch: requested {req.catalog_version}, current {catalog.version}",
+        )
+    return catalog
+
+
 @app.post("/v1/top-k", response_model=TopKResponse)
 def top_k(req: RecommendRequest) -> TopKResponse:
-    """룰 랭커만: context + candidates → 상위 K개 menu_id. LLM 호출 없음."""
-    ids = rule_based_top_k(req.context, req.candidates, k=req.k)
+    """룰 랭커만: context + candidates(또는 catalog_id) → 상위 K개 menu_id. LLM 호출 없음."""
+    observe_validation("top_k")
+    with stage("top_k", "rank"):
+        catalog = _resolve_candidates(req)
+        ids = topk_cache.top_k(catalog, compile_context(req.context), req.k)
     return TopKResponse(top_k=ids)
 
 
-@app.post("/v1/recommend", response_model=ReasonResponse)
-def recommend(req: RecommendRequest) -> ReasonResponse:
-    """context + candidates → 룰 랭커(top_k) → LLM(1개 선택 + 사유) → JSON."""
-    top_k_ids = rule_based_top_k(req.context, req.candidates, k=req.k)
+@app.post("/v1/top-k:batch", response_model=BatchTopKResponse)
+def top_k_batch(req: BatchTopKRequest) -> BatchTopKResponse:
+    """룰 랭커만, context 여러 개 × 후보 세트 하나를 행렬로 한 번에 채점. 결과[i] == /v1/top-k(contexts[i])."""
+    observe_validation("top_k_batch")
+    with stage("top_k_batch", "rank"):
+        catalog = _resolve_candidates(req)
+        plans = [compile_context(c) for c in req.contexts]
+        results = topk_cache.batch_top_k(catalog, plans, req.k)
+    return BatchTopKResponse(results=[TopKResponse(top_k=ids) for ids in results])
+
+
+def _rank_for_recommend(req: RecommendRequest, endpoint: str = "recommend") -> tuple[list[int], list[Candidate]]:
+    with stage(endpoint, "rank"):
+        catalog = _resolve_candidates(req)
+        top_k_ids = topk_cache.top_k(catalog, compile_context(req.context), req.k)
     if not top_k_ids:
         raise HTTPException(status_code=400, detail="No candidates to rank")
-    selected_candidates = _map_top_k_to_candidates(top_k_ids, req.candidates)
-    response = call_llm(req.context, selected_candidates, top_k_ids)
-    log_reason_call(req.context, top_k_ids, response)
+    with stage(endpoint, "map_candidates"):
+        selected_candidates = _map_top_k_to_candidates(top_k_ids, catalog.id_to_candidate)
+    return top_k_ids, selected_candidates
+
+
+_OUTCOMES = {"live": "success", "cached": "cached", "precomputed": "precomputed", "fallback": "fallback"}
+
+
+def _llm_budget_s() -> Optional[float]:
+    """LLM_LATENCY_BUDGET_MS 중 남은 시간(초). 요청 시작부터 센다. 예산이 없으면 None."""
+    if LLM_LATENCY_BUDGET_MS <= 0:
+        return None
+    return max(0.0, LLM_LATENCY_BUDGET_MS / 1000 - request_elapsed())
+
+
+async def _reason_for(
+    req: RecommendRequest,
+    top_k_ids: list[int],
+    selected_candidates: list[Candidate],
+    endpoint: str = "recommend",
+    case_id: Optional[str] = None,
+) -> ReasonResponse:
+    """top_k → LLM(또는 캐시/fallback) 사유 + 로그 기록 + 지표."""
+    with stage(endpoint, "llm") as span:
+        response = await acall_llm(req.context, selected_candidates, top_k_ids, budget_s=_llm_budget_s())
+        span["reason_source"] = response.reason_source
+    with stage(endpoint, "log_write"):
+        log_reason_call(req.context, top_k_ids, response, case_id)  # 큐에 넣기만 함 (기록은 백그라운드 writer)
+    RECOMMEND_TOTAL.inc(outcome=_OUTCOMES.get(response.reason_source, "success"))
+    annotate(reason_source=response.reason_source)
     return ReasonResponse(
         selected_menu_id=response.selected_menu_id,
         reason_one_liner=response.reason_one_liner,
         reason_tags=response.reason_tags,
         top_k_used=top_k_ids,
+        reason_source=response.reason_source,
+    )
+
+
+@app.post("/v1/recommend", response_model=ReasonResponse)
+async def recommend(
+    req: RecommendRequest, case_id: Optional[str] = Header(None, alias="X-Case-ID")
+) -> ReasonResponse:
+    """context + candidates(또는 catalog_id) → 룰 랭커(top_k) → LLM(1개 선택 + 사유) → JSON.
+    랭킹(CPU)은 스레드풀에서, LLM 대기는 이벤트 루프에서 처리한다. X-Case-ID는 추천 로그·trace에 남는다."""
+    observe_validation("recommend")
+    annotate(**{"case.id": case_id})
+    top_k_ids, selected_candidates = await run_in_threadpool(_rank_for_recommend, req)
+    return await _reason_for(req, top_k_ids, selected_candidates, case_id=case_id)
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {dumps(data)}\n\n"
+
+
+@app.post("/v1/recommend/stream")
+async def recommend_stream(
+    req: RecommendRequest, case_id: Optional[str] = Header(None, alias="X-Case-ID")
+) -> StreamingResponse:
+    """/v1/recommend와 같은 요청, Server-Sent Events 응답.
+    랭킹이 끝나면 바로 `top_k` 이벤트(top_k + 후보 정보), LLM이 끝나거나 fallback이면 `reason` 이벤트
+    (/v1/recommend 응답과 같은 본문). 도중 오류는 `error` 이벤트. 랭킹 단계 오류(404/409/400)는 일반 HTTP 오류."""
+    observe_validation("recommend_stream")
+    annotate(**{"case.id": case_id})
+    top_k_ids, selected_candidates = await run_in_threadpool(_rank_for_recommend, req, "recommend_stream")
+
+    async def events():
+        yield _sse("top_k", {
+            "top_k": top_k_ids,
+            "candidates": [c.model_dump() for c in selected_candidates],
+        })
+        try:
+            response = await _reason_for(req, top_k_ids, selected_candidates, "recommend_stream", case_id)
+        except Exception as e:
+            logger.exception("스트리밍 사유 생성 실패: %s", e)
+            yield _sse("error", {"detail": "reason generation failed"})
+            return
+        yield _sse("reason", response.model_dump())
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _catalog_info(catalog: Catalog) -> CatalogInfo:
+    return CatalogInfo(
+        catalog_id=catalog.catalog_id,
+        version=catalog.version,
+        fingerprint=catalog.fingerprint,
+        size=len(catalog.candidates),
+        updated_at=catalog.updated_at,
     )
 
 
+@app.put("/v1/catalogs/{catalog_id}", response_model=CatalogInfo)
+def put_catalog(catalog_id: str, req: CatalogUploadRequest) -> CatalogInfo:
+    """후보 세트를 서버에 올려 두고 version을 돌려줌. 이후 요청은 catalog_id로 참조."""
+    return _catalog_info(catalogs.put(catalog_id, req.candidates))
+
+
+@app.get("/v1/catalogs/{catalog_id}", response_model=CatalogInfo)
+def get_catalog(catalog_id: str) -> CatalogInfo:
+    catalog = catalogs.get(catalog_id)
+    if catalog is None:
+        raise HTTPException(status_code=404, detail=f"Catalog not found: {catalog_id}")
+    return _catalog_info(catalog)
+
+
+@app.delete("/v1/catalogs/{catalog_id}", response_model=CatalogInfo)
+def delete_catalog(catalog_id: str) -> CatalogInfo:
+    catalog = catalogs.delete(catalog_id)
+    if catalog is None:
+        raise HTTPException(status_code=404, detail=f"Catalog not found: {catalog_id}")
+    return _catalog_info(catalog)
+
+
 @app.get("/health")
 def health():
-    return {"status": "ok"}
+    """LLM circuit이 open/half_open이면 status=degraded (추천은 fallback으로 계속 응답하므로 200)."""
+    circuit = llm_breaker.stats()
+    status = "degraded" if circuit["state"] in ("open", "half_open") else "ok"
+    return {"status": status, "llm_circuit": circuit}
+
+
+@app.get("/metrics")
+def metrics():
+    """단계별 지연 히스토그램(+p50/p95/p99), fallback/파싱 실패 카운터 — Prometheus 텍스트 포맷."""
+    return Response(content=metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
 
 
-def _read_json(path: Path):
-    import json
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+def _json_file_response(path: Path) -> Response:
+    """JSON 파일을 파싱·재직렬화 없이 그대로 응답."""
+    return Response(content=path.read_bytes(), media_type="application/json")
 
 
 @app.get("/v1/test-cases")
@@ -85,7 +262,7 @@ def get_test_cases():
     path = ROOT / "data" / "test_cases.json"
     if not path.exists():
         raise HTTPException(status_code=404, detail="test_cases.json not found")
-    return _read_json(path)
+    return _json_file_response(path)
 
 
 @app.get("/v1/candidates")
@@ -93,7 +270,7 @@ def get_candidates():
     path = ROOT / "data" / "candidates.json"
     if not path.exists():
         raise HTTPException(status_code=404, detail="candidates.json not found")
-    return _read_json(path)
+    return _json_file_response(path)
 
 
 def _load_index_html():
@@ -0,0 +1,290 @@
+"""
+In-process 지표: 카운터·히스토그램을 메모리에 모아 /metrics 에서 Prometheus 텍스트 포맷으로 내보낸다.
+추천 파이프라인 단계(검증, 랭킹, 후보 매핑, LLM, 로그 기록)마다 시간을 재고,
+히스토그램 버킷과 함께 최근 WINDOW_SIZE개 샘플 기준 p50/p95/p99도 같이 출력한다.
+"""
+import bisect
+import contextvars
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+PREFIX = "taste_mate"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUANTILES = (0.5, 0.95, 0.99)
+WINDOW_SIZE = 1024
+_INF_LABEL = 'le="+Inf"'
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self._values: Dict[Tuple[str, ...], float] = {} if labels else {(): 0.0}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(str(labels[n]) for n in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(tuple(str(labels[n]) for n in self.labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, v in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, key)} {_format_value(v)}")
+        return lines
+
+
+class Gauge:
+    """값을 직접 set 하거나, 렌더링 시점에 callback으로 읽는 게이지."""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (),
+                 callback: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.callback = callback
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[tuple(str(labels[n]) for n in self.labels)] = value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            values = dict(self._values)
+        if self.callback is not None:
+            values.update(self.callback())
+        for key, v in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, key)} {_format_value(float(v))}")
+        return lines
+
+
+class _Series:
+    def __init__(self, n_buckets: int):
+        self.bucket_counts = [0] * n_buckets
+        self.count = 0
+        self.total = 0.0
+        self.window: deque = deque(maxlen=WINDOW_SIZE)
+
+
+class Histogram:
+    """Prometheus 히스토그램 + 최근 샘플 창 기준 분위수 (별도 gauge `<name>_window`로 출력)."""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], _Series] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels[n]) for n in self.labels)
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = _Series(len(self.buckets))
+            i = bisect.bisect_left(self.buckets, value)
+            if i < len(self.buckets):
+                s.bucket_counts[i] += 1
+            s.count += 1
+            s.total += value
+            s.window.append(value)
+
+    def quantiles(self, **labels: str) -> Dict[float, float]:
+        """최근 WINDOW_SIZE개 샘플의 p50/p95/p99 (샘플 없으면 빈 dict)."""
+        key = tuple(str(labels[n]) for n in self.labels)
+        with self._lock:
+            s = self._series.get(key)
+            window = sorted(s.window) if s else []
+        return _quantiles(window)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        window_lines = [
+            f"# HELP {self.name}_window {self.help} (최근 {WINDOW_SIZE}개 샘플 분위수)",
+            f"# TYPE {self.name}_window gauge",
+        ]
+        with self._lock:
+            snapshot = [(key, list(s.bucket_counts), s.count, s.total, sorted(s.window))
+                        for key, s in sorted(self._series.items())]
+        for key, bucket_counts, count, total, window in snapshot:
+            cumulative = 0
+            for le, c in zip(self.buckets, bucket_counts):
+                cumulative += c
+                labels = _format_labels(self.labels, key, f'le="{_format_value(float(le))}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, _INF_LABEL)} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+            for q, v in _quantiles(window).items():
+                labels = _format_labels(self.labels, key, f'quantile="{q}"')
+                window_lines.append(f"{self.name}_window{labels} {_format_value(v)}")
+        return lines + window_lines
+
+
+def _quantiles(ordered: List[float]) -> Dict[float, float]:
+    if not ordered:
+        return {}
+    return {q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in QUANTILES}
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for m in self._metrics:
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+STAGE_SECONDS = registry.register(Histogram(
+    f"{PREFIX}_stage_duration_seconds", "요청 처리 단계별 소요 시간", ("endpoint", "stage"),
+))
+HTTP_SECONDS = registry.register(Histogram(
+    f"{PREFIX}_http_request_duration_seconds", "HTTP 요청 전체 소요 시간", ("method", "route", "status"),
+))
+RECOMMEND_TOTAL = registry.register(Counter(
+    f"{PREFIX}_recommend_total", "/v1/recommend 응답 수 (LLM 성공/fallback)", ("outcome",),
+))
+LLM_FALLBACK_TOTAL = registry.register(Counter(
+    f"{PREFIX}_llm_fallback_total", "LLM fallback 원인별 횟수", ("reason",),
+))
+LLM_PARSE_FAILURES_TOTAL = registry.register(Counter(
+    f"{PREFIX}_llm_parse_failures_total", "LLM 응답 JSON 파싱/검증 실패 횟수",
+))
+
+LLM_COALESCED_TOTAL = registry.register(Counter(
+    f"{PREFIX}_llm_coalesced_total", "진행 중인 같은 프롬프트의 LLM 호출 결과를 공유한 요청 수",
+))
+
+LLM_BATCH_SIZE = registry.register(Histogram(
+    f"{PREFIX}_llm_batch_size", "마이크로 배칭으로 LLM 호출 하나에 묶인 요청 수", buckets=(1, 2, 4, 8, 16, 32, 64),
+))
+
+CIRCUIT_STATE = registry.register(Gauge(
+    f"{PREFIX}_circuit_state", "circuit breaker 현재 상태 (해당 state만 1)", ("breaker", "state"),
+))
+CIRCUIT_TRANSITIONS_TOTAL = registry.register(Counter(
+    f"{PREFIX}_circuit_transitions_total", "circuit breaker 상태 전환 횟수 (전환된 상태별)", ("breaker", "to"),
+))
+
+LOG_RECORDS_TOTAL = registry.register(Counter(
+    f"{PREFIX}_log_records_total", "백그라운드 로그 writer 레코드 수 (written / dropped: 큐 가득 참·쓰기 실패)", ("log", "result"),
+))
+LOG_QUEUE_DEPTH = registry.register(Gauge(
+    f"{PREFIX}_log_queue_depth", "백그라운드 로그 writer 큐에 남은 레코드 수", ("log",),
+))
+
+_caches: Dict[str, object] = {}
+
+
+def register_cache(name: str, cache) -> None:
+    """stats() -> dict 를 가진 캐시를 CACHE_STATS 게이지에 노출."""
+    _caches[name] = cache
+
+
+def _cache_stats() -> Dict[Tuple[str, ...], float]:
+    return {(name, stat): value for name, c in _caches.items() for stat, value in c.stats().items()}
+
+
+CACHE_STATS = registry.register(Gauge(
+    f"{PREFIX}_cache", "캐시 상태 (size, hits, misses, evictions, expirations, hit_rate)", ("cache", "stat"),
+    callback=_cache_stats,
+))
+
+# 요청 시작 시각 (미들웨어가 설정). 핸들러 진입까지 걸린 시간 = 본문 수신 + JSON 파싱 + 검증.
+_request_start: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("request_start", default=None)
+
+
+@contextmanager
+def stage(endpoint: str, name: str) -> Iterator[None]:
+    """with 블록 소요 시간을 STAGE_SECONDS에 기록."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - t0, endpoint=endpoint, stage=name)
+
+
+def request_elapsed() -> float:
+    """요청 시작(미들웨어)부터 지금까지 초. 미들웨어 밖이면 0."""
+    start = _request_start.get()
+    return time.perf_counter() - start if start is not None else 0.0
+
+
+def observe_validation(endpoint: str) -> None:
+    """핸들러 첫 줄에서 호출. 요청 시작부터 지금까지를 'validation' 단계로 기록."""
+    start = _request_start.get()
+    if start is not None:
+        STAGE_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint, stage="validation")
+
+
+class MetricsMiddleware:
+    """요청 시작 시각을 contextvar에 남기고, 요청 전체 시간을 route 템플릿 기준으로 기록 (ASGI 미들웨어)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        t0 = time.perf_counter()
+        token = _request_start.set(t0)
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_start.reset(token)
+            route = scope.get("route")
+            HTTP_SECONDS.observe(
+                time.perf_counter() - t0,
+                method=scope.get("method", ""),
+                route=getattr(route, "path", "unmatched"),
+                status=str(status["code"]),
+            )
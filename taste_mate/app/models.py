@@ -3,7 +3,7 @@ from __future__ import annotations
 
 from typing import Literal, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class RecentMeal(BaseModel):
@@ -44,13 +44,49 @@ class ReasonResponse(BaseModel):
     reason_one_liner: str
     reason_tags: list[str]
     top_k_used: Optional[list[int]] = None
+    # 사유 출처: live(이번 요청의 LLM 응답), cached(사유 캐시), precomputed(오프라인 사유 표), fallback(템플릿 사유)
+    reason_source: Optional[Literal["live", "cached", "precomputed", "fallback"]] = None
 
 
-class RecommendRequest(BaseModel):
+class CandidateSource(BaseModel):
+    """후보는 candidates(인라인)나 catalog_id(PUT /v1/catalogs/{id}로 올린 카탈로그) 중 하나로 지정."""
+    candidates: Optional[list[Candidate]] = None
+    catalog_id: Optional[str] = None
+    catalog_version: Optional[int] = None  # 주면 카탈로그 버전이 다를 때 409
+
+    @model_validator(mode="after")
+    def _check_candidate_source(self) -> "CandidateSource":
+        if (self.candidates is None) == (self.catalog_id is None):
+            raise ValueError("candidates와 catalog_id 중 정확히 하나만 지정해야 합니다.")
+        return self
+
+
+class RecommendRequest(CandidateSource):
     context: Context
-    candidates: list[Candidate]
+    k: int = Field(default=5, ge=1, le=20)
+
+
+class BatchTopKRequest(CandidateSource):
+    """한 후보 세트에 context 여러 개. 결과 순서는 contexts 순서와 같음."""
+    contexts: list[Context] = Field(min_length=1, max_length=1000)
     k: int = Field(default=5, ge=1, le=20)
 
 
 class TopKResponse(BaseModel):
     top_k: list[int]
+
+
+class BatchTopKResponse(BaseModel):
+    results: list[TopKResponse]
+
+
+class CatalogUploadRequest(BaseModel):
+    candidates: list[Candidate]
+
+
+class CatalogInfo(BaseModel):
+    catalog_id: str
+    version: int
+    fingerprint: str
+    size: int
+    updated_at: str
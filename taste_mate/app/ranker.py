@@ -7,13 +7,17 @@ context + 후보 메뉴 전체 → 휴리스틱 점수 합산 → 상위 K개 me
 실제 조리시간(prep_time)보다 거리·배달·분위기 등이 중요. prep_time은 거의 반영하지 않고,
 effort_level은 "간단히 → 간편/빠른 메뉴", "제대로 → 분위기/데이트" 같은 태그 매칭으로만 사용.
 """
+import hashlib
 import re
-from typing import List, Tuple
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Dict, FrozenSet, List, Mapping, Tuple
 
 from app.models import Candidate, Context
+from app.serialization import dumps_bytes
 
 
-# 점수 가중치 (나중에 튜닝 가능)
+# 점수 가중치 (나중에 튜닝 가능). 아래 가중치·태그 표는 import 뒤에 바꾸지 않는다 (table_fingerprint 참고)
 WEIGHT_MEAL_SLOT = 2.0
 WEIGHT_WEATHER = 2.0
 WEIGHT_EFFORT = 1.0   # 주문/외식 위주라 조리시간 대신 태그만 사용
@@ -54,31 +58,6 @@ def _parse_budget_range(budget_range: str) -> Tuple[float, float]:
     return 0.0, 999999.0
 
 
-def _score_meal_slot(context: Context, c: Candidate) -> float:
-    """시간대와 태그 매칭."""
-    preferred = MEAL_SLOT_TAGS.get(context.meal_slot, [])
-    if not preferred:
-        return 0.0
-    match = sum(1 for t in preferred if t in c.tags)
-    return (match / len(preferred)) * WEIGHT_MEAL_SLOT if preferred else 0.0
-
-
-def _score_weather(context: Context, c: Candidate) -> float:
-    """날씨(추움/더움)와 태그 매칭."""
-    if not context.weather:
-        return 0.0
-    cond = (context.weather.condition or "").lower()
-    temp = context.weather.temp_c
-    score = 0.0
-    if temp < 10 or cond in ("rain", "snow"):
-        match = sum(1 for t in COLD_TAGS if t in c.tags)
-        score += (match / len(COLD_TAGS)) * WEIGHT_WEATHER if COLD_TAGS else 0.0
-    if temp > 26:
-        match = sum(1 for t in HOT_TAGS if t in c.tags)
-        score += (match / len(HOT_TAGS)) * WEIGHT_WEATHER if HOT_TAGS else 0.0
-    return score
-
-
 # 주문/외식 추천용: effort는 "조리시간"이 아니라 "메뉴 성격(간편 vs 제대로)" 태그로만 매칭.
 # 거리/배달시간은 후보에 route 정보가 생기면 그때 반영 예정.
 EFFORT_TAGS = {
@@ -88,57 +67,141 @@ EFFORT_TAGS = {
 }
 
 
-def _score_effort(context: Context, c: Candidate) -> float:
-    """노력 수준과 메뉴 태그 매칭. (주문/외식 위주라 prep_time은 사용하지 않음)"""
-    preferred = EFFORT_TAGS.get(context.effort_level, [])
-    if not preferred:
-        return 0.0
-    match = sum(1 for t in preferred if t in c.tags)
-    return (match / len(preferred)) * WEIGHT_EFFORT if preferred else 0.0
+# ScoringPlan.score에서 항을 더하는 순서. budget/recent는 태그가 아니라 가격·카테고리로 계산.
+# 부동소수점 합 순서가 바뀌면 동점 순서가 달라질 수 있으므로 엔진도 이 순서를 따른다.
+TAG_TERMS = ("meal_slot", "weather", "effort", "mood")
 
 
-def _score_budget(context: Context, c: Candidate) -> float:
-    """예산 범위 안이면 만점, 밖이면 거리만큼 감점."""
-    low, high = _parse_budget_range(context.budget_range)
-    p = c.price_est
-    if low <= p <= high:
-        return WEIGHT_BUDGET
-    if p < low:
-        return WEIGHT_BUDGET * 0.8  # 예산 미만이면 약간만 감점
-    # 초과 시 초과량에 비례 감점
-    over = p - high
-    return max(0.0, WEIGHT_BUDGET - over / 5000.0)
-
-
-def _score_recent_penalty(context: Context, c: Candidate) -> float:
-    """최근 먹은 카테고리와 같으면 다양성 위해 감점."""
-    if not context.recent_meals:
-        return 0.0
-    recent_cats = {r.category for r in context.recent_meals}
-    if c.category in recent_cats:
-        return WEIGHT_RECENT_PENALTY
-    return 0.0
-
-
-def _score_mood(context: Context, c: Candidate) -> float:
-    """기분과 태그 보조 매칭."""
+@dataclass(frozen=True)
+class TagGroup:
+    """선호 태그 묶음 하나. 점수 = (후보가 가진 태그 수 / len(tags)) * weight."""
+    term: str
+    tags: Tuple[str, ...]
+    weight: float
+
+    def score(self, match: int) -> float:
+        return (match / len(self.tags)) * self.weight
+
+
+@dataclass(frozen=True)
+class ScoringPlan:
+    """
+    context 하나를 채점용으로 미리 컴파일한 결과 (불변, 해시 가능).
+    - groups: 적용되는 선호 태그 묶음 (시간대, 날씨 추움/더움, 노력, 기분)
+    - tag_groups: 태그 → 그 태그가 속한 groups 인덱스 (태그→가중치 맵 역할)
+    - budget_low / budget_high: 파싱된 예산 범위
+    - penalized_categories: 최근 먹어서 감점할 카테고리
+    후보 채점은 후보 태그를 한 번 훑으며 tag_groups만 조회하면 된다.
+    """
+    groups: Tuple[TagGroup, ...]
+    budget_low: float
+    budget_high: float
+    penalized_categories: FrozenSet[str]
+    tag_groups: Mapping[str, Tuple[int, ...]] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        index: Dict[str, List[int]] = {}
+        for gi, g in enumerate(self.groups):
+            for t in g.tags:  # preferred 안의 중복 태그는 기존처럼 두 번 센다
+                index.setdefault(t, []).append(gi)
+        object.__setattr__(
+            self, "tag_groups", MappingProxyType({t: tuple(gis) for t, gis in index.items()})
+        )
+
+    def score_budget(self, price: float) -> float:
+        """예산 범위 안이면 만점, 밖이면 거리만큼 감점."""
+        if self.budget_low <= price <= self.budget_high:
+            return WEIGHT_BUDGET
+        if price < self.budget_low:
+            return WEIGHT_BUDGET * 0.8  # 예산 미만이면 약간만 감점
+        # 초과 시 초과량에 비례 감점
+        over = price - self.budget_high
+        return max(0.0, WEIGHT_BUDGET - over / 5000.0)
+
+    def score_recent(self, category: str) -> float:
+        """최근 먹은 카테고리와 같으면 다양성 위해 감점."""
+        return WEIGHT_RECENT_PENALTY if category in self.penalized_categories else 0.0
+
+    def score(self, c: Candidate) -> float:
+        """한 후보에 대한 총점. 후보 태그를 한 번만 훑는다."""
+        counts = [0] * len(self.groups)
+        for t in set(c.tags):  # `t in c.tags`와 같이 후보 쪽 중복 태그는 한 번만
+            for gi in self.tag_groups.get(t, ()):
+                counts[gi] += 1
+        terms = dict.fromkeys(TAG_TERMS, 0.0)
+        for g, match in zip(self.groups, counts):
+            terms[g.term] += g.score(match)
+        return (
+            terms["meal_slot"]
+            + terms["weather"]
+            + terms["effort"]
+            + self.score_budget(c.price_est)
+            + self.score_recent(c.category)
+            + terms["mood"]
+        )
+
+
+def weather_flags(context: Context) -> Tuple[bool, bool]:
+    """(추움, 더움). 추움 = 10도 미만이거나 비/눈, 더움 = 26도 초과. 날씨가 없으면 둘 다 False."""
+    if not context.weather:
+        return False, False
+    cond = (context.weather.condition or "").lower()
+    temp = context.weather.temp_c
+    return temp < 10 or cond in ("rain", "snow"), temp > 26
+
+
+def compile_context(context: Context) -> ScoringPlan:
+    """context에서 채점에 필요한 부분만 뽑아 ScoringPlan으로 만든다. 요청당 한 번."""
+    groups: List[TagGroup] = []
+    # 시간대와 태그 매칭
+    preferred = MEAL_SLOT_TAGS.get(context.meal_slot, [])
+    if preferred:
+        groups.append(TagGroup("meal_slot", tuple(preferred), WEIGHT_MEAL_SLOT))
+    # 날씨(추움/더움)와 태그 매칭
+    cold, hot = weather_flags(context)
+    if cold and COLD_TAGS:
+        groups.append(TagGroup("weather", tuple(COLD_TAGS), WEIGHT_WEATHER))
+    if hot and HOT_TAGS:
+        groups.append(TagGroup("weather", tuple(HOT_TAGS), WEIGHT_WEATHER))
+    # 노력 수준과 메뉴 태그 매칭 (주문/외식 위주라 prep_time은 사용하지 않음)
+    preferred = EFFORT_TAGS.get(context.effort_level, [])
+    if preferred:
+        groups.append(TagGroup("effort", tuple(preferred), WEIGHT_EFFORT))
+    # 기분과 태그 보조 매칭
     preferred = MOOD_TAGS.get(context.mood, [])
-    if not preferred:
-        return 0.0
-    match = sum(1 for t in preferred if t in c.tags)
-    return (match / len(preferred)) * WEIGHT_MOOD if preferred else 0.0
+    if preferred:
+        groups.append(TagGroup("mood", tuple(preferred), WEIGHT_MOOD))
+
+    low, high = _parse_budget_range(context.budget_range)
+    return ScoringPlan(
+        groups=tuple(groups),
+        budget_low=low,
+        budget_high=high,
+        penalized_categories=frozenset(r.category for r in context.recent_meals),
+    )
+
+
+def _compute_table_fingerprint() -> str:
+    tables = [
+        WEIGHT_MEAL_SLOT, WEIGHT_WEATHER, WEIGHT_EFFORT, WEIGHT_BUDGET, WEIGHT_RECENT_PENALTY, WEIGHT_MOOD,
+        MEAL_SLOT_TAGS, COLD_TAGS, HOT_TAGS, MOOD_TAGS, EFFORT_TAGS,
+    ]
+    return hashlib.sha1(dumps_bytes(tables, sort_keys=True)).hexdigest()[:12]
+
+
+_TABLE_FINGERPRINT = _compute_table_fingerprint()
+
+
+def table_fingerprint() -> str:
+    """가중치·선호 태그 표 해시 (import 시 한 번 계산). 랭킹 결과 캐시 키에 들어간다.
+    표는 import 뒤에 바꾸지 않는다 — 바꾸려면 코드를 고치고 프로세스를 다시 띄울 것 (캐시도 함께 비워짐)."""
+    return _TABLE_FINGERPRINT
 
 
 def score_candidate(context: Context, candidate: Candidate) -> float:
-    """한 후보에 대한 총점 (높을수록 추천에 유리)."""
-    return (
-        _score_meal_slot(context, candidate)
-        + _score_weather(context, candidate)
-        + _score_effort(context, candidate)
-        + _score_budget(context, candidate)
-        + _score_recent_penalty(context, candidate)
-        + _score_mood(context, candidate)
-    )
+    """한 후보에 대한 총점 (높을수록 추천에 유리). 부를 때마다 context를 컴파일하므로 후보 하나용.
+    여러 후보를 채점할 땐 `plan = compile_context(context)` 후 `plan.score(c)`를 쓸 것."""
+    return compile_context(context).score(candidate)
 
 
 def rule_based_top_k(
@@ -148,10 +211,11 @@ def rule_based_top_k(
 ) -> List[int]:
     """
     context + 후보 전체를 받아 휴리스틱 점수로 정렬한 뒤 상위 K개 menu_id 반환.
+    채점·선택은 NumPy 엔진(app/engine.py)이 한 번에 처리. 결과는 score_candidate로
+    후보마다 점수를 매겨 stable sort한 것과 같다.
     """
+    from app.engine import CandidateMatrix  # engine이 이 모듈의 가중치/태그 표를 import하므로 지연 import
+
     if not candidates:
         return []
-    k = min(k, len(candidates))
-    scored = [(c, score_candidate(context, c)) for c in candidates]
-    scored.sort(key=lambda x: x[1], reverse=True)
-    return [c.menu_id for c, _ in scored[:k]]
+    return CandidateMatrix(candidates).top_k(compile_context(context), k)
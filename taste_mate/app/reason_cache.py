@@ -0,0 +1,238 @@
+"""
+LLM 사유(ReasonResponse) 캐시.
+
+키 = sha256(렌더링된 프롬프트 + 모델명 + temperature). 프롬프트에는 context와 top-k 후보가 그대로 들어가므로
+같은 키면 LLM 입력이 완전히 같다. 메모리 LRU(TTLCache) 앞단 + SQLite 뒷단(재시작 후에도 유지) 2단 구성.
+fallback 응답은 저장하지 않는다. SQLite 파일은 처음 쓸 때 연다 (import만으로는 파일을 만들지 않음).
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from pydantic import ValidationError
+
+from app.cache import TTLCache
+from app.metrics import register_cache
+from app.models import ReasonResponse
+from app.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+ROOT = Path(__file__).resolve().parent.parent
+
+REASON_CACHE_SIZE = int(os.getenv("REASON_CACHE_SIZE", "2048"))  # 메모리 항목 수 (0이면 메모리 단 끔)
+REASON_CACHE_TTL_S = float(os.getenv("REASON_CACHE_TTL_S", "86400"))  # 두 단 공통 (0 이하면 만료 없음)
+REASON_CACHE_DB = os.getenv("REASON_CACHE_DB", str(ROOT / "output" / "reason_cache.sqlite3"))  # 빈 값이면 디스크 단 끔
+REASON_CACHE_DB_MAX_ROWS = int(os.getenv("REASON_CACHE_DB_MAX_ROWS", "100000"))
+
+_PRUNE_EVERY = 256  # put 이 횟수마다 만료·초과 행 정리
+
+
+def reason_key(prompt: str, model: str, temperature: float) -> str:
+    h = hashlib.sha256()
+    for part in (model, repr(float(temperature)), prompt):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class SqliteReasonStore:
+    """key → ReasonResponse JSON. 만료(created_at + ttl)는 조회 시 확인, 행 수 상한은 주기적으로 오래 안 쓴 것부터 삭제."""
+
+    def __init__(self, path: str, ttl: float, max_rows: int):
+        self.path = path
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._puts = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS reasons ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS reasons_last_used ON reasons(last_used)")
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created_at FROM reasons WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, created_at = row
+            if self.ttl > 0 and created_at + self.ttl <= now:
+                self._conn.execute("DELETE FROM reasons WHERE key = ?", (key,))
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE reasons SET last_used = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO reasons (key, value, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._puts += 1
+            if self._puts % _PRUNE_EVERY == 0:
+                self._prune(now)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM reasons WHERE key = ?", (key,))
+
+    def _prune(self, now: float) -> None:
+        if self.ttl > 0:
+            self.expirations += self._conn.execute(
+                "DELETE FROM reasons WHERE created_at <= ?", (now - self.ttl,)
+            ).rowcount
+        excess = self._count() - self.max_rows
+        if excess > 0:
+            self.evictions += self._conn.execute(
+                "DELETE FROM reasons WHERE key IN (SELECT key FROM reasons ORDER BY last_used LIMIT ?)", (excess,)
+            ).rowcount
+
+    def _count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM reasons").fetchone()[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM reasons")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": self._count(),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class ReasonCache:
+    """메모리 → 디스크 순서로 조회. 디스크에서 찾으면 메모리에 올린다. 쓰기는 두 단 모두.
+    disk_path가 있으면 디스크 단은 처음 조회·저장할 때 연다 (열지 못하면 메모리 단만)."""
+
+    def __init__(self, memory: TTLCache, disk_path: Optional[str] = None):
+        self.memory = memory
+        self.disk_path = disk_path
+        self._disk: Optional[SqliteReasonStore] = None
+        self._disk_opened = not disk_path
+        self._open_lock = threading.Lock()
+
+    @property
+    def disk(self) -> Optional[SqliteReasonStore]:
+        if not self._disk_opened:
+            with self._open_lock:
+                if not self._disk_opened:
+                    self._disk = _open_disk(self.disk_path)
+                    self._disk_opened = True
+        return self._disk
+
+    @property
+    def enabled(self) -> bool:
+        return self.memory.enabled or bool(self.disk_path)
+
+    def get(self, key: str) -> Optional[ReasonResponse]:
+        response = self.memory.get(key)
+        if response is not None or self.disk is None:
+            return response
+        return self._get_disk(key)
+
+    def put(self, key: str, response: ReasonResponse) -> None:
+        if response.reason_source == "fallback":
+            return
+        self.memory.put(key, response)
+        if self.disk is not None:
+            self._put_disk(key, response)
+
+    async def aget(self, key: str) -> Optional[ReasonResponse]:
+        """get과 같지만 디스크 조회는 스레드에서 (이벤트 루프를 막지 않게)."""
+        response = self.memory.get(key)
+        if response is not None or self.disk is None:
+            return response
+        return await asyncio.to_thread(self._get_disk, key)
+
+    async def aput(self, key: str, response: ReasonResponse) -> None:
+        await asyncio.to_thread(self.put, key, response)
+
+    def _get_disk(self, key: str) -> Optional[ReasonResponse]:
+        try:
+            value = self.disk.get(key)
+        except sqlite3.Error as e:
+            logger.warning("사유 캐시(SQLite) 조회 실패: %s", e)
+            return None
+        if value is None:
+            return None
+        try:
+            response = ReasonResponse.model_validate_json(value)
+        except ValidationError as e:
+            # 깨졌거나 이전 스키마로 저장된 행: 조회 실패가 요청 오류가 되지 않게 miss로 보고 지운다
+            logger.warning("사유 캐시(SQLite) 행을 읽을 수 없어 삭제: %s", e)
+            try:
+                self.disk.delete(key)
+            except sqlite3.Error as e:
+                logger.warning("사유 캐시(SQLite) 삭제 실패: %s", e)
+            return None
+        self.memory.put(key, response)
+        return response
+
+    def _put_disk(self, key: str, response: ReasonResponse) -> None:
+        try:
+            self.disk.put(key, dumps(response.model_dump(exclude={"top_k_used", "reason_source"})))
+        except sqlite3.Error as e:
+            logger.warning("사유 캐시(SQLite) 저장 실패: %s", e)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> Dict[str, float]:
+        memory = self.memory.stats()
+        disk = self._disk.stats() if self._disk is not None else {}  # 아직 안 열었으면 열지 않는다
+        # 디스크 조회는 메모리 miss일 때만 일어나므로 전체 적중 = 메모리 적중 + 디스크 적중
+        lookups = memory["hits"] + memory["misses"] if self.memory.enabled else disk.get("hits", 0) + disk.get("misses", 0)
+        hits = memory["hits"] + disk.get("hits", 0)
+        stats = {f"memory_{k}": v for k, v in memory.items()}
+        stats.update({f"disk_{k}": v for k, v in disk.items()})
+        stats["hit_rate"] = hits / lookups if lookups else 0.0
+        return stats
+
+
+def _open_disk(db: str) -> Optional[SqliteReasonStore]:
+    path = Path(db)
+    if not path.is_absolute():
+        path = ROOT / path  # 상대 경로는 프로젝트 루트 기준
+    try:
+        return SqliteReasonStore(str(path), REASON_CACHE_TTL_S, REASON_CACHE_DB_MAX_ROWS)
+    except (sqlite3.Error, OSError) as e:
+        logger.warning("사유 캐시 DB를 열 수 없어 메모리 단만 사용: %s (%s)", db, e)
+        return None
+
+
+cache = ReasonCache(TTLCache(maxsize=REASON_CACHE_SIZE, ttl=REASON_CACHE_TTL_S), REASON_CACHE_DB or None)
+register_cache("reason", cache)
@@ -0,0 +1,179 @@
+"""
+오프라인으로 미리 만든 사유 표 (scripts/build_reason_table.py 가 생성).
+
+랭커가 실제로 구분하는 상황은 (시간대, 노력 수준, 기분, 날씨 추움/더움/보통/둘 다) 몇 백 가지뿐이라,
+버킷마다 랭킹 + LLM을 미리 돌려 (버킷, top-k 후보) → 사유를 파일 하나에 담아 둔다.
+사유 문장에는 동행(company)과 날씨 상태(비·눈 등)가 드러나므로 이 둘도 버킷에 넣는다 — 다른 동행·날씨의
+요청에 "혼자 먹기 좋은", "흐린 날" 같은 사유가 나가지 않게. 보통 날씨 버킷은 날씨 없이 사유를 만들므로 상태를 넣지 않는다.
+요청 시에는 같은 버킷·같은 top-k면 LLM 없이 표에서 바로 답한다 (reason_source="precomputed").
+키에 top-k 후보의 menu_id·menu_name이 들어가므로 예산·최근 식사 등으로 top-k가 달라지면 miss.
+
+파일 형식 (리틀 엔디언):
+  magic(8) | meta_len u32 | n u32 | meta JSON (8바이트 정렬까지 패딩)
+  | keys u64[n] (오름차순) | spans u32[n][2] (payload 내 offset, length) | payload (사유 JSON, UTF-8)
+로드 시 mmap으로 열어 keys만 numpy 배열로 보고 이분 탐색하므로, 표가 커도 기동·메모리 부담이 없다.
+"""
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from app.metrics import register_cache
+from app.models import Candidate, Context, ReasonResponse
+from app.ranker import MOOD_TAGS, weather_flags
+from app.serialization import dumps_bytes, loads
+
+logger = logging.getLogger(__name__)
+
+ROOT = Path(__file__).resolve().parent.parent
+
+REASON_TABLE_PATH = os.getenv("REASON_TABLE_PATH", "")  # 빈 값이면 끔
+# 표에 없을 때: llm(기본, 평소처럼 LLM 호출) | fallback(LLM 없이 템플릿 사유 — 모델 의존 없는 서빙)
+REASON_TABLE_MISS = os.getenv("REASON_TABLE_MISS", "llm")
+
+MAGIC = b"TMRTBL02"  # 02: 버킷에 동행·날씨 상태 추가 (이전 표는 열지 않음)
+_HEADER = struct.Struct("<8sII")
+OTHER_MOOD = "기타"  # MOOD_TAGS에 없는 기분은 랭킹상 모두 같다
+
+Bucket = Tuple[str, str, str, str, str, str]
+
+
+def weather_class(context: Context) -> str:
+    """cold | hot | neutral (비 오는 더운 날처럼 둘 다면 both)."""
+    cold, hot = weather_flags(context)
+    if cold and hot:
+        return "both"
+    return "cold" if cold else "hot" if hot else "neutral"
+
+
+def bucket_of(context: Context) -> Bucket:
+    """상황 버킷: 랭커가 구분하는 (meal_slot, effort_level, 기분, 날씨 분류) + 사유에 드러나는 (날씨 상태, 동행)."""
+    mood = context.mood if context.mood in MOOD_TAGS else OTHER_MOOD
+    weather = weather_class(context)
+    condition = "" if weather == "neutral" else (context.weather.condition or "").lower()
+    return context.meal_slot, context.effort_level, mood, weather, condition, context.company.strip()
+
+
+def table_key(bucket: Bucket, candidates: Iterable[Candidate]) -> int:
+    """(버킷, top-k 후보 순서대로 menu_id·menu_name) → 64비트 키."""
+    h = hashlib.blake2b(digest_size=8)
+    h.update("\x1f".join(bucket).encode("utf-8"))
+    for c in candidates:
+        h.update(f"\x1e{c.menu_id}\x1f{c.menu_name}".encode("utf-8"))
+    return int.from_bytes(h.digest(), "little")
+
+
+def write_table(path: Path, entries: Dict[int, ReasonResponse], meta: dict) -> None:
+    """key → 사유를 표 파일로 쓴다. 임시 파일에 쓰고 교체하므로, 이미 열어 둔 프로세스는 이전 파일을 계속 본다."""
+    meta_bytes = dumps_bytes(dict(meta, entries=len(entries)))
+    meta_bytes += b" " * (-(_HEADER.size + len(meta_bytes)) % 8)
+    keys = np.array(sorted(entries), dtype="<u8")
+    spans = np.zeros((len(keys), 2), dtype="<u4")
+    payload = bytearray()
+    for i, key in enumerate(keys.tolist()):
+        body = entries[key].model_dump_json(include={"selected_menu_id", "reason_one_liner", "reason_tags"})
+        data = body.encode("utf-8")
+        spans[i] = (len(payload), len(data))
+        payload += data
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(meta_bytes), len(keys)))
+        f.write(meta_bytes)
+        f.write(keys.tobytes())
+        f.write(spans.tobytes())
+        f.write(payload)
+    os.replace(tmp, path)
+
+
+class ReasonTable:
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, meta_len, n = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"not a reason table: {path}")
+        offset = _HEADER.size
+        self.meta = loads(self._mm[offset:offset + meta_len])
+        offset += meta_len
+        self._keys = np.frombuffer(self._mm, dtype="<u8", count=n, offset=offset)
+        offset += 8 * n
+        self._spans = np.frombuffer(self._mm, dtype="<u4", count=2 * n, offset=offset).reshape(n, 2)
+        self._payload = offset + 8 * n
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def get(self, key: int) -> Optional[ReasonResponse]:
+        i = int(np.searchsorted(self._keys, key))
+        if i >= len(self._keys) or int(self._keys[i]) != key:
+            with self._lock:
+                self.misses += 1
+            return None
+        start, length = (int(v) for v in self._spans[i])
+        start += self._payload
+        with self._lock:
+            self.hits += 1
+        return ReasonResponse.model_validate_json(self._mm[start:start + length])
+
+    def lookup(self, context: Context, candidates: list[Candidate]) -> Optional[ReasonResponse]:
+        """top-k 후보(순서대로)와 context의 버킷으로 조회. 있으면 reason_source="precomputed"."""
+        response = self.get(table_key(bucket_of(context), candidates))
+        if response is None:
+            return None
+        return response.model_copy(update={"reason_source": "precomputed"})
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._keys),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+_table: Optional[ReasonTable] = None
+
+
+def get_table() -> Optional[ReasonTable]:
+    return _table
+
+
+def set_table(table: Optional[ReasonTable]) -> Optional[ReasonTable]:
+    """사용할 표 교체 (None이면 끔). 이전 표를 돌려준다."""
+    global _table
+    previous, _table = _table, table
+    if table is not None:
+        register_cache("reason_table", table)
+    return previous
+
+
+def _open_table() -> Optional[ReasonTable]:
+    if not REASON_TABLE_PATH:
+        return None
+    path = Path(REASON_TABLE_PATH)
+    if not path.is_absolute():
+        path = ROOT / path  # 상대 경로는 프로젝트 루트 기준
+    try:
+        table = ReasonTable(str(path))
+    except (OSError, ValueError) as e:
+        logger.warning("사유 표를 열 수 없어 사용하지 않음: %s (%s)", path, e)
+        return None
+    logger.info("사유 표 로드: %s (%d건, %s)", path, len(table), table.meta.get("built_at", "?"))
+    return table
+
+
+set_table(_open_table())
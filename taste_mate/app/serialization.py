@@ -0,0 +1,102 @@
+"""
+JSON 직렬화 한 곳 모음: API 응답, LLM 응답 파싱, 로그, 캐시가 모두 이 모듈을 쓴다
+(verbose 프롬프트의 상황 JSON만 예전 문구 그대로 두려고 llm.py에서 stdlib json.dumps 기본 구분자를 쓴다).
+orjson이 있으면 orjson, 없으면 stdlib json (출력은 같은 형식: 공백 없는 구분자, 한글 그대로 UTF-8).
+"""
+import json
+import re
+from collections.abc import Mapping
+from typing import Any, Iterator, Union
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # 선택 의존성
+    orjson = None
+
+HAS_ORJSON = orjson is not None
+
+
+def _default(obj: Any) -> Any:
+    """기본 타입 외 값: pydantic 모델, Mapping(MappingProxyType 등), set/frozenset/tuple."""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+if HAS_ORJSON:
+    def dumps_bytes(obj: Any, *, sort_keys: bool = False, indent: bool = False) -> bytes:
+        option = orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_default, option=option)
+
+    def loads(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+        return orjson.loads(data)
+else:
+    def dumps_bytes(obj: Any, *, sort_keys: bool = False, indent: bool = False) -> bytes:
+        return dumps(obj, sort_keys=sort_keys, indent=indent).encode("utf-8")
+
+    def loads(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+        if isinstance(data, memoryview):
+            data = bytes(data)
+        return json.loads(data)
+
+
+def dumps(obj: Any, *, sort_keys: bool = False, indent: bool = False) -> str:
+    """obj → JSON 문자열 (한 줄, 한글 그대로). indent=True면 2칸 들여쓰기."""
+    if HAS_ORJSON:
+        return dumps_bytes(obj, sort_keys=sort_keys, indent=indent).decode("utf-8")
+    return json.dumps(
+        obj,
+        ensure_ascii=False,
+        sort_keys=sort_keys,
+        default=_default,
+        indent=2 if indent else None,
+        separators=(",", ": ") if indent else (",", ":"),
+    )
+
+
+class ORJSONResponse(JSONResponse):
+    """FastAPI 기본 응답 클래스 (app의 default_response_class). orjson이 없으면 stdlib으로 같은 본문을 만든다."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps_bytes(content)
+
+
+_FENCE = re.compile(r"```[ \t]*[A-Za-z0-9_-]*[ \t]*\n?(.*?)(?:```|\Z)", re.DOTALL)
+_decoder = json.JSONDecoder()
+
+
+def _candidates(text: str) -> Iterator[str]:
+    if text[:1] in ("{", "["):
+        yield text
+    for m in _FENCE.finditer(text):
+        yield m.group(1).strip()
+
+
+def extract_json(text: str) -> Any:
+    """LLM 출력에서 JSON 값 하나를 꺼낸다. 순서대로 시도:
+    1) 전체가 JSON  2) ```json ... ``` 펜스 안 (닫는 펜스가 잘려도 됨, 앞뒤 설명 문장 무시)
+    3) 본문 중 처음으로 파싱되는 { 또는 [ 부터의 JSON (뒤에 붙은 문장은 무시).
+    아무것도 없으면 ValueError."""
+    text = text.strip()
+    for candidate in _candidates(text):
+        try:
+            return loads(candidate)
+        except ValueError:
+            pass
+    for i, ch in enumerate(text):
+        if ch in "{[":
+            try:
+                return _decoder.raw_decode(text, i)[0]
+            except ValueError:
+                continue
+    raise ValueError("no JSON value found in LLM output")
@@ -0,0 +1,72 @@
+"""
+같은 키의 작업이 진행 중이면 새로 시작하지 않고 그 결과를 기다리는 single-flight.
+결과와 예외 모두 기다리던 호출자 전원에게 그대로 전달된다.
+"""
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """동기(스레드) 버전. do()는 (결과, 다른 호출의 결과를 공유했는지)를 돌려준다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            return future.result(), True
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """asyncio 버전. 작업은 별도 task로 돌려서, 먼저 온 요청이 취소(클라이언트 끊김 등)돼도
+    기다리는 다른 요청에는 영향이 없다."""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        task, shared = self.start(key, fn)
+        return await asyncio.shield(task), shared
+
+    def start(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[asyncio.Task, bool]:
+        """진행 중인 task를 돌려주거나 새로 시작한다 (기다리지 않음). 호출자가 기다리다 그만둬도 task는 끝까지 돈다."""
+        loop = asyncio.get_running_loop()
+        task = self._calls.get(key)
+        shared = task is not None and task.get_loop() is loop
+        if not shared:
+            task = loop.create_task(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        return task, shared
+
+    def _done(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # 모두 취소돼 아무도 결과를 안 읽어도 "never retrieved" 경고가 나지 않게
+
+    def in_flight(self) -> int:
+        return len(self._calls)
@@ -0,0 +1,52 @@
+"""
+랭킹 결과(top-k menu_id) 캐시.
+
+키 = (가중치·태그 표 해시 — import 시 한 번 계산하고 표는 실행 중에 바꾸지 않음, 후보 세트 fingerprint, ScoringPlan, k).
+인라인 후보의 fingerprint는 캐시가 켜져 있을 때만 계산한다 (Catalog.fingerprint는 처음 쓸 때 계산).
+ScoringPlan은 context 중 점수에 영향을 주는 부분만 담고 있어서(시간대·날씨 구간·노력·기분의
+선호 태그 묶음, 예산 범위, 감점 카테고리) 배고픔·동행·기온 세부값만 다른 요청은 같은 키가 된다.
+"""
+import os
+from typing import List, Sequence
+
+from app.cache import TTLCache
+from app.catalog import Catalog
+from app.metrics import register_cache
+from app.ranker import ScoringPlan, table_fingerprint
+
+TOPK_CACHE_SIZE = int(os.getenv("TOPK_CACHE_SIZE", "4096"))  # 0이면 비활성
+TOPK_CACHE_TTL_S = float(os.getenv("TOPK_CACHE_TTL_S", "300"))
+
+cache = TTLCache(maxsize=TOPK_CACHE_SIZE, ttl=TOPK_CACHE_TTL_S)
+register_cache("topk", cache)
+
+
+def _key(catalog: Catalog, plan: ScoringPlan, k: int, tables: str) -> tuple:
+    return (tables, catalog.fingerprint, plan, k)
+
+
+def top_k(catalog: Catalog, plan: ScoringPlan, k: int) -> List[int]:
+    """catalog.matrix.top_k(plan, k)와 같은 결과. 캐시 적중 시 행렬 생성·채점 생략."""
+    if not cache.enabled:
+        return catalog.matrix.top_k(plan, k)
+    key = _key(catalog, plan, k, table_fingerprint())
+    ids = cache.get(key)
+    if ids is None:
+        ids = tuple(catalog.matrix.top_k(plan, k))
+        cache.put(key, ids)
+    return list(ids)
+
+
+def batch_top_k(catalog: Catalog, plans: Sequence[ScoringPlan], k: int) -> List[List[int]]:
+    """plan마다 top_k와 같은 결과. 캐시에 없는 plan만 모아서 batch_top_k로 한 번에 채점."""
+    if not cache.enabled:
+        return catalog.matrix.batch_top_k(plans, k)
+    tables = table_fingerprint()
+    results: List = [cache.get(_key(catalog, plan, k, tables)) for plan in plans]
+    missing = [i for i, ids in enumerate(results) if ids is None]
+    if missing:
+        computed = catalog.matrix.batch_top_k([plans[i] for i in missing], k)
+        for i, ids in zip(missing, computed):
+            results[i] = tuple(ids)
+            cache.put(_key(catalog, plans[i], k, tables), results[i])
+    return [list(ids) for ids in results]
@@ -0,0 +1,282 @@
+"""
+요청 단위 request id + span 추적.
+
+TracingMiddleware가 요청마다 request id를 정한다 (X-Request-ID 헤더가 있으면 그대로, 없으면 새로 만듦).
+이 id는 응답 헤더 X-Request-ID, 앱 로그 줄(`[request_id]`), 추천 로그(reason_calls.jsonl)에 같이 남는다.
+
+요청 처리 단계(validation, rank, prompt_build, llm, log_write 등)는 span으로 시간을 잰다. `stage()`는
+metrics.stage(히스토그램)와 span을 함께 기록한다. 요청이 끝나면 샘플링된 요청만 span을 OTLP-JSON
+(OTLP file exporter 형식: 한 줄 = ExportTraceServiceRequest 하나)으로 logs/traces.jsonl에 쓴다.
+샘플링: TRACE_SAMPLE_RATE 비율로 무작위 + TRACE_SLOW_MS보다 오래 걸린 요청은 모두 + traceparent 헤더의 sampled 플래그.
+둘 다 0이면 span을 모으지도 쓰지도 않는다 — traceparent가 sampled여도 마찬가지 (request id는 항상).
+"""
+import contextvars
+import logging
+import os
+import random
+import re
+import secrets
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from app import metrics
+from app.log_writer import JsonlWriter
+
+ROOT = Path(__file__).resolve().parent.parent
+
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))  # 0~1
+TRACE_SLOW_MS = float(os.getenv("TRACE_SLOW_MS", "0"))  # 0이면 끔
+TRACE_PATH = os.getenv("TRACE_PATH", "logs/traces.jsonl")
+TRACE_MAX_BYTES = int(os.getenv("TRACE_MAX_BYTES", str(100 * 1024 * 1024)))
+TRACE_KEEP = int(os.getenv("TRACE_KEEP", "10"))
+
+SERVICE_NAME = "taste_mate"
+REQUEST_ID_HEADER = "x-request-id"
+_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+_HEX32 = re.compile(r"^[0-9a-f]{32}$")
+
+# OTLP SpanKind / StatusCode
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_ERROR = 2
+
+_request_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+_trace: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar("trace", default=None)
+_parent: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("parent_span", default=None)
+
+_writer: Optional[JsonlWriter] = None
+
+
+def enabled() -> bool:
+    return TRACE_SAMPLE_RATE > 0 or TRACE_SLOW_MS > 0
+
+
+def request_id() -> Optional[str]:
+    """현재 요청의 request id (요청 밖이면 None)."""
+    return _request_id.get()
+
+
+def _span_id() -> str:
+    return secrets.token_hex(8)
+
+
+class Trace:
+    """요청 하나의 span 모음. 시각은 perf_counter_ns 기준으로 재고, 내보낼 때 Unix 시각으로 바꾼다."""
+
+    def __init__(self, trace_id: str, request_id: str, parent_span_id: Optional[str] = None, sampled: bool = False):
+        self.trace_id = trace_id
+        self.request_id = request_id
+        self.root_span_id = _span_id()
+        self.parent_span_id = parent_span_id
+        self.sampled = sampled  # 헤더로 강제된 샘플링
+        self.start_unix_ns = time.time_ns()
+        self.start_ns = time.perf_counter_ns()
+        self.attributes: Dict[str, Any] = {}
+        self.spans: List[dict] = []
+        self.finished = False
+
+    def add_span(self, name: str, span_id: str, parent: Optional[str], start_ns: int, end_ns: int,
+                 attributes: Dict[str, Any], error: Optional[BaseException] = None) -> None:
+        if self.finished:  # 응답 뒤에 끝난 작업 (예산 초과 후 계속 도는 LLM 호출 등)
+            return
+        self.spans.append({
+            "name": name,
+            "span_id": span_id,
+            "parent": parent or self.root_span_id,
+            "start_ns": start_ns,
+            "end_ns": end_ns,
+            "attributes": attributes,
+            "error": error,
+        })
+
+    def _unix(self, perf_ns: int) -> str:
+        return str(self.start_unix_ns + perf_ns - self.start_ns)
+
+    def to_otlp(self, name: str, end_ns: int) -> dict:
+        root = {
+            "traceId": self.trace_id,
+            "spanId": self.root_span_id,
+            "name": name,
+            "kind": SPAN_KIND_SERVER,
+            "startTimeUnixNano": self._unix(self.start_ns),
+            "endTimeUnixNano": self._unix(end_ns),
+            "attributes": _attributes(dict(self.attributes, **{"request.id": self.request_id})),
+        }
+        if self.parent_span_id:
+            root["parentSpanId"] = self.parent_span_id
+        if self.attributes.get("http.response.status_code", 0) >= 500:
+            root["status"] = {"code": STATUS_ERROR}
+        spans = [root]
+        for s in self.spans:
+            span = {
+                "traceId": self.trace_id,
+                "spanId": s["span_id"],
+                "parentSpanId": s["parent"],
+                "name": s["name"],
+                "kind": SPAN_KIND_INTERNAL,
+                "startTimeUnixNano": self._unix(s["start_ns"]),
+                "endTimeUnixNano": self._unix(s["end_ns"]),
+                "attributes": _attributes(s["attributes"]),
+            }
+            if s["error"] is not None:
+                span["status"] = {"code": STATUS_ERROR, "message": str(s["error"])[:200]}
+                span["attributes"] += _attributes({"exception.type": type(s["error"]).__name__})
+            spans.append(span)
+        return {"resourceSpans": [{
+            "resource": {"attributes": _attributes({"service.name": SERVICE_NAME})},
+            "scopeSpans": [{"scope": {"name": "app.tracing"}, "spans": spans}],
+        }]}
+
+
+def _attributes(attrs: Dict[str, Any]) -> List[dict]:
+    out = []
+    for key, value in attrs.items():
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            v = {"boolValue": value}
+        elif isinstance(value, int):
+            v = {"intValue": str(value)}  # OTLP-JSON: int64는 문자열
+        elif isinstance(value, float):
+            v = {"doubleValue": value}
+        else:
+            v = {"stringValue": str(value)}
+        out.append({"key": key, "value": v})
+    return out
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Dict[str, Any]]:
+    """with 블록을 현재 요청 trace의 span으로 기록. 돌려주는 dict에 속성을 더 넣을 수 있다.
+    요청 밖이거나 추적이 꺼져 있으면 아무것도 하지 않는다."""
+    trace = _trace.get()
+    if trace is None:
+        yield attributes
+        return
+    span_id = _span_id()
+    parent = _parent.get()
+    token = _parent.set(span_id)
+    start = time.perf_counter_ns()
+    error: Optional[BaseException] = None
+    try:
+        yield attributes
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        _parent.reset(token)
+        trace.add_span(name, span_id, parent, start, time.perf_counter_ns(), attributes, error)
+
+
+@contextmanager
+def stage(endpoint: str, name: str, **attributes: Any) -> Iterator[Dict[str, Any]]:
+    """metrics.stage(단계별 히스토그램) + span."""
+    with metrics.stage(endpoint, name), span(name, **attributes) as attrs:
+        yield attrs
+
+
+def observe_validation(endpoint: str) -> None:
+    """핸들러 첫 줄에서 호출. metrics.observe_validation + 요청 시작부터 지금까지를 validation span으로."""
+    metrics.observe_validation(endpoint)
+    trace = _trace.get()
+    if trace is not None:
+        trace.add_span("validation", _span_id(), None, trace.start_ns, time.perf_counter_ns(), {})
+
+
+def annotate(**attributes: Any) -> None:
+    """현재 요청의 루트 span에 속성 추가 (case.id, reason_source 등)."""
+    trace = _trace.get()
+    if trace is not None:
+        trace.attributes.update(attributes)
+
+
+def _trace_writer() -> JsonlWriter:
+    global _writer
+    if _writer is None:
+        path = Path(TRACE_PATH)
+        if not path.is_absolute():
+            path = ROOT / path  # 상대 경로는 프로젝트 루트 기준
+        _writer = JsonlWriter(path, max_bytes=TRACE_MAX_BYTES, compress=True, keep=TRACE_KEEP)
+    return _writer
+
+
+def close_traces() -> None:
+    """남은 trace를 모두 쓰고 닫는다 (app 종료 시)."""
+    if _writer is not None:
+        _writer.close()
+
+
+def _incoming_ids(headers: Dict[str, str]) -> tuple:
+    """(request id, trace id, 부모 span id, sampled). traceparent(W3C)가 있으면 trace를 이어 받는다."""
+    rid = headers.get(REQUEST_ID_HEADER, "")
+    if not _REQUEST_ID.match(rid):
+        rid = uuid.uuid4().hex
+    m = _TRACEPARENT.match(headers.get("traceparent", ""))
+    if m:
+        return rid, m.group(1), m.group(2), int(m.group(3), 16) & 1 == 1
+    trace_id = rid.lower() if _HEX32.match(rid.lower()) else uuid.uuid4().hex  # 32자리 hex id면 trace id로 씀
+    return rid, trace_id, None, False
+
+
+class RequestIdFilter(logging.Filter):
+    """로그 레코드에 request_id 속성을 붙인다 (요청 밖이면 "-"). 핸들러에 달 것."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get() or "-"
+        return True
+
+
+class TracingMiddleware:
+    """request id 설정·응답 헤더, 요청 trace 수집, 샘플링된 trace 기록 (ASGI 미들웨어)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        rid, trace_id, parent_span_id, sampled = _incoming_ids(headers)
+        rid_token = _request_id.set(rid)
+        # 헤더의 sampled 플래그는 추적이 켜져 있을 때만 따른다 (클라이언트가 trace 기록을 켜지 못하게)
+        trace = Trace(trace_id, rid, parent_span_id, sampled) if enabled() else None
+        trace_token = _trace.set(trace)
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-request-id", rid.encode("latin-1")),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _trace.reset(trace_token)
+            _request_id.reset(rid_token)
+            if trace is not None:
+                self._finish(trace, scope, status["code"])
+
+    @staticmethod
+    def _finish(trace: Trace, scope, status_code: int) -> None:
+        end = time.perf_counter_ns()
+        trace.finished = True
+        slow = TRACE_SLOW_MS > 0 and (end - trace.start_ns) / 1e6 >= TRACE_SLOW_MS
+        if not (trace.sampled or slow or random.random() < TRACE_SAMPLE_RATE):
+            return
+        route = getattr(scope.get("route"), "path", None)
+        method = scope.get("method", "")
+        trace.attributes.update({
+            "http.request.method": method,
+            "url.path": scope.get("path", ""),
+            "http.route": route,
+            "http.response.status_code": status_code,
+        })
+        _trace_writer().write(trace.to_otlp(f"{method} {route or scope.get('path', '')}", end))
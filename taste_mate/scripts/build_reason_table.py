@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+사유 표 생성 (오프라인 배치): 상황 버킷
+(시간대 4 × 노력 수준 3 × 기분(MOOD_TAGS + 기타) × 날씨(추움/더움/둘 다는 상태별, 보통) × 동행)을 모두 만들어
+카탈로그에 대해 랭킹 → LLM 사유를 받고, (버킷, top-k) → 사유 표 파일로 저장한다.
+동행·날씨 상태는 사유 문장에 드러나므로 버킷 키에 들어간다 (app/reason_table.bucket_of).
+서버는 REASON_TABLE_PATH 로 이 파일을 읽어 같은 버킷·같은 top-k 요청에 LLM 없이 답한다.
+
+후보는 --catalog (기본 data/candidates.json, 없으면 합성 200개). LLM 호출은 서버와 같은 경로(acall_llm)라
+LLM_BACKEND·PROMPT_FORMAT·사유 캐시 설정을 그대로 따른다. fallback 사유는 표에 넣지 않는다.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from itertools import product
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+DATA_DIR = ROOT / "data"
+OUTPUT_DIR = ROOT / "output"
+sys.path.insert(0, str(ROOT))
+
+from dotenv import load_dotenv  # noqa: E402
+
+load_dotenv(ROOT / ".env")
+
+from synthetic import make_candidates  # noqa: E402
+
+from app import llm, reason_table  # noqa: E402
+from app.catalog import candidates_fingerprint  # noqa: E402
+from app.engine import CandidateMatrix  # noqa: E402
+from app.models import Candidate, Context, Weather  # noqa: E402
+from app.ranker import EFFORT_TAGS, MEAL_SLOT_TAGS, MOOD_TAGS, compile_context, table_fingerprint  # noqa: E402
+from app.reason_table import OTHER_MOOD, bucket_of, table_key, write_table  # noqa: E402
+
+# 날씨 분류별 대표 날씨 — 상태(condition)마다 하나씩 (버킷 키에 상태가 들어가므로).
+# both = 비 오는 더운 날. 보통은 날씨 없음과 랭킹이 같으므로 생략해 사유에 날씨를 지어내지 않게
+WEATHER_SAMPLES = [
+    Weather(condition="cloudy", temp_c=5.0),
+    Weather(condition="clear", temp_c=3.0),
+    Weather(condition="rain", temp_c=15.0),
+    Weather(condition="snow", temp_c=-2.0),
+    Weather(condition="clear", temp_c=30.0),
+    Weather(condition="cloudy", temp_c=29.0),
+    Weather(condition="rain", temp_c=28.0),
+    None,
+]
+COMPANIES = ["혼자", "친구", "연인", "가족", "동료"]
+OTHER_MOOD_SAMPLE = "보통"
+
+
+def load_candidates(path: Path) -> tuple[list[Candidate], str]:
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            return [Candidate.model_validate(c) for c in json.load(f)], str(path)
+    return [Candidate.model_validate(c) for c in make_candidates(200)], "synthetic"
+
+
+def bucket_contexts(budgets: list[str], companies: list[str]) -> list[Context]:
+    """버킷 × 예산마다 대표 context 하나 (허기 3, 최근 식사 없음)."""
+    moods = list(MOOD_TAGS) + [OTHER_MOOD_SAMPLE]
+    contexts = []
+    for meal_slot, effort, mood, weather, company, budget in product(
+            MEAL_SLOT_TAGS, EFFORT_TAGS, moods, WEATHER_SAMPLES, companies, budgets):
+        contexts.append(Context(
+            meal_slot=meal_slot,
+            hunger_level=3,
+            mood=mood,
+            company=company,
+            effort_level=effort,
+            budget_range=budget,
+            weather=weather,
+        ))
+    return contexts
+
+
+async def generate(jobs: dict, concurrency: int) -> dict:
+    """key → (context, top-k 후보, top_k) 마다 acall_llm. fallback이 아닌 사유만 돌려준다."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(key, context, candidates, top_k):
+        async with semaphore:
+            return key, await llm.acall_llm(context, candidates, top_k)
+
+    results = await asyncio.gather(*(one(key, *job) for key, job in jobs.items()))
+    return {key: response for key, response in results if response.reason_source != "fallback"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="상황 버킷별 사유 표 생성 (REASON_TABLE_PATH 용)")
+    parser.add_argument("--catalog", default=str(DATA_DIR / "candidates.json"), help="후보 JSON (없으면 합성 200개)")
+    parser.add_argument("--out", default=str(OUTPUT_DIR / "reason_table.bin"))
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--budgets", nargs="+", default=["상관없음"], help="버킷마다 함께 돌릴 budget_range 값들")
+    parser.add_argument("--companies", nargs="+", default=COMPANIES, help="버킷을 만들 company 값들 (버킷 키에 들어감)")
+    parser.add_argument("--concurrency", type=int, default=16, help="동시에 진행할 LLM 호출 수")
+    args = parser.parse_args()
+
+    reason_table.set_table(None)  # 이미 설정된 표가 있어도 새로 생성
+    candidates, source = load_candidates(Path(args.catalog))
+    by_id = {c.menu_id: c for c in candidates}
+    matrix = CandidateMatrix(candidates)
+
+    jobs = {}
+    contexts = bucket_contexts(args.budgets, args.companies)
+    for context in contexts:
+        top_k = matrix.top_k(compile_context(context), args.k)
+        selected = [by_id[i] for i in top_k]
+        jobs.setdefault(table_key(bucket_of(context), selected), (context, selected, top_k))
+    print(f"[{source}] 후보 {len(candidates)}개, context {len(contexts)}개 → 서로 다른 (버킷, top-k) {len(jobs)}개")
+
+    t0 = time.perf_counter()
+    entries = asyncio.run(generate(jobs, args.concurrency))
+    elapsed = time.perf_counter() - t0
+    print(f"LLM 사유 {len(entries)}/{len(jobs)}개 ({elapsed:.1f}s, fallback {len(jobs) - len(entries)}개 제외)")
+
+    out = Path(args.out)
+    write_table(out, entries, {
+        "built_at": datetime.now().isoformat(timespec="seconds"),
+        "catalog": source,
+        "catalog_fingerprint": candidates_fingerprint(candidates),
+        "ranker_fingerprint": table_fingerprint(),
+        "k": args.k,
+        "budgets": args.budgets,
+        "companies": args.companies,
+        "backend": llm.get_backend().name,
+        "model": os.getenv("LLM_MODEL", "gemini-2.0-flash"),
+        "prompt_format": llm.PROMPT_FORMAT,
+    })
+    print(f"저장: {out} ({out.stat().st_size:,} bytes)")
+
+
+if __name__ == "__main__":
+    main()
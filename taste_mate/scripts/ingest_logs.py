@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+추천 로그(logs/reason_calls.jsonl + 로테이션 조각 .jsonl / .jsonl.gz) → 인덱스 있는 SQLite 분석 DB.
+
+ingest: 파일마다 어디까지 읽었는지(첫 줄 해시 기준 offset)를 DB에 남겨, 다시 돌리면 새로 쌓인 줄만 읽는다.
+        로테이션으로 이름이 바뀌거나 gzip으로 압축돼도 첫 줄이 같으므로 이어서 읽는다. 끝나지 않은 마지막 줄은 다음에.
+query:  미리 만든 집계 (fallback 비율, 선택 메뉴 분포 등)를 기간(--since/--until, UTC 날짜)으로 실행. --sql 로 직접 질의도 가능.
+
+  python scripts/ingest_logs.py ingest
+  python scripts/ingest_logs.py query fallback_by_meal_slot --since 2026-01-01
+  python scripts/ingest_logs.py query --sql "SELECT mood, COUNT(*) FROM calls GROUP BY mood"
+"""
+import argparse
+import gzip
+import hashlib
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Iterator, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+LOG_DIR = ROOT / "logs"
+OUTPUT_DIR = ROOT / "output"
+sys.path.insert(0, str(ROOT))
+
+from app.serialization import dumps, loads  # noqa: E402
+
+LOG_STEM = "reason_calls"
+CHUNK_LINES = 5000  # 이 줄 수마다 한 트랜잭션 (행 + offset을 같이 커밋하므로 중간에 멈춰도 중복·누락 없음)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS calls (
+    id INTEGER PRIMARY KEY,
+    ts TEXT NOT NULL,
+    day TEXT NOT NULL,
+    case_id TEXT,
+    meal_slot TEXT,
+    hunger_level INTEGER,
+    mood TEXT,
+    company TEXT,
+    effort_level TEXT,
+    budget_range TEXT,
+    weather_condition TEXT,
+    temp_c REAL,
+    top_k TEXT,
+    selected_menu_id INTEGER,
+    reason_one_liner TEXT,
+    reason_tags TEXT,
+    reason_source TEXT,
+    is_fallback INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS calls_ts ON calls(ts);
+CREATE INDEX IF NOT EXISTS calls_day_meal_slot ON calls(day, meal_slot);
+CREATE INDEX IF NOT EXISTS calls_selected ON calls(selected_menu_id, day);
+CREATE TABLE IF NOT EXISTS ingest_state (
+    head TEXT PRIMARY KEY,
+    file TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    done INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL
+);
+"""
+
+COLUMNS = (
+    "ts", "day", "case_id", "meal_slot", "hunger_level", "mood", "company", "effort_level", "budget_range",
+    "weather_condition", "temp_c", "top_k", "selected_menu_id", "reason_one_liner", "reason_tags",
+    "reason_source", "is_fallback",
+)
+_INSERT = f"INSERT INTO calls ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+
+_RANGE = "(:since IS NULL OR day >= :since) AND (:until IS NULL OR day <= :until)"
+QUERIES = {
+    "fallback_by_meal_slot": (
+        "시간대별 호출 수·fallback 비율",
+        f"""SELECT meal_slot, COUNT(*) AS calls, SUM(is_fallback) AS fallbacks,
+                   ROUND(AVG(is_fallback), 4) AS fallback_rate
+            FROM calls WHERE {_RANGE} GROUP BY meal_slot ORDER BY calls DESC""",
+    ),
+    "selected_distribution": (
+        "선택된 menu_id 분포 (상위 --limit개)",
+        f"""SELECT selected_menu_id, COUNT(*) AS calls,
+                   ROUND(COUNT(*) * 1.0 / (SELECT COUNT(*) FROM calls WHERE {_RANGE}), 4) AS share
+            FROM calls WHERE {_RANGE} GROUP BY selected_menu_id ORDER BY calls DESC LIMIT :limit""",
+    ),
+    "daily": (
+        "일별 호출 수·fallback 비율",
+        f"""SELECT day, COUNT(*) AS calls, SUM(is_fallback) AS fallbacks, ROUND(AVG(is_fallback), 4) AS fallback_rate
+            FROM calls WHERE {_RANGE} GROUP BY day ORDER BY day""",
+    ),
+    "reason_source": (
+        "사유 출처(live/cached/precomputed/fallback) 비율",
+        f"""SELECT COALESCE(reason_source, CASE is_fallback WHEN 1 THEN 'fallback' ELSE 'unknown' END) AS source,
+                   COUNT(*) AS calls,
+                   ROUND(COUNT(*) * 1.0 / (SELECT COUNT(*) FROM calls WHERE {_RANGE}), 4) AS share
+            FROM calls WHERE {_RANGE} GROUP BY source ORDER BY calls DESC""",
+    ),
+    "fallback_by_mood_effort": (
+        "기분 × 노력 수준별 fallback 비율",
+        f"""SELECT mood, effort_level, COUNT(*) AS calls, ROUND(AVG(is_fallback), 4) AS fallback_rate
+            FROM calls WHERE {_RANGE} GROUP BY mood, effort_level ORDER BY calls DESC LIMIT :limit""",
+    ),
+}
+
+
+def connect(path: Path) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def log_files(log_dir: Path) -> list[Path]:
+    """로테이션 조각(오래된 것부터) + 현재 파일. 조각 이름의 시각이 이름순 = 시간순."""
+    segments = sorted(
+        p for p in log_dir.glob(f"{LOG_STEM}.*.jsonl*") if p.name.endswith((".jsonl", ".jsonl.gz"))
+    )
+    active = log_dir / f"{LOG_STEM}.jsonl"
+    return segments + ([active] if active.exists() else [])
+
+
+def _open(path: Path):
+    return gzip.open(path, "rb") if path.suffix == ".gz" else open(path, "rb")
+
+
+def head_key(path: Path) -> Optional[str]:
+    """파일 첫 줄의 해시 (파일 식별용). 첫 줄이 아직 끝나지 않았으면 None."""
+    with _open(path) as f:
+        first = f.readline()
+    if not first.endswith(b"\n"):
+        return None
+    return hashlib.sha1(first).hexdigest()
+
+
+def to_row(record: dict) -> tuple:
+    ctx = record.get("context_summary") or {}
+    weather = ctx.get("weather") or {}
+    out = record.get("output") or {}
+    tags = out.get("reason_tags") or []
+    ts = record.get("timestamp") or ""
+    case_id = record.get("case_id")
+    return (
+        ts, ts[:10], None if case_id is None else str(case_id),
+        ctx.get("meal_slot"), ctx.get("hunger_level"), ctx.get("mood"), ctx.get("company"),
+        ctx.get("effort_level"), ctx.get("budget_range"), weather.get("condition"), weather.get("temp_c"),
+        dumps(record.get("top_k") or []), out.get("selected_menu_id"), out.get("reason_one_liner"), dumps(tags),
+        out.get("reason_source"), int(out.get("reason_source") == "fallback" or tags == ["fallback"]),
+    )
+
+
+def _complete_lines(f, offset: int) -> Iterator[tuple[int, bytes]]:
+    """offset 이후의 완결된 줄과 그 줄 끝 offset."""
+    f.seek(offset)
+    for line in f:
+        if not line.endswith(b"\n"):
+            return  # 쓰는 중인 마지막 줄은 다음 실행에
+        offset += len(line)
+        yield offset, line
+
+
+def ingest_file(conn: sqlite3.Connection, path: Path, is_active: bool) -> tuple[int, int]:
+    """한 파일의 새 줄을 넣는다. (넣은 행 수, 건너뛴 깨진 줄 수)."""
+    head = head_key(path)
+    if head is None:
+        return 0, 0
+    state = conn.execute("SELECT offset, done FROM ingest_state WHERE head = ?", (head,)).fetchone()
+    offset, done = state if state else (0, 0)
+    if done:
+        return 0, 0
+
+    inserted = bad = 0
+    rows: list[tuple] = []
+
+    def commit(end: int) -> None:
+        with conn:
+            conn.executemany(_INSERT, rows)
+            conn.execute(
+                "INSERT OR REPLACE INTO ingest_state (head, file, offset, done, updated_at) VALUES (?, ?, ?, 0, ?)",
+                (head, path.name, end, time.time()),
+            )
+        rows.clear()
+
+    end = offset
+    with _open(path) as f:
+        for end, line in _complete_lines(f, offset):
+            try:
+                rows.append(to_row(loads(line)))
+            except (ValueError, TypeError, AttributeError):
+                bad += 1
+                continue
+            inserted += 1
+            if len(rows) >= CHUNK_LINES:
+                commit(end)
+    if rows or end != offset or state is None:
+        commit(end)
+    if not is_active:  # 로테이션된 조각은 더 바뀌지 않는다
+        with conn:
+            conn.execute("UPDATE ingest_state SET done = 1 WHERE head = ?", (head,))
+    return inserted, bad
+
+
+def cmd_ingest(args) -> None:
+    conn = connect(Path(args.db))
+    files = log_files(Path(args.logs_dir))
+    active = Path(args.logs_dir) / f"{LOG_STEM}.jsonl"
+    t0 = time.perf_counter()
+    total = total_bad = 0
+    for path in files:
+        inserted, bad = ingest_file(conn, path, path == active)
+        if inserted or bad:
+            print(f"  {path.name}: +{inserted}행" + (f" (깨진 줄 {bad}개 건너뜀)" if bad else ""))
+        total += inserted
+        total_bad += bad
+    rows = conn.execute("SELECT COUNT(*) FROM calls").fetchone()[0]
+    print(f"파일 {len(files)}개, 새 행 {total}개 ({time.perf_counter() - t0:.2f}s). 전체 {rows}행 → {args.db}")
+
+
+def cmd_query(args) -> None:
+    if args.name is None and args.sql is None:
+        for name, (desc, _) in QUERIES.items():
+            print(f"  {name:<24} {desc}")
+        return
+    conn = connect(Path(args.db))
+    if args.sql:
+        sql, params = args.sql, {}
+    else:
+        if args.name not in QUERIES:
+            sys.exit(f"unknown query: {args.name} (choose from {', '.join(QUERIES)})")
+        sql = QUERIES[args.name][1]
+        params = {"since": args.since, "until": args.until, "limit": args.limit}
+    t0 = time.perf_counter()
+    cur = conn.execute(sql, params)
+    columns = [d[0] for d in cur.description]
+    rows = cur.fetchall()
+    elapsed = time.perf_counter() - t0
+    if args.json:
+        print(dumps([dict(zip(columns, r)) for r in rows], indent=True))
+        return
+    widths = [max(len(str(c)), *(len(str(r[i])) for r in rows)) if rows else len(str(c)) for i, c in enumerate(columns)]
+    print("  ".join(str(c).ljust(w) for c, w in zip(columns, widths)))
+    for r in rows:
+        print("  ".join(str(v).ljust(w) for v, w in zip(r, widths)))
+    print(f"({len(rows)}행, {elapsed * 1000:.1f}ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="추천 로그 → SQLite 분석 DB 적재·집계")
+    parser.add_argument("--db", default=str(OUTPUT_DIR / "reason_calls.sqlite3"))
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_ingest = sub.add_parser("ingest", help="새 로그 줄만 읽어 DB에 추가")
+    p_ingest.add_argument("--logs-dir", default=str(LOG_DIR))
+    p_ingest.set_defaults(func=cmd_ingest)
+
+    p_query = sub.add_parser("query", help="미리 만든 집계 실행 (이름 없이 실행하면 목록)")
+    p_query.add_argument("name", nargs="?", default=None)
+    p_query.add_argument("--since", default=None, help="시작 날짜 YYYY-MM-DD (UTC, 포함)")
+    p_query.add_argument("--until", default=None, help="끝 날짜 YYYY-MM-DD (UTC, 포함)")
+    p_query.add_argument("--limit", type=int, default=20)
+    p_query.add_argument("--sql", default=None, help="직접 SQL 실행 (테이블: calls)")
+    p_query.add_argument("--json", action="store_true", help="JSON으로 출력")
+    p_query.set_defaults(func=cmd_query)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
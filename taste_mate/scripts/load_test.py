@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+부하 테스트: /v1/recommend, /v1/top-k 처리량·꼬리 지연 측정 (uvicorn 워커 수 산정, 포화 지점 확인용).
+
+- closed 루프 (--mode closed): 동시 요청 수 고정. --concurrency 단계마다 워커 N개가 응답을 받는 즉시 다음 요청.
+- open 루프 (--mode open): 도착률 고정. --rate 단계마다 초당 R건을 일정 간격(--poisson이면 지수 분포 간격)으로
+  보내고, 응답을 기다리지 않는다. 지연은 예정된 도착 시각부터 재므로 서버가 밀리면 대기 시간까지 드러난다.
+  진행 중 요청이 --max-inflight를 넘으면 보내지 않고 overload로 센다.
+
+단계마다 warm-up(--warmup 초)을 버리고 --duration 초 동안의 p50/p90/p99/max 지연, 달성 RPS, 오류율,
+fallback 비율(recommend의 reason_source="fallback")을 출력하고, 전체를 JSON 리포트로 저장한다.
+context는 data/test_cases.json(있으면) 또는 합성(--synthetic). 후보는 시작 시 카탈로그로 한 번 올린다.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import platform
+import random
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import httpx
+
+from run_eval import DATA_DIR, OUTPUT_DIR, load_json, open_client, upload_catalog
+from synthetic import make_candidates, make_contexts
+
+ENDPOINTS = {"recommend": "/v1/recommend", "top-k": "/v1/top-k"}
+DEFAULT_CONCURRENCY = [1, 4, 16, 64]
+DEFAULT_RATES = [5, 10, 20, 40]
+
+
+def percentile(ordered: list[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+class StepStats:
+    """한 단계의 측정 구간(warm-up 이후에 시작한 요청) 결과."""
+
+    def __init__(self):
+        self.latencies_ms: list[float] = []
+        self.statuses: Counter = Counter()
+        self.sources: Counter = Counter()
+        self.errors = 0
+        self.overload = 0
+
+    def add(self, latency_ms: float, status: str, source: Optional[str]) -> None:
+        self.latencies_ms.append(latency_ms)
+        self.statuses[status] += 1
+        if status != "200":
+            self.errors += 1
+        elif source is not None:
+            self.sources[source] += 1
+
+    def summary(self, duration_s: float) -> dict:
+        ordered = sorted(self.latencies_ms)
+        n = len(ordered)
+        attempted = n + self.overload
+        ok = n - self.errors
+        return {
+            "requests": n,
+            "rps": round(n / duration_s, 2) if duration_s > 0 else 0.0,
+            "p50_ms": round(percentile(ordered, 0.5), 2),
+            "p90_ms": round(percentile(ordered, 0.9), 2),
+            "p99_ms": round(percentile(ordered, 0.99), 2),
+            "max_ms": round(ordered[-1], 2) if ordered else 0.0,
+            "errors": self.errors,
+            "error_rate": round((self.errors + self.overload) / attempted, 4) if attempted else 0.0,
+            "overload": self.overload,
+            "fallback_rate": round(self.sources["fallback"] / ok, 4) if ok and self.sources else None,
+            "statuses": dict(self.statuses),
+            "reason_sources": dict(self.sources),
+        }
+
+
+class Target:
+    """엔드포인트 + 요청 본문 (i번째 요청은 contexts[i % n])."""
+
+    def __init__(self, endpoint: str, contexts: list[dict], source: dict, k: int, timeout: float):
+        self.endpoint = endpoint
+        self.path = ENDPOINTS[endpoint]
+        self.contexts = contexts
+        self.source = source
+        self.k = k
+        self.timeout = timeout
+
+    async def send(self, client: httpx.AsyncClient, i: int) -> tuple[str, Optional[str]]:
+        """(상태, reason_source). 연결 오류·시간 초과는 상태에 예외 이름."""
+        body = {"context": self.contexts[i % len(self.contexts)], **self.source, "k": self.k}
+        try:
+            resp = await client.post(self.path, json=body, timeout=self.timeout)
+        except httpx.HTTPError as e:
+            return type(e).__name__, None
+        if resp.status_code != 200 or self.endpoint != "recommend":
+            return str(resp.status_code), None
+        return "200", resp.json().get("reason_source")
+
+
+async def closed_step(client, target: Target, concurrency: int, warmup_s: float, duration_s: float) -> dict:
+    stats = StepStats()
+    measure_from = time.perf_counter() + warmup_s
+    end = measure_from + duration_s
+    counter = itertools.count()
+
+    async def worker():
+        while time.perf_counter() < end:
+            t0 = time.perf_counter()
+            status, source = await target.send(client, next(counter))
+            if t0 >= measure_from:
+                stats.add((time.perf_counter() - t0) * 1000, status, source)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return stats.summary(duration_s)
+
+
+async def open_step(client, target: Target, rate: float, warmup_s: float, duration_s: float,
+                    max_inflight: int, poisson: bool, rng: random.Random) -> dict:
+    stats = StepStats()
+    inflight: set = set()
+    start = time.perf_counter()
+    measure_from = start + warmup_s
+    end = measure_from + duration_s
+
+    async def one(i: int, scheduled: float):
+        status, source = await target.send(client, i)
+        if scheduled >= measure_from:
+            stats.add((time.perf_counter() - scheduled) * 1000, status, source)
+
+    scheduled, i = start, 0
+    while True:
+        scheduled += rng.expovariate(rate) if poisson else 1 / rate
+        if scheduled >= end:
+            break
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(inflight) >= max_inflight:
+            if scheduled >= measure_from:
+                stats.overload += 1
+            continue
+        task = asyncio.create_task(one(i, scheduled))
+        inflight.add(task)
+        task.add_done_callback(inflight.discard)
+        i += 1
+    if inflight:
+        await asyncio.gather(*inflight)
+    return stats.summary(duration_s)
+
+
+def print_step(endpoint: str, label: str, s: dict) -> None:
+    fallback = "-" if s["fallback_rate"] is None else f"{s['fallback_rate'] * 100:.1f}%"
+    print(
+        f"  {endpoint:<10} {label:<8} req={s['requests']:<6} rps={s['rps']:>8.1f}  "
+        f"p50={s['p50_ms']:>8.1f} p90={s['p90_ms']:>8.1f} p99={s['p99_ms']:>8.1f} max={s['max_ms']:>8.1f}ms  "
+        f"err={s['error_rate'] * 100:.1f}% fallback={fallback}"
+    )
+
+
+async def run(args, contexts: list[dict], candidates: list[dict]) -> list[dict]:
+    steps = args.concurrency if args.mode == "closed" else args.rate
+    peak = max(steps) if args.mode == "closed" else args.max_inflight
+    limits = httpx.Limits(max_connections=int(peak), max_keepalive_connections=int(peak))
+    rng = random.Random(args.seed)
+    results = []
+    async with open_client(args.base_url, args.in_process, limits) as client:
+        if args.inline_candidates:
+            source = {"candidates": candidates}
+        else:
+            catalog = await upload_catalog(client, args.catalog_id, candidates, args.timeout)
+            print(f"카탈로그 업로드: id={catalog['catalog_id']} version={catalog['version']} size={catalog['size']}")
+            source = {"catalog_id": catalog["catalog_id"], "catalog_version": catalog["version"]}
+
+        for endpoint in args.endpoints:
+            target = Target(endpoint, contexts, source, args.k, args.timeout)
+            for step in steps:
+                if args.mode == "closed":
+                    label = f"c={step}"
+                    summary = await closed_step(client, target, int(step), args.warmup, args.duration)
+                else:
+                    label = f"r={step:g}"
+                    summary = await open_step(client, target, step, args.warmup, args.duration,
+                                              args.max_inflight, args.poisson, rng)
+                print_step(endpoint, label, summary)
+                results.append({"endpoint": endpoint, "mode": args.mode,
+                                "concurrency" if args.mode == "closed" else "rate": step, **summary})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="부하 테스트: /v1/recommend, /v1/top-k 처리량·지연 리포트")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000", help="API base URL")
+    parser.add_argument("--in-process", action="store_true",
+                        help="서버 없이 app.main:app을 직접 호출 (부하 생성기와 앱이 한 이벤트 루프를 나눠 씀)")
+    parser.add_argument("--endpoints", nargs="+", choices=list(ENDPOINTS), default=["recommend"])
+    parser.add_argument("--mode", choices=["closed", "open"], default="closed",
+                        help="closed: 동시 요청 수 고정 / open: 도착률 고정 (default: closed)")
+    parser.add_argument("--concurrency", "-c", type=int, nargs="+", default=DEFAULT_CONCURRENCY,
+                        help=f"closed 단계별 동시 요청 수 (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--rate", "-r", type=float, nargs="+", default=DEFAULT_RATES,
+                        help=f"open 단계별 초당 요청 수 (default: {DEFAULT_RATES})")
+    parser.add_argument("--poisson", action="store_true", help="open: 도착 간격을 지수 분포로 (기본은 일정 간격)")
+    parser.add_argument("--max-inflight", type=int, default=1000, help="open: 진행 중 요청 상한 (넘으면 overload)")
+    parser.add_argument("--duration", type=float, default=20.0, help="단계별 측정 시간(초) (default: 20)")
+    parser.add_argument("--warmup", type=float, default=2.0, help="단계별 측정에서 뺄 앞부분(초) (default: 2)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="요청당 제한 시간(초) (default: 30)")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--synthetic", type=int, default=0, metavar="N",
+                        help="data/test_cases.json 대신 합성 context N개 사용")
+    parser.add_argument("--catalog-size", type=int, default=200, help="data/candidates.json이 없을 때 합성 후보 수")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--catalog-id", default="load", help="후보를 올려 둘 서버 카탈로그 id (default: load)")
+    parser.add_argument("--inline-candidates", action="store_true", help="카탈로그 대신 매 요청에 후보 전체 전송")
+    parser.add_argument("--out", default=None, help="리포트 JSON 경로 (기본: output/load_<시각>.json)")
+    args = parser.parse_args()
+
+    test_cases_path = DATA_DIR / "test_cases.json"
+    if args.synthetic or not test_cases_path.exists():
+        contexts = make_contexts(args.synthetic or 200, seed=args.seed + 1)
+        context_source = f"synthetic:{len(contexts)}"
+    else:
+        contexts = [tc["context"] for tc in load_json(test_cases_path)]
+        context_source = str(test_cases_path.relative_to(DATA_DIR.parent))
+    candidates_path = DATA_DIR / "candidates.json"
+    if candidates_path.exists():
+        candidates = load_json(candidates_path)
+        candidate_source = str(candidates_path.relative_to(DATA_DIR.parent))
+    else:
+        candidates = make_candidates(args.catalog_size, seed=args.seed)
+        candidate_source = f"synthetic:{len(candidates)}"
+    print(f"context: {context_source}, 후보: {candidate_source}, mode={args.mode}, "
+          f"단계당 {args.duration:g}s (+warm-up {args.warmup:g}s)")
+
+    results = asyncio.run(run(args, contexts, candidates))
+    report = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "target": "in-process" if args.in_process else args.base_url,
+            "mode": args.mode,
+            "poisson": args.poisson if args.mode == "open" else None,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "contexts": context_source,
+            "candidates": candidate_source,
+            "catalog": not args.inline_candidates,
+            "k": args.k,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    out = Path(args.out) if args.out else OUTPUT_DIR / f"load_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"저장: {out}")
+    if any(r["requests"] == 0 for r in results):
+        print("응답을 받은 요청이 없는 단계가 있습니다 (서버 주소·--duration 확인).", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
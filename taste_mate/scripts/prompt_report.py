@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+프롬프트 크기 리포트: 형식(verbose/compact)별로 실제 요청과 같은 방식(룰 랭커 top-k → _build_prompt)으로
+프롬프트를 만들어 글자 수·UTF-8 바이트·토큰 수를 비교한다.
+data/test_cases.json + data/candidates.json 이 있으면 그걸, 없으면 합성 데이터를 쓴다.
+토큰 수는 기본이 추정치이고, --count-tokens 를 주면 Gemini count_tokens API로 센다 (GOOGLE_CLOUD_PROJECT 필요).
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+DATA_DIR = ROOT / "data"
+OUTPUT_DIR = ROOT / "output"
+sys.path.insert(0, str(ROOT))
+
+from dotenv import load_dotenv  # noqa: E402
+
+load_dotenv(ROOT / ".env")
+
+from synthetic import make_candidates, make_contexts  # noqa: E402
+
+from app import llm  # noqa: E402
+from app.models import Candidate, Context  # noqa: E402
+from app.ranker import rule_based_top_k  # noqa: E402
+
+FORMATS = ("verbose", "compact")
+
+
+def estimate_tokens(text: str) -> int:
+    """대략적인 토큰 수: ASCII는 4자당 1, 그 밖(한글 등)은 1자당 1."""
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+def load_cases(n_synthetic: int) -> tuple[list[Context], list[Candidate], str]:
+    candidates_path = DATA_DIR / "candidates.json"
+    test_cases_path = DATA_DIR / "test_cases.json"
+    if candidates_path.exists() and test_cases_path.exists():
+        with open(candidates_path, "r", encoding="utf-8") as f:
+            candidates = json.load(f)
+        with open(test_cases_path, "r", encoding="utf-8") as f:
+            contexts = [tc["context"] for tc in json.load(f)]
+        source = "data"
+    else:
+        candidates = make_candidates(200)
+        contexts = make_contexts(n_synthetic)
+        source = "synthetic"
+    return (
+        [Context.model_validate(c) for c in contexts],
+        [Candidate.model_validate(c) for c in candidates],
+        source,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="프롬프트 형식별 글자·토큰 수 리포트")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--synthetic", type=int, default=20, help="data/ 가 없을 때 만들 합성 context 수")
+    parser.add_argument("--count-tokens", action="store_true", help="Gemini count_tokens API로 실제 토큰 수 측정")
+    parser.add_argument("--show", choices=FORMATS, default=None, help="첫 케이스의 프롬프트 전문 출력")
+    parser.add_argument("--out", default=None, help="결과 JSON 경로 (기본: output/prompt_report.json)")
+    args = parser.parse_args()
+
+    contexts, candidates, source = load_cases(args.synthetic)
+    by_id = {c.menu_id: c for c in candidates}
+    client = llm.get_client() if args.count_tokens else None
+    if args.count_tokens and client is None:
+        print("GOOGLE_CLOUD_PROJECT 가 없어 추정 토큰 수만 출력합니다.", file=sys.stderr)
+    model_name = os.getenv("LLM_MODEL", "gemini-2.0-flash")
+
+    report = {"source": source, "cases": len(contexts), "k": args.k, "formats": {}}
+    for fmt in FORMATS:
+        rows = []
+        for ctx in contexts:
+            top_k = rule_based_top_k(ctx, candidates, args.k)
+            prompt = llm._build_prompt(ctx, [by_id[i] for i in top_k], fmt)
+            row = {"chars": len(prompt), "bytes": len(prompt.encode("utf-8")), "est_tokens": estimate_tokens(prompt)}
+            if client is not None:
+                row["tokens"] = client.models.count_tokens(model=model_name, contents=prompt).total_tokens
+            rows.append(row)
+        if args.show == fmt:
+            top_k = rule_based_top_k(contexts[0], candidates, args.k)
+            print(llm._build_prompt(contexts[0], [by_id[i] for i in top_k], fmt))
+            print("-" * 40)
+        report["formats"][fmt] = {key: round(statistics.fmean(r[key] for r in rows), 1) for key in rows[0]}
+
+    print(f"[{source}] 케이스 {len(contexts)}개, k={args.k} (평균)")
+    base = report["formats"]["verbose"]
+    for fmt, stats in report["formats"].items():
+        parts = [f"{key}={value:>8.1f} ({value / base[key] * 100:5.1f}%)" for key, value in stats.items()]
+        print(f"  {fmt:<8} " + "  ".join(parts))
+
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    out = Path(args.out) if args.out else OUTPUT_DIR / "prompt_report.json"
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"저장: {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+성능 벤치마크: 합성 카탈로그(100 ~ 1M 후보)와 context로 랭킹·요청 경로 시간 측정.
+- rule_based_top_k (후보 리스트 → 행렬 생성 + 채점), 카탈로그(미리 만든 행렬) top_k
+- _build_prompt, RecommendRequest 검증
+- JSON 직렬화 (app/serialization.py vs stdlib json): 응답 본문, 로그 한 줄, LLM 응답 파싱, 후보 목록
+- /v1/top-k, /v1/recommend 엔드포인트 (서버 없이 in-process ASGI 클라이언트, LLM은 stub).
+  랭킹 결과 캐시는 끈 채로 재고, 캐시 적중 시간은 `endpoint_recommend_topk_cached` 항목으로 따로 잰다.
+결과는 JSON으로 저장하고, --baseline을 주면 기준 결과 대비 느려진 항목을 표시한다 (있으면 exit 1).
+"""
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+
+import httpx
+import numpy as np
+from fastapi.responses import JSONResponse
+
+ROOT = Path(__file__).resolve().parent.parent
+OUTPUT_DIR = ROOT / "output"
+sys.path.insert(0, str(ROOT))
+
+from synthetic import make_candidates, make_contexts  # noqa: E402
+
+from app import main as app_main, topk_cache  # noqa: E402
+from app.engine import CandidateMatrix  # noqa: E402
+from app.llm import _build_prompt, _fallback  # noqa: E402
+from app.models import Candidate, Context, RecommendRequest  # noqa: E402
+from app.ranker import compile_context, rule_based_top_k  # noqa: E402
+from app.serialization import HAS_ORJSON, ORJSONResponse, dumps, extract_json  # noqa: E402
+
+DEFAULT_SIZES = [100, 1000, 10000, 100000]
+
+
+def summarize(samples_ms: list[float]) -> dict:
+    ordered = sorted(samples_ms)
+    return {
+        "n": len(ordered),
+        "min_ms": round(ordered[0], 4),
+        "median_ms": round(statistics.median(ordered), 4),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 4),
+        "mean_ms": round(statistics.fmean(ordered), 4),
+        "max_ms": round(ordered[-1], 4),
+    }
+
+
+def time_sync(fn: Callable[[int], object], repeat: int, warmup: int = 1) -> dict:
+    """fn(i)를 repeat번 실행한 시간 (ms). i로 context 등을 돌려 쓴다."""
+    for i in range(warmup):
+        fn(i)
+    samples = []
+    for i in range(repeat):
+        t0 = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return summarize(samples)
+
+
+async def time_async(fn, repeat: int, warmup: int = 1) -> dict:
+    for i in range(warmup):
+        await fn(i)
+    samples = []
+    for i in range(repeat):
+        t0 = time.perf_counter()
+        await fn(i)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return summarize(samples)
+
+
+async def stub_llm(context, candidates, top_k, budget_s=None):
+    """LLM 대신 즉시 fallback 응답 (요청 경로 중 우리 코드 시간만 측정)."""
+    return _fallback(top_k)
+
+
+@contextmanager
+def topk_cache_off():
+    """랭킹 결과 캐시를 잠시 끈다 (같은 context를 반복하므로 켜 두면 랭킹 대신 캐시 적중 시간을 재게 된다)."""
+    cache = topk_cache.cache
+    maxsize, cache.maxsize = cache.maxsize, 0
+    cache.clear()
+    try:
+        yield
+    finally:
+        cache.maxsize = maxsize
+
+
+async def bench_endpoints(size: int, candidates: list[dict], contexts: list[dict], repeat: int, inline: bool) -> dict:
+    results = {}
+    transport = httpx.ASGITransport(app=app_main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        catalog_id = f"bench-{size}"
+        resp = await client.put(f"/v1/catalogs/{catalog_id}", json={"candidates": candidates})
+        resp.raise_for_status()
+
+        async def post(path: str, body: dict):
+            r = await client.post(path, json=body)
+            r.raise_for_status()
+
+        def recommend(i: int):
+            return post("/v1/recommend", {"context": contexts[i % len(contexts)], "catalog_id": catalog_id, "k": 5})
+
+        with topk_cache_off():
+            if inline:
+                results["endpoint_top_k_inline"] = await time_async(
+                    lambda i: post("/v1/top-k", {"context": contexts[i % len(contexts)], "candidates": candidates, "k": 5}),
+                    repeat,
+                )
+            results["endpoint_top_k_catalog"] = await time_async(
+                lambda i: post("/v1/top-k", {"context": contexts[i % len(contexts)], "catalog_id": catalog_id, "k": 5}),
+                repeat,
+            )
+            results["endpoint_recommend_catalog"] = await time_async(recommend, repeat)
+        if topk_cache.cache.enabled:
+            topk_cache.cache.clear()
+            for i in range(repeat):  # 같은 context로 캐시를 채운 뒤 적중 시간만
+                await recommend(i)
+            results["endpoint_recommend_topk_cached"] = await time_async(recommend, repeat)
+        await client.delete(f"/v1/catalogs/{catalog_id}")
+    return results
+
+
+def _stdlib_parse(text: str):
+    """이전 방식: 앞뒤 ``` 펜스만 떼고 json.loads."""
+    clean = text.strip()
+    if clean.startswith("```"):
+        clean = clean.split("\n", 1)[-1].rsplit("```", 1)[0].strip()
+    return json.loads(clean)
+
+
+def bench_serialization(add: Callable[[str, int, dict], None], repeat: int, seed: int) -> None:
+    """요청마다 하는 JSON 작업을 stdlib json(`_stdlib`)과 app/serialization.py로 각각 측정."""
+    response = {
+        "selected_menu_id": 7,
+        "reason_one_liner": "점심에 혼자 먹기 좋고 피곤 기분에도 잘 어울리는 메뉴예요",
+        "reason_tags": ["점심", "피곤"],
+        "top_k_used": [7, 3, 12, 41, 5],
+        "reason_source": "live",
+    }
+    log_line = {"timestamp": "2026-01-01T00:00:00Z", "case_id": None, "context_summary": make_contexts(1, seed)[0],
+                "top_k": response["top_k_used"], "output": response}
+    llm_text = f"```json\n{json.dumps(response, ensure_ascii=False, indent=2)}\n```"
+    std_response, fast_response = JSONResponse(None), ORJSONResponse(None)
+    n = repeat * 50
+    add("json_response_stdlib", 1, time_sync(lambda i: std_response.render(response), n))
+    add("json_response", 1, time_sync(lambda i: fast_response.render(response), n))
+    add("json_log_line_stdlib", 1, time_sync(lambda i: json.dumps(log_line, ensure_ascii=False), n))
+    add("json_log_line", 1, time_sync(lambda i: dumps(log_line), n))
+    add("llm_parse_stdlib", 1, time_sync(lambda i: _stdlib_parse(llm_text), n))
+    add("llm_parse", 1, time_sync(lambda i: extract_json(llm_text), n))
+    candidates = make_candidates(1000, seed=seed)
+    add("json_candidates_stdlib", len(candidates), time_sync(lambda i: std_response.render(candidates), repeat))
+    add("json_candidates", len(candidates), time_sync(lambda i: fast_response.render(candidates), repeat))
+
+
+def run(sizes: list[int], repeat: int, max_payload: int, seed: int) -> list[dict]:
+    records = []
+
+    def add(name: str, size: int, stats: dict) -> None:
+        records.append({"name": name, "size": size, **stats})
+        print(f"  {name:<28} n={size:<8} median={stats['median_ms']:>10.3f}ms  p95={stats['p95_ms']:>10.3f}ms")
+
+    raw_contexts = make_contexts(200, seed=seed + 1)
+    contexts = [Context.model_validate(c) for c in raw_contexts]
+    plans = [compile_context(c) for c in contexts]
+
+    prompt_candidates = [Candidate.model_validate(c) for c in make_candidates(5, seed=seed)]
+    print("[prompt]")
+    add("build_prompt", len(prompt_candidates),
+        time_sync(lambda i: _build_prompt(contexts[i % len(contexts)], prompt_candidates), repeat * 5))
+    add("build_prompt_compact", len(prompt_candidates),
+        time_sync(lambda i: _build_prompt(contexts[i % len(contexts)], prompt_candidates, "compact"), repeat * 5))
+
+    print(f"[serialization] orjson={'yes' if HAS_ORJSON else 'no (stdlib fallback)'}")
+    bench_serialization(add, repeat, seed)
+
+    for size in sizes:
+        print(f"[n={size}]")
+        raw = make_candidates(size, seed=seed)
+        n_repeat = repeat if size <= 10000 else max(3, repeat // 5)
+        inline = size <= max_payload
+
+        if inline:
+            add("validate_request", size, time_sync(
+                lambda i: RecommendRequest.model_validate(
+                    {"context": raw_contexts[i % len(raw_contexts)], "candidates": raw, "k": 5}
+                ),
+                n_repeat,
+            ))
+        candidates = [Candidate.model_validate(c) for c in raw]
+        add("rule_based_top_k", size, time_sync(
+            lambda i: rule_based_top_k(contexts[i % len(contexts)], candidates, 5), n_repeat,
+        ))
+        matrix = CandidateMatrix(candidates)
+        matrix.index
+        add("catalog_top_k", size, time_sync(lambda i: matrix.top_k(plans[i % len(plans)], 5), n_repeat * 5))
+
+        if size <= max_payload * 10:
+            for name, stats in asyncio.run(bench_endpoints(size, raw, raw_contexts, n_repeat, inline)).items():
+                add(name, size, stats)
+    return records
+
+
+def compare(records: list[dict], baseline: dict, tolerance: float, min_abs_ms: float) -> list[dict]:
+    """baseline 대비 median이 tolerance 비율 이상 + min_abs_ms 이상 느려진 항목."""
+    base = {(r["name"], r["size"]): r for r in baseline.get("results", [])}
+    regressions = []
+    print("\n========== baseline 비교 ==========")
+    for r in records:
+        b = base.get((r["name"], r["size"]))
+        if b is None:
+            continue
+        ratio = r["median_ms"] / b["median_ms"] if b["median_ms"] > 0 else float("inf")
+        slower = r["median_ms"] - b["median_ms"]
+        flag = ratio > 1 + tolerance and slower > min_abs_ms
+        print(f"  {r['name']:<28} n={r['size']:<8} {b['median_ms']:>10.3f} → {r['median_ms']:>10.3f}ms  x{ratio:.2f}"
+              f"{'  REGRESSION' if flag else ''}")
+        if flag:
+            regressions.append({"name": r["name"], "size": r["size"], "baseline_ms": b["median_ms"],
+                                "current_ms": r["median_ms"], "ratio": round(ratio, 3)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="랭킹·요청 경로 성능 벤치마크 (LLM stub)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help=f"후보 수 목록 (기본 {DEFAULT_SIZES}; 1000000까지 가능)")
+    parser.add_argument("--repeat", type=int, default=20, help="항목당 반복 횟수 (큰 카탈로그는 자동 축소)")
+    parser.add_argument("--max-payload", type=int, default=10000,
+                        help="이 수 이하 후보만 인라인 요청·검증 측정 (큰 JSON 생성 비용 제한)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="결과 JSON 경로 (기본: output/bench_<시각>.json)")
+    parser.add_argument("--baseline", default=None, help="비교할 기준 결과 JSON")
+    parser.add_argument("--save-baseline", default=None, help="이번 결과를 기준 결과로도 저장할 경로")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="median이 이 비율 이상 느려지면 회귀 (기본 0.2)")
+    parser.add_argument("--min-abs-ms", type=float, default=0.05, help="이보다 작은 차이는 무시 (ms)")
+    args = parser.parse_args()
+
+    app_main.acall_llm = stub_llm
+    records = run(args.sizes, args.repeat, args.max_payload, args.seed)
+    report = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "orjson": HAS_ORJSON,
+            "platform": platform.platform(),
+            "sizes": args.sizes,
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "results": records,
+    }
+
+    regressions: Optional[list] = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(records, json.load(f), args.tolerance, args.min_abs_ms)
+        report["regressions"] = regressions
+
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    out = Path(args.out) if args.out else OUTPUT_DIR / f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    for path in filter(None, [out, args.save_baseline and Path(args.save_baseline)]):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"저장: {path}")
+
+    if regressions:
+        print(f"\n회귀 {len(regressions)}건", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,23 @@
 #!/usr/bin/env python3
 """
-테스트 러너: test_cases 10개로 POST /v1/recommend 호출 후 검증·저장.
+테스트 러너: test_cases로 POST /v1/recommend 호출 후 검증·저장.
+--concurrency N이면 N건씩 동시에 호출하고, --in-process면 서버 없이 app.main:app을 ASGI로 직접 호출한다.
+결과는 케이스가 끝나는 대로(완료 순서) JSONL/CSV에 한 줄씩 쓴다.
 """
 import argparse
+import asyncio
 import csv
 import json
 import sys
+import time
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Union
+from typing import Optional, Union
 
 import httpx
 
 ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))  # --in-process: app 패키지 import
 DATA_DIR = ROOT / "data"
 OUTPUT_DIR = ROOT / "output"
 
@@ -25,17 +31,28 @@ def load_json(path: Path) -> Union[list, dict]:
         return json.load(f)
 
 
-def run_one(client: httpx.Client, base_url: str, case_id: int, context: dict, candidates: list) -> dict:
-    resp = client.post(
-        f"{base_url}/v1/recommend",
-        json={"context": context, "candidates": candidates, "k": 5},
-        timeout=30.0,
+async def upload_catalog(client: httpx.AsyncClient, catalog_id: str, candidates: list, timeout: float) -> dict:
+    """후보를 서버 카탈로그로 한 번만 올린다. 이후 케이스는 catalog_id만 전송."""
+    resp = await client.put(f"/v1/catalogs/{catalog_id}", json={"candidates": candidates}, timeout=timeout)
+    resp.raise_for_status()
+    return resp.json()
+
+
+async def run_one(client: httpx.AsyncClient, case_id: int, context: dict, source: dict, timeout: float) -> dict:
+    """source: {"candidates": [...]} 또는 {"catalog_id": ...}"""
+    t0 = time.perf_counter()
+    resp = await client.post(
+        "/v1/recommend",
+        json={"context": context, **source, "k": 5},
+        headers={"X-Case-ID": str(case_id)},
+        timeout=timeout,
     )
     resp.raise_for_status()
     result = resp.json()
     result["_case_id"] = case_id
     result["_context"] = context
     result["_top_k"] = result.get("top_k_used") or []
+    result["_latency_ms"] = round((time.perf_counter() - t0) * 1000, 1)
     return result
 
 
@@ -75,17 +92,148 @@ def check_context_keywords(context: dict, reason: str) -> tuple[bool, list[str]]
     return len(found) >= 2, found
 
 
+CSV_COLUMNS = [
+    "case_id",
+    "selected_menu_id",
+    "reason_one_liner",
+    "reason_tags",
+    "reason_len",
+    "selected_in_top_k",
+    "reason_length_ok",
+    "context_keywords_ok",
+    "context_keywords_found",
+    "reason_source",
+    "latency_ms",
+]
+
+
+@asynccontextmanager
+async def open_client(base_url: str, in_process: bool, limits: Optional[httpx.Limits] = None):
+    """HTTP 클라이언트. in_process면 app.main:app을 ASGI transport로 붙이고 lifespan(기동·종료)도 직접 돌린다.
+    ASGI transport에는 연결 풀도 제한 시간도 없으므로 limits와 요청별 timeout은 HTTP로 붙을 때만 적용된다."""
+    if not in_process:
+        async with httpx.AsyncClient(base_url=base_url, limits=limits or httpx.Limits()) as client:
+            yield client
+        return
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://eval") as client:
+            yield client
+
+
+class ResultSink:
+    """끝난 케이스를 바로 검증해 JSONL/CSV에 한 줄씩 쓰고, 요약용 카운트만 메모리에 남긴다."""
+
+    def __init__(self, out_jsonl: Path, out_csv: Path):
+        self._jsonl = open(out_jsonl, "w", encoding="utf-8")
+        self._csv_file = open(out_csv, "w", encoding="utf-8", newline="")
+        self._csv = csv.writer(self._csv_file)
+        self._csv.writerow(CSV_COLUMNS)
+        self.responses = 0
+        self.errors = 0
+        self.all_ok = 0
+        self.checks = {"selected_in_top_k": 0, "reason_length_ok": 0, "context_keywords_ok": 0}
+        self.latencies_ms: list[float] = []
+
+    def add(self, row: dict) -> None:
+        context = row["_context"]
+        in_top_k = bool(check_selected_in_top_k(row["_top_k"], row["selected_menu_id"]))
+        len_ok, reason_len = check_reason_length(row["reason_one_liner"])
+        kw_ok, keywords_found = check_context_keywords(context, row["reason_one_liner"])
+
+        self.responses += 1
+        self.latencies_ms.append(row["_latency_ms"])
+        if in_top_k:
+            self.checks["selected_in_top_k"] += 1
+        if len_ok:
+            self.checks["reason_length_ok"] += 1
+        if kw_ok:
+            self.checks["context_keywords_ok"] += 1
+        if in_top_k and len_ok and kw_ok:
+            self.all_ok += 1
+
+        row["_check_selected_in_top_k"] = in_top_k
+        row["_check_reason_length_ok"] = len_ok
+        row["_reason_len"] = reason_len
+        row["_check_context_keywords_ok"] = kw_ok
+        row["_context_keywords_found"] = keywords_found
+        self._jsonl.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self._csv.writerow([
+            row["_case_id"],
+            row["selected_menu_id"],
+            row["reason_one_liner"],
+            "|".join(row["reason_tags"]),
+            reason_len,
+            in_top_k,
+            len_ok,
+            kw_ok,
+            "|".join(keywords_found),
+            row.get("reason_source"),
+            row["_latency_ms"],
+        ])
+        print(
+            f"Case {row['_case_id']}: selected={row['selected_menu_id']} in_top_k={in_top_k} "
+            f"len={reason_len}({'OK' if len_ok else 'FAIL'}) keywords={keywords_found}({'OK' if kw_ok else 'FAIL'}) "
+            f"{row['_latency_ms']:.0f}ms"
+        )
+
+    def close(self) -> None:
+        self._jsonl.close()
+        self._csv_file.close()
+
+
+async def run_cases(args, candidates: list, test_cases: list, sink: ResultSink) -> None:
+    workers = max(1, args.concurrency)
+    limits = httpx.Limits(max_connections=workers, max_keepalive_connections=workers)  # 워커당 연결 하나
+    async with open_client(args.base_url, args.in_process, limits) as client:
+        if args.inline_candidates:
+            source = {"candidates": candidates}
+        else:
+            catalog = await upload_catalog(client, args.catalog_id, candidates, args.timeout)
+            print(f"카탈로그 업로드: id={catalog['catalog_id']} version={catalog['version']} size={catalog['size']}")
+            source = {"catalog_id": catalog["catalog_id"], "catalog_version": catalog["version"]}
+
+        cases = iter(enumerate(test_cases, start=1))  # 워커들이 나눠 가져감 (한 번에 concurrency건만 진행 중)
+
+        async def worker():
+            for case_id, tc in cases:
+                try:
+                    row = await run_one(client, case_id, tc["context"], source, args.timeout)
+                except Exception as e:
+                    print(f"Case {case_id}: API 오류 - {e!r}")
+                    sink.errors += 1
+                    continue
+                sink.add(row)
+
+        await asyncio.gather(*(worker() for _ in range(workers)))
+
+
 def main():
     parser = argparse.ArgumentParser(description="Run evaluation: POST /v1/recommend with test_cases")
     parser.add_argument("--base-url", default="http://127.0.0.1:8000", help="API base URL")
+    parser.add_argument("--in-process", action="store_true", help="서버 없이 app.main:app을 직접 호출 (ASGI transport)")
+    parser.add_argument("--concurrency", "-j", type=int, default=1, help="동시에 진행할 요청 수 (default: 1)")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="요청당 제한 시간(초) (default: 30). --in-process와 함께 쓸 수 없음 (ASGI 호출엔 적용 안 됨)")
+    parser.add_argument("--test-cases", default=None, help="케이스 JSON 경로 (default: data/test_cases.json)")
     parser.add_argument("--out-jsonl", default=None, help="Output JSONL path (default: output/eval_results.jsonl)")
     parser.add_argument("--out-csv", default=None, help="Output CSV path (default: output/eval_results.csv)")
+    parser.add_argument("--catalog-id", default="eval", help="후보를 올려 둘 서버 카탈로그 id (default: eval)")
+    parser.add_argument("--inline-candidates", action="store_true", help="카탈로그 대신 매 요청에 후보 전체 전송")
+    parser.add_argument("--out-summary", default=None, help="통과율 요약 JSON 경로 (default: output/eval_summary.json)")
+    parser.add_argument("--label", default=None, help="요약에 남길 실행 이름 (예: 서버의 PROMPT_FORMAT 값)")
     args = parser.parse_args()
+    if args.timeout is not None and args.in_process:
+        parser.error("--timeout은 --in-process와 함께 쓸 수 없습니다 (ASGI transport는 제한 시간을 적용하지 않음)")
+    if args.timeout is None:
+        args.timeout = 30.0
 
     candidates_path = DATA_DIR / "candidates.json"
-    test_cases_path = DATA_DIR / "test_cases.json"
+    test_cases_path = Path(args.test_cases) if args.test_cases else DATA_DIR / "test_cases.json"
     if not candidates_path.exists() or not test_cases_path.exists():
-        print("data/candidates.json 또는 data/test_cases.json 이 없습니다.", file=sys.stderr)
+        print(f"data/candidates.json 또는 {test_cases_path} 이 없습니다.", file=sys.stderr)
         sys.exit(1)
 
     candidates = load_json(candidates_path)
@@ -93,98 +241,50 @@ def main():
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     out_jsonl = args.out_jsonl or (OUTPUT_DIR / "eval_results.jsonl")
     out_csv = args.out_csv or (OUTPUT_DIR / "eval_results.csv")
+    out_summary = args.out_summary or (OUTPUT_DIR / "eval_summary.json")
 
-    results = []
-    summary_ok = 0
-    summary_fail = 0
-    checks = {"selected_in_top_k": 0, "reason_length_ok": 0, "context_keywords_ok": 0}
-
-    with httpx.Client() as client:
-        for i, tc in enumerate(test_cases):
-            case_id = i + 1
-            context = tc["context"]
-            try:
-                row = run_one(client, args.base_url, case_id, context, candidates)
-            except Exception as e:
-                print(f"Case {case_id}: API 오류 - {e}")
-                summary_fail += 1
-                continue
-
-            top_k = row.get("_top_k") or []
-            in_top_k = check_selected_in_top_k(top_k, row["selected_menu_id"])
-            len_ok, reason_len = check_reason_length(row["reason_one_liner"])
-            kw_ok, keywords_found = check_context_keywords(context, row["reason_one_liner"])
-
-            if in_top_k:
-                checks["selected_in_top_k"] += 1
-            if len_ok:
-                checks["reason_length_ok"] += 1
-            if kw_ok:
-                checks["context_keywords_ok"] += 1
-
-            row["_check_selected_in_top_k"] = in_top_k
-            row["_check_reason_length_ok"] = len_ok
-            row["_reason_len"] = reason_len
-            row["_check_context_keywords_ok"] = kw_ok
-            row["_context_keywords_found"] = keywords_found
-            all_ok = in_top_k and len_ok and kw_ok
-            if all_ok:
-                summary_ok += 1
-            else:
-                summary_fail += 1
-
-            results.append(row)
-            print(
-                f"Case {case_id}: selected={row['selected_menu_id']} in_top_k={in_top_k} "
-                f"len={reason_len}({'OK' if len_ok else 'FAIL'}) keywords={keywords_found}({'OK' if kw_ok else 'FAIL'})"
-            )
-
-    # JSONL 저장 (검증용 필드 제외한 출력만 저장할 수도 있음; 여기서는 전부 저장)
-    with open(out_jsonl, "w", encoding="utf-8") as f:
-        for r in results:
-            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+    sink = ResultSink(out_jsonl, out_csv)
+    t0 = time.perf_counter()
+    try:
+        asyncio.run(run_cases(args, candidates, test_cases, sink))
+    finally:
+        sink.close()
+    elapsed = time.perf_counter() - t0
     print(f"\n저장: {out_jsonl}")
-
-    # CSV 저장 (요약 컬럼)
-    with open(out_csv, "w", encoding="utf-8", newline="") as f:
-        w = csv.writer(f)
-        w.writerow(
-            [
-                "case_id",
-                "selected_menu_id",
-                "reason_one_liner",
-                "reason_tags",
-                "reason_len",
-                "selected_in_top_k",
-                "reason_length_ok",
-                "context_keywords_ok",
-                "context_keywords_found",
-            ]
-        )
-        for r in results:
-            w.writerow(
-                [
-                    r["_case_id"],
-                    r["selected_menu_id"],
-                    r["reason_one_liner"],
-                    "|".join(r["reason_tags"]),
-                    r["_reason_len"],
-                    r["_check_selected_in_top_k"],
-                    r["_check_reason_length_ok"],
-                    r["_check_context_keywords_ok"],
-                    "|".join(r["_context_keywords_found"]),
-                ]
-            )
     print(f"저장: {out_csv}")
 
     # 콘솔 요약
-    n = len(results)
+    n = sink.responses
+    checks = sink.checks
+    latencies = sorted(sink.latencies_ms)
+    p50 = latencies[len(latencies) // 2] if latencies else 0.0
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else 0.0
     print("\n========== 요약 ==========")
-    print(f"총 케이스: {len(test_cases)}, 성공 호출: {n}")
-    print(f"전체 통과(3항목 모두 OK): {summary_ok} / {n}")
+    print(f"총 케이스: {len(test_cases)}, 성공 호출: {n}, 오류: {sink.errors}")
+    print(f"전체 통과(3항목 모두 OK): {sink.all_ok} / {n}")
     print(f"selected_menu_id in top_k: {checks['selected_in_top_k']} / {n}")
     print(f"reason_one_liner 길이 25~45자: {checks['reason_length_ok']} / {n}")
     print(f"context 키워드 2개 이상 반영: {checks['context_keywords_ok']} / {n}")
+    print(f"소요: {elapsed:.1f}s (concurrency={args.concurrency}, 지연 p50={p50:.0f}ms p99={p99:.0f}ms)")
+
+    # 요약 JSON (프롬프트 형식 등 설정별 통과율 비교용)
+    summary = {
+        "label": args.label,
+        "cases": len(test_cases),
+        "responses": n,
+        "errors": sink.errors,
+        "all_ok": sink.all_ok,
+        "pass_rate": sink.all_ok / n if n else 0.0,
+        **{f"{name}_rate": count / n if n else 0.0 for name, count in checks.items()},
+        "concurrency": args.concurrency,
+        "in_process": args.in_process,
+        "elapsed_s": round(elapsed, 3),
+        "latency_p50_ms": p50,
+        "latency_p99_ms": p99,
+    }
+    with open(out_summary, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    print(f"저장: {out_summary}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,78 @@
+"""
+벤치마크·부하 테스트용 합성 데이터: 후보 메뉴 카탈로그와 context.
+실제 지도 앱 후보처럼 한국어 태그 어휘(랭커 선호 태그 + 재료/조리법/지역 태그)를 쓰고,
+seed가 같으면 항상 같은 데이터를 만든다.
+"""
+import random
+from typing import Optional
+
+# 랭커가 실제로 보는 태그 (app/ranker.py 의 선호 태그 표와 겹치게)
+RANKER_TAGS = [
+    "아침", "간편", "가벼운", "빠른", "든든한", "한그릇", "제대로", "면요리", "고기", "야식",
+    "따뜻한", "국물", "구수한", "밥친구", "담백", "건강", "다이어트", "야채", "매운맛",
+    "분위기", "데이트", "회식", "배달",
+]
+INGREDIENT_TAGS = [
+    "돼지고기", "소고기", "닭고기", "해산물", "새우", "오징어", "두부", "김치", "치즈", "계란",
+    "버섯", "감자", "떡", "어묵", "곱창", "연어", "참치", "샐러드", "나물", "콩나물",
+]
+STYLE_TAGS = [
+    "튀김", "볶음", "구이", "찜", "탕", "전골", "비빔", "국수", "덮밥", "샌드위치",
+    "바삭", "달콤", "짭짤", "고소한", "얼큰한", "시원한", "새콤", "불맛", "수제", "가성비",
+    "혼밥", "포장", "대용량", "1인분", "비건", "저칼로리", "단백질", "브런치", "디저트", "안주",
+]
+REGION_TAGS = [f"{r}식" for r in ("전주", "부산", "대구", "광주", "춘천", "안동", "제주", "속초", "평양", "함흥")]
+CATEGORIES = ["한식", "중식", "일식", "양식", "분식", "아시안", "패스트푸드", "카페", "샐러드", "술집"]
+MENU_WORDS = ["김치찌개", "된장찌개", "짜장면", "짬뽕", "초밥", "라멘", "파스타", "피자", "떡볶이", "김밥",
+              "쌀국수", "햄버거", "샐러드볼", "치킨", "국밥", "비빔밥", "돈까스", "우동", "마라탕", "샌드위치"]
+
+MEAL_SLOTS = ["아침", "점심", "저녁", "야식"]
+EFFORT_LEVELS = ["간단히", "보통", "제대로"]
+MOODS = ["스트레스", "피곤", "무기력", "좋음", "보통", "설렘"]
+COMPANIES = ["혼자", "친구", "연인", "가족", "동료"]
+BUDGETS = ["5000~8000", "8000~12000", "10,000~15,000", "15000~25000", "20000~40000", "상관없음"]
+WEATHER = [("clear", 22.0), ("rain", 14.0), ("snow", -3.0), ("cloudy", 8.0), ("clear", 31.0), ("cloudy", 27.5)]
+
+
+def make_candidates(n: int, seed: int = 0) -> list[dict]:
+    """후보 n개 (Candidate 형태의 dict). 랭커 태그는 흔하게, 나머지 태그는 드물게 붙는다."""
+    rng = random.Random(seed)
+    long_tail = INGREDIENT_TAGS + STYLE_TAGS + REGION_TAGS
+    candidates = []
+    for i in range(n):
+        tags = rng.sample(RANKER_TAGS, rng.randint(0, 3)) + rng.sample(long_tail, rng.randint(1, 4))
+        candidates.append({
+            "menu_id": i + 1,
+            "menu_name": f"{rng.choice(REGION_TAGS)} {rng.choice(MENU_WORDS)}",
+            "category": rng.choice(CATEGORIES),
+            "tags": tags,
+            "price_est": rng.randrange(3000, 45000, 500),
+            "prep_time_est": rng.randint(5, 40),
+        })
+    return candidates
+
+
+def make_context(rng: random.Random, categories: Optional[list[str]] = None) -> dict:
+    """context 하나 (Context 형태의 dict). 날씨는 20% 확률로 생략."""
+    categories = categories or CATEGORIES
+    context = {
+        "meal_slot": rng.choice(MEAL_SLOTS),
+        "hunger_level": rng.randint(1, 5),
+        "mood": rng.choice(MOODS),
+        "company": rng.choice(COMPANIES),
+        "effort_level": rng.choice(EFFORT_LEVELS),
+        "budget_range": rng.choice(BUDGETS),
+        "recent_meals": [
+            {"category": rng.choice(categories), "menu": rng.choice(MENU_WORDS), "days_ago": rng.randint(0, 6)}
+            for _ in range(rng.randint(0, 3))
+        ],
+    }
+    if rng.random() < 0.8:
+        condition, temp_c = rng.choice(WEATHER)
+        context["weather"] = {"condition": condition, "temp_c": temp_c}
+    return context
+
+
+def make_contexts(n: int, seed: int = 1) -> list[dict]:
+    rng = random.Random(seed)
+    return [make_context(rng) for _ in range(n)]
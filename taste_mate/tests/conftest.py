@@ -0,0 +1,55 @@
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "scripts"))  # synthetic.py (합성 후보·context)
+
+# app import 전에: 자격 증명·사유 캐시 DB 없이 돌도록 (.env보다 우선)
+os.environ.update(LLM_BACKEND="simulated", LLM_SIM_LATENCY_MS="5", REASON_CACHE_DB="")
+
+from app.llm_backends import LLMBackend  # noqa: E402
+
+
+class FakeBackend(LLMBackend):
+    """프롬프트마다 reply(prompt)를 돌려주는 LLM 백엔드. reply가 예외 객체를 돌려주면 그 예외를 던진다."""
+
+    name = "fake"
+
+    def __init__(self):
+        self.prompts = []
+        self.reply = lambda prompt: None
+        self.delay_s = 0.0
+
+    def _answer(self, prompt: str):
+        self.prompts.append(prompt)
+        result = self.reply(prompt)
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    def generate(self, prompt: str, model: str, config: dict):
+        return self._answer(prompt)
+
+    async def agenerate(self, prompt: str, model: str, config: dict):
+        await asyncio.sleep(self.delay_s)
+        return self._answer(prompt)
+
+
+@pytest.fixture
+def fake_backend():
+    """llm 백엔드를 FakeBackend로 바꾸고 사유 캐시·circuit breaker를 비운다 (끝나면 되돌림)."""
+    from app import llm
+
+    backend = FakeBackend()
+    previous = llm.set_backend(backend)
+    llm.reason_cache.clear()
+    llm.breaker.reset()
+    yield backend
+    llm.set_backend(previous)
+    llm.reason_cache.clear()
+    llm.breaker.reset()
@@ -0,0 +1,77 @@
+"""
+NumPy 엔진 이전의 후보별(스칼라) 랭커. 엔진·가지치기·배치 경로가 이것과 같은 결과를 내는지 비교하는 기준.
+가중치·태그 표는 app.ranker 것을 그대로 쓴다 (표를 바꿔도 기준이 함께 따라가게).
+"""
+from typing import List
+
+from app.models import Candidate, Context
+from app.ranker import (
+    COLD_TAGS,
+    EFFORT_TAGS,
+    HOT_TAGS,
+    MEAL_SLOT_TAGS,
+    MOOD_TAGS,
+    WEIGHT_BUDGET,
+    WEIGHT_EFFORT,
+    WEIGHT_MEAL_SLOT,
+    WEIGHT_MOOD,
+    WEIGHT_RECENT_PENALTY,
+    WEIGHT_WEATHER,
+    _parse_budget_range,
+)
+
+
+def _score_tags(preferred: List[str], c: Candidate, weight: float) -> float:
+    if not preferred:
+        return 0.0
+    match = sum(1 for t in preferred if t in c.tags)
+    return (match / len(preferred)) * weight
+
+
+def _score_weather(context: Context, c: Candidate) -> float:
+    if not context.weather:
+        return 0.0
+    cond = (context.weather.condition or "").lower()
+    temp = context.weather.temp_c
+    score = 0.0
+    if temp < 10 or cond in ("rain", "snow"):
+        score += _score_tags(COLD_TAGS, c, WEIGHT_WEATHER)
+    if temp > 26:
+        score += _score_tags(HOT_TAGS, c, WEIGHT_WEATHER)
+    return score
+
+
+def _score_budget(context: Context, c: Candidate) -> float:
+    low, high = _parse_budget_range(context.budget_range)
+    p = c.price_est
+    if low <= p <= high:
+        return WEIGHT_BUDGET
+    if p < low:
+        return WEIGHT_BUDGET * 0.8
+    return max(0.0, WEIGHT_BUDGET - (p - high) / 5000.0)
+
+
+def _score_recent_penalty(context: Context, c: Candidate) -> float:
+    if not context.recent_meals:
+        return 0.0
+    return WEIGHT_RECENT_PENALTY if c.category in {r.category for r in context.recent_meals} else 0.0
+
+
+def score_candidate(context: Context, c: Candidate) -> float:
+    return (
+        _score_tags(MEAL_SLOT_TAGS.get(context.meal_slot, []), c, WEIGHT_MEAL_SLOT)
+        + _score_weather(context, c)
+        + _score_tags(EFFORT_TAGS.get(context.effort_level, []), c, WEIGHT_EFFORT)
+        + _score_budget(context, c)
+        + _score_recent_penalty(context, c)
+        + _score_tags(MOOD_TAGS.get(context.mood, []), c, WEIGHT_MOOD)
+    )
+
+
+def rule_based_top_k(context: Context, candidates: List[Candidate], k: int = 5) -> List[int]:
+    """후보마다 채점해 stable sort → 상위 k개 menu_id (동점이면 입력 순서)."""
+    if not candidates:
+        return []
+    scored = [(c, score_candidate(context, c)) for c in candidates]
+    scored.sort(key=lambda x: x[1], reverse=True)
+    return [c.menu_id for c, _ in scored[:min(k, len(candidates))]]
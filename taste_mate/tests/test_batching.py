@@ -0,0 +1,152 @@
+import asyncio
+
+import pytest
+from synthetic import make_candidates, make_contexts
+
+from app import llm
+from app.batching import MicroBatcher
+from app.models import Candidate, Context
+from app.serialization import dumps
+
+
+def _run(batcher_kwargs, submit):
+    """handler 호출 기록과 submit(batcher) 결과를 돌려준다."""
+    calls = []
+
+    async def handler(items):
+        calls.append(list(items))
+        return [item * 10 for item in items]
+
+    async def main():
+        return await submit(MicroBatcher(handler, **batcher_kwargs))
+
+    return asyncio.run(main()), calls
+
+
+def test_window_flush():
+    async def submit(batcher):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(3)))
+        return results, loop.time() - start
+
+    (results, elapsed), calls = _run(dict(window_s=0.05, max_size=10), submit)
+    assert results == [0, 10, 20]
+    assert calls == [[0, 1, 2]]
+    assert elapsed >= 0.05
+
+
+def test_max_size_flushes_without_waiting():
+    async def submit(batcher):
+        return await asyncio.wait_for(asyncio.gather(*(batcher.submit(i) for i in range(6))), timeout=1)
+
+    results, calls = _run(dict(window_s=10, max_size=3), submit)
+    assert results == [0, 10, 20, 30, 40, 50]
+    assert calls == [[0, 1, 2], [3, 4, 5]]
+
+
+def test_cancelled_item_is_not_sent():
+    async def submit(batcher):
+        cancelled = asyncio.ensure_future(batcher.submit(1))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        return await batcher.submit(2)
+
+    result, calls = _run(dict(window_s=0.02, max_size=10), submit)
+    assert result == 20
+    assert calls == [[2]]
+
+
+def test_handler_errors_reach_every_caller():
+    async def main(handler):
+        batcher = MicroBatcher(handler, window_s=0.01, max_size=10)
+        return await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+
+    async def boom(items):
+        raise ValueError("boom")
+
+    async def short(items):
+        return [1]
+
+    async def per_item(items):
+        return [ValueError(f"item {i}") if i == 1 else i for i in items]
+
+    assert all(isinstance(r, ValueError) for r in asyncio.run(main(boom)))
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(main(short)))
+    first, second, third = asyncio.run(main(per_item))
+    assert (first, third) == (0, 2) and str(second) == "item 1"
+
+
+def _items(n: int, k: int = 3) -> list:
+    candidates = [Candidate.model_validate(c) for c in make_candidates(10)]
+    items = []
+    for i, context in enumerate(make_contexts(n, seed=5)):
+        chosen = candidates[i:i + k]
+        items.append(llm._ReasonItem(f"key{i}", "", Context.model_validate(context), chosen,
+                                     [c.menu_id for c in chosen]))
+    return items
+
+
+def _answer(item, n: int, menu_id=None) -> dict:
+    return {"item": n, "selected_menu_id": item.top_k[-1] if menu_id is None else menu_id,
+            "reason_one_liner": f"{n}번 상황에 잘 맞는 메뉴라서 골랐어요, 맛있게 드세요", "reason_tags": ["추천"]}
+
+
+def test_batch_prompt_has_a_section_per_item():
+    items = _items(3)
+    prompt = llm._build_batch_prompt(items)
+    assert [f"### 항목 {i}" in prompt for i in (1, 2, 3, 4)] == [True, True, True, False]
+    for item in items:
+        assert f"menu_id={item.top_k[0]}" in prompt
+
+
+def test_batch_response_maps_items_by_number():
+    items = _items(3)
+    text = dumps([_answer(items[2], 3), _answer(items[0], 1), _answer(items[1], 2)])
+    results = llm._parse_batch_response(text, items)
+    assert [r.selected_menu_id for r in results] == [item.top_k[-1] for item in items]
+    assert {r.reason_source for r in results} == {"live"}
+
+
+def test_batch_response_without_numbers_uses_position():
+    items = _items(2)
+    answers = [_answer(item, i) for i, item in enumerate(items, 1)]
+    for a in answers:
+        del a["item"]
+    results = llm._parse_batch_response(dumps({"results": answers}), items)
+    assert [r.selected_menu_id for r in results] == [item.top_k[-1] for item in items]
+
+
+def test_batch_response_rejects_selection_outside_top_k():
+    items = _items(3)
+    text = dumps([_answer(items[0], 1), _answer(items[1], 2, menu_id=999)])  # 3번은 빠짐
+    first, second, third = llm._parse_batch_response(text, items)
+    assert first.reason_source == "live"
+    assert (second.reason_source, second.selected_menu_id) == ("fallback", items[1].top_k[0])
+    assert third.reason_source == "fallback"
+
+
+@pytest.mark.parametrize("text", [None, "", "not json", '{"selected_menu_id": 1}'])
+def test_unusable_batch_response_falls_back_for_all(text):
+    items = _items(2)
+    assert [r.reason_source for r in llm._parse_batch_response(text, items)] == ["fallback", "fallback"]
+
+
+def test_batched_requests_share_one_call(fake_backend, monkeypatch):
+    monkeypatch.setattr(llm, "LLM_BATCH_WINDOW_MS", 50)
+    monkeypatch.setattr(llm, "_batcher", None)
+    items = _items(3)
+
+    def reply(prompt):
+        # 2번 항목은 top_k 밖을 고른다
+        return dumps([_answer(item, i, menu_id=999 if i == 2 else None) for i, item in enumerate(items, 1)])
+
+    fake_backend.reply = reply
+
+    async def main():
+        return await asyncio.gather(*(llm.acall_llm(item.context, item.candidates, item.top_k) for item in items))
+
+    results = asyncio.run(main())
+    assert len(fake_backend.prompts) == 1
+    assert [r.reason_source for r in results] == ["live", "fallback", "live"]
+    assert len(llm.reason_cache.memory) == 2  # fallback은 저장하지 않음
@@ -0,0 +1,100 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app import circuit_breaker
+from app.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def _breaker(**kwargs) -> CircuitBreaker:
+    options = dict(failure_rate=0.5, min_calls=4, window_s=10.0, open_s=5.0, probes=2)
+    options.update(kwargs)
+    return CircuitBreaker("test", **options)
+
+
+def _call(breaker: CircuitBreaker, ok: bool, latency_s: float = 0.01) -> None:
+    probe = breaker.before_call()
+    breaker.after_call(probe, ok, latency_s)
+
+
+def test_opens_after_failure_rate(clock):
+    breaker = _breaker()
+    _call(breaker, True)
+    _call(breaker, False)
+    _call(breaker, True)
+    assert breaker.state == CLOSED  # min_calls 미만
+    _call(breaker, False)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError, match="is open"):
+        breaker.before_call()
+    assert breaker.rejected == 1
+
+
+def test_old_calls_leave_window(clock):
+    breaker = _breaker()
+    for _ in range(3):
+        _call(breaker, False)
+    clock[0] += 11.0
+    _call(breaker, False)  # 앞의 실패 3건은 window 밖
+    assert breaker.state == CLOSED
+
+
+def test_half_open_probes_close(clock):
+    breaker = _breaker()
+    for _ in range(4):
+        _call(breaker, False)
+    clock[0] += 5.0
+    assert breaker.state == HALF_OPEN
+    first = breaker.before_call()
+    second = breaker.before_call()
+    assert first and second
+    with pytest.raises(CircuitOpenError, match="is half_open"):
+        breaker.before_call()  # 시험 호출은 probes개까지만
+    breaker.after_call(first, True, 0.01)
+    assert breaker.state == HALF_OPEN
+    breaker.after_call(second, True, 0.01)
+    assert breaker.state == CLOSED
+
+
+def test_half_open_probe_failure_reopens(clock):
+    breaker = _breaker()
+    for _ in range(4):
+        _call(breaker, False)
+    clock[0] += 5.0
+    _call(breaker, False)
+    assert breaker.state == OPEN
+    clock[0] += 4.9
+    assert breaker.state == OPEN  # open_s는 다시 연 시각부터
+
+
+def test_cancelled_probe_returns_slot(clock):
+    breaker = _breaker(probes=1)
+    for _ in range(4):
+        _call(breaker, False)
+    clock[0] += 5.0
+    probe = breaker.before_call()
+    breaker.after_call(probe, None, 0.0)  # 호출하지 못함
+    assert breaker.state == HALF_OPEN
+    assert breaker.before_call() is True
+
+
+def test_slow_call_counts_as_failure(clock):
+    breaker = _breaker(slow_s=1.0)
+    for _ in range(4):
+        _call(breaker, True, latency_s=2.0)
+    assert breaker.state == OPEN
+
+
+def test_disabled_never_opens(clock):
+    breaker = _breaker(failure_rate=0)
+    for _ in range(10):
+        _call(breaker, False)
+    assert breaker.state == CLOSED
+    assert breaker.before_call() is False
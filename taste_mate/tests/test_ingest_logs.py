@@ -0,0 +1,95 @@
+import gzip
+
+import pytest
+
+import ingest_logs
+from app.serialization import dumps
+
+
+def _record(i: int, source: str = "live") -> bytes:
+    record = {
+        "timestamp": f"2026-01-0{1 + i % 3}T12:00:00Z",
+        "case_id": i,
+        "context_summary": {"meal_slot": "점심", "mood": "좋음", "weather": {"condition": "rain", "temp_c": 8}},
+        "top_k": [1, 2, 3],
+        "output": {"selected_menu_id": 1 + i % 3, "reason_one_liner": f"사유 {i}", "reason_tags": ["점심"],
+                   "reason_source": source},
+    }
+    return (dumps(record) + "\n").encode("utf-8")
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = ingest_logs.connect(tmp_path / "calls.sqlite3")
+    yield conn
+    conn.close()
+
+
+def _ingest(conn, log_dir):
+    active = log_dir / f"{ingest_logs.LOG_STEM}.jsonl"
+    return [ingest_logs.ingest_file(conn, p, p == active) for p in ingest_logs.log_files(log_dir)]
+
+
+def _case_ids(conn):
+    return [int(r[0]) for r in conn.execute("SELECT case_id FROM calls ORDER BY id")]
+
+
+def test_rerun_reads_only_new_lines(tmp_path, conn):
+    active = tmp_path / "reason_calls.jsonl"
+    active.write_bytes(b"".join(_record(i) for i in range(3)))
+    assert _ingest(conn, tmp_path) == [(3, 0)]
+    assert _ingest(conn, tmp_path) == [(0, 0)]
+
+    with open(active, "ab") as f:
+        f.write(_record(3) + b"not json\n" + _record(4)[:-10])  # 깨진 줄 하나, 쓰는 중인 마지막 줄
+    assert _ingest(conn, tmp_path) == [(1, 1)]
+    with open(active, "ab") as f:
+        f.write(_record(4)[-10:])
+    assert _ingest(conn, tmp_path) == [(1, 0)]
+    assert _case_ids(conn) == [0, 1, 2, 3, 4]
+
+
+def test_rotated_and_gzipped_segment_continues_from_offset(tmp_path, conn):
+    active = tmp_path / "reason_calls.jsonl"
+    active.write_bytes(_record(0) + _record(1))
+    assert _ingest(conn, tmp_path) == [(2, 0)]
+
+    # 로테이션: 줄이 더 붙은 뒤 조각으로 이름이 바뀌고 gzip 압축, 새 파일 시작
+    data = active.read_bytes() + _record(2)
+    active.unlink()
+    with gzip.open(tmp_path / "reason_calls.20260101T000000.jsonl.gz", "wb") as f:
+        f.write(data)
+    active.write_bytes(_record(3))
+    assert _ingest(conn, tmp_path) == [(1, 0), (1, 0)]
+    assert _case_ids(conn) == [0, 1, 2, 3]
+
+    # 끝난 조각은 다시 읽지 않는다
+    done = conn.execute("SELECT file, done FROM ingest_state ORDER BY file").fetchall()
+    assert done == [("reason_calls.20260101T000000.jsonl.gz", 1), ("reason_calls.jsonl", 0)]
+    assert _ingest(conn, tmp_path) == [(0, 0), (0, 0)]
+
+
+def test_segment_order_and_unfinished_first_line(tmp_path, conn):
+    (tmp_path / "reason_calls.20260102T000000.jsonl").write_bytes(_record(2))
+    with gzip.open(tmp_path / "reason_calls.20260101T000000.jsonl.gz", "wb") as f:
+        f.write(_record(0) + _record(1))
+    (tmp_path / "reason_calls.jsonl").write_bytes(_record(3)[:5])  # 첫 줄이 아직 안 끝남
+    (tmp_path / "other.jsonl").write_bytes(_record(9))
+    assert [p.name for p in ingest_logs.log_files(tmp_path)] == [
+        "reason_calls.20260101T000000.jsonl.gz", "reason_calls.20260102T000000.jsonl", "reason_calls.jsonl",
+    ]
+    assert _ingest(conn, tmp_path) == [(2, 0), (1, 0), (0, 0)]
+    assert _case_ids(conn) == [0, 1, 2]
+
+
+def test_fallback_flag_and_queries(tmp_path, conn):
+    (tmp_path / "reason_calls.jsonl").write_bytes(
+        _record(0) + _record(1, source="fallback") + _record(2, source="cached") + _record(3, source="fallback")
+    )
+    _ingest(conn, tmp_path)
+    rows = conn.execute(ingest_logs.QUERIES["fallback_by_meal_slot"][1],
+                        {"since": None, "until": None, "limit": 20}).fetchall()
+    assert rows == [("점심", 4, 2, 0.5)]
+    rows = conn.execute(ingest_logs.QUERIES["daily"][1],
+                        {"since": "2026-01-01", "until": "2026-01-01", "limit": 20}).fetchall()
+    assert rows == [("2026-01-01", 2, 1, 0.5)]
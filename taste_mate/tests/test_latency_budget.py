@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+from synthetic import make_candidates, make_contexts
+
+from app import llm, main
+from app.models import Candidate, Context
+from app.serialization import dumps
+
+CANDIDATES = [Candidate.model_validate(c) for c in make_candidates(5)]
+TOP_K = [c.menu_id for c in CANDIDATES]
+CONTEXT = Context.model_validate(make_contexts(1, seed=11)[0])
+REASON = "추운 저녁에 든든하게 먹기 좋은 국물 메뉴라서 골랐어요"
+
+
+def _reply(menu_id):
+    return lambda prompt: dumps({"selected_menu_id": menu_id, "reason_one_liner": REASON, "reason_tags": ["국물"]})
+
+
+def test_budget_timeout_falls_back_and_fills_cache_later(fake_backend):
+    fake_backend.reply = _reply(TOP_K[1])
+    fake_backend.delay_s = 0.2
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        first = await llm.acall_llm(CONTEXT, CANDIDATES, TOP_K, budget_s=0.02)
+        waited = loop.time() - start
+        await asyncio.sleep(0.3)  # 뒤에서 계속 돈 호출이 끝나 캐시에 저장
+        second = await llm.acall_llm(CONTEXT, CANDIDATES, TOP_K, budget_s=0.02)
+        return first, waited, second
+
+    first, waited, second = asyncio.run(scenario())
+    assert first.reason_source == "fallback"
+    assert waited < 0.15
+    assert (second.reason_source, second.selected_menu_id, second.reason_one_liner) == ("cached", TOP_K[1], REASON)
+    assert len(fake_backend.prompts) == 1
+
+
+def test_within_budget_is_live(fake_backend):
+    fake_backend.reply = _reply(TOP_K[2])
+    response = asyncio.run(llm.acall_llm(CONTEXT, CANDIDATES, TOP_K, budget_s=1.0))
+    assert (response.reason_source, response.selected_menu_id) == ("live", TOP_K[2])
+
+
+def test_selection_outside_top_k_falls_back(fake_backend):
+    fake_backend.reply = _reply(999)
+    responses = [asyncio.run(llm.acall_llm(CONTEXT, CANDIDATES, TOP_K)), llm.call_llm(CONTEXT, CANDIDATES, TOP_K)]
+    for response in responses:
+        assert (response.reason_source, response.selected_menu_id) == ("fallback", TOP_K[0])
+    assert len(llm.reason_cache.memory) == 0
+
+
+@pytest.mark.parametrize("budget_ms, elapsed, expected", [
+    (0, 0.3, None),
+    (1000, 0.3, 0.7),
+    (1000, 2.0, 0.0),
+])
+def test_budget_counts_from_request_start(monkeypatch, budget_ms, elapsed, expected):
+    monkeypatch.setattr(main, "LLM_LATENCY_BUDGET_MS", budget_ms)
+    monkeypatch.setattr(main, "request_elapsed", lambda: elapsed)
+    assert main._llm_budget_s() == pytest.approx(expected)
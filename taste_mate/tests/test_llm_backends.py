@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+from synthetic import make_candidates, make_contexts
+
+from app import llm
+from app.llm_backends import LLMBackend, SimulatedBackend, SimulatedLLMError, create_backend
+from app.models import Candidate, Context
+from app.serialization import loads
+
+
+class NoAsync(LLMBackend):
+    name = "incomplete"
+
+    def generate(self, prompt, model, config):
+        return None
+
+
+def test_incomplete_backend_fails_at_construction():
+    with pytest.raises(TypeError):
+        NoAsync()
+
+
+def test_create_backend():
+    assert isinstance(create_backend("simulated"), SimulatedBackend)
+    with pytest.raises(ValueError, match="unknown LLM_BACKEND"):
+        create_backend("nope")
+
+
+def _prompt(prompt_format: str):
+    candidates = [Candidate.model_validate(c) for c in make_candidates(5)]
+    context = Context.model_validate(make_contexts(1, seed=4)[0])
+    return llm._build_prompt(context, candidates, prompt_format), context, candidates
+
+
+@pytest.mark.parametrize("prompt_format", ["verbose", "compact"])
+def test_simulated_answer_is_valid(prompt_format):
+    prompt, context, candidates = _prompt(prompt_format)
+    backend = SimulatedBackend(latency_ms=0, dist="fixed", seed="1")
+    data = loads(asyncio.run(backend.agenerate(prompt, "model", {})))
+    assert data["selected_menu_id"] == candidates[0].menu_id
+    assert 25 <= len(data["reason_one_liner"]) <= 45
+    assert context.company in data["reason_one_liner"]
+
+
+def test_simulated_error_and_malformed_rates():
+    prompt, _, candidates = _prompt("verbose")
+    with pytest.raises(SimulatedLLMError):
+        SimulatedBackend(latency_ms=0, error_rate=1.0).generate(prompt, "model", {})
+    top_k = [c.menu_id for c in candidates]
+    text = SimulatedBackend(latency_ms=0, malformed_rate=1.0, seed="2").generate(prompt, "model", {})
+    assert llm._parse_response(text, top_k).reason_source == "fallback"
+
+
+def test_result_logs_name_the_backend(fake_backend, caplog):
+    prompt, _, candidates = _prompt("verbose")
+    top_k = [c.menu_id for c in candidates]
+    with caplog.at_level("INFO", logger="app.llm"):
+        llm._parse_response(f'{{"selected_menu_id": {top_k[0]}, "reason_one_liner": "x", "reason_tags": []}}', top_k)
+    assert "LLM(fake) 성공" in caplog.text
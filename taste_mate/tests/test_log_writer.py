@@ -0,0 +1,66 @@
+import gzip
+import json
+
+from app.log_writer import JsonlWriter
+
+
+def _lines(paths) -> list:
+    out = []
+    for p in paths:
+        opener = gzip.open if p.name.endswith(".gz") else open
+        with opener(p, "rt", encoding="utf-8") as f:
+            out += [json.loads(line) for line in f]
+    return out
+
+
+def test_close_flushes_all_records(tmp_path):
+    path = tmp_path / "calls.jsonl"
+    writer = JsonlWriter(path, batch_size=7, flush_interval_s=10.0)
+    for i in range(100):
+        assert writer.write({"i": i})
+    writer.close()
+    assert [r["i"] for r in _lines([path])] == list(range(100))
+
+
+def test_write_after_close_restarts(tmp_path):
+    path = tmp_path / "calls.jsonl"
+    writer = JsonlWriter(path)
+    writer.write({"i": 0})
+    writer.close()
+    writer.write({"i": 1})
+    writer.close()
+    writer.close()  # 두 번 닫아도 그대로
+    assert [r["i"] for r in _lines([path])] == [0, 1]
+
+
+def test_rotation_keeps_every_record(tmp_path):
+    path = tmp_path / "calls.jsonl"
+    writer = JsonlWriter(path, batch_size=1, max_bytes=200)
+    for i in range(50):
+        writer.write({"i": i, "pad": "x" * 20})
+    writer.close()
+    segments = writer.segments()
+    assert len(segments) > 1
+    assert all(p.stat().st_size <= 200 for p in segments)
+    assert sorted(r["i"] for r in _lines(segments + [path])) == list(range(50))
+
+
+def test_rotation_compress_and_prune(tmp_path):
+    path = tmp_path / "calls.jsonl"
+    writer = JsonlWriter(path, batch_size=1, max_bytes=200, compress=True, keep=3)
+    for i in range(50):
+        writer.write({"i": i, "pad": "x" * 20})
+    writer.close()
+    segments = writer.segments()
+    assert len(segments) == 3
+    assert all(p.name.endswith(".jsonl.gz") for p in segments)
+    assert not list(tmp_path.glob("*.tmp"))
+    kept = sorted(r["i"] for r in _lines(segments + [path]))
+    assert kept == list(range(50 - len(kept), 50))  # 지운 건 가장 오래된 조각들
+
+
+def test_full_queue_drops(tmp_path):
+    writer = JsonlWriter(tmp_path / "calls.jsonl", queue_size=1, flush_interval_s=10.0)
+    results = [writer.write({"i": i}) for i in range(1000)]
+    writer.close()
+    assert results[0] and not all(results)
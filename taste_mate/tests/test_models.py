@@ -0,0 +1,43 @@
+import pytest
+from pydantic import ValidationError
+
+from app.models import BatchTopKRequest, RecommendRequest
+
+CONTEXT = {
+    "meal_slot": "점심",
+    "hunger_level": 3,
+    "mood": "보통",
+    "company": "혼자",
+    "effort_level": "보통",
+    "budget_range": "상관없음",
+}
+CANDIDATE = {"menu_id": 1, "menu_name": "김치찌개", "category": "한식", "tags": ["국물"], "price_est": 9000, "prep_time_est": 10}
+BOTH_OR_NEITHER = [{}, {"candidates": [CANDIDATE], "catalog_id": "seoul"}]
+
+
+def test_candidates_or_catalog_id():
+    assert RecommendRequest(context=CONTEXT, candidates=[CANDIDATE]).catalog_id is None
+    assert RecommendRequest(context=CONTEXT, catalog_id="seoul", catalog_version=2).candidates is None
+
+
+@pytest.mark.parametrize("source", BOTH_OR_NEITHER)
+def test_exactly_one_candidate_source(source):
+    with pytest.raises(ValidationError, match="정확히 하나만"):
+        RecommendRequest(context=CONTEXT, **source)
+
+
+def test_empty_inline_candidates_is_a_source():
+    assert RecommendRequest(context=CONTEXT, candidates=[]).candidates == []
+
+
+def test_batch_candidate_source():
+    assert BatchTopKRequest(contexts=[CONTEXT], catalog_id="seoul").k == 5
+    for source in BOTH_OR_NEITHER:
+        with pytest.raises(ValidationError, match="정확히 하나만"):
+            BatchTopKRequest(contexts=[CONTEXT], **source)
+
+
+@pytest.mark.parametrize("n", [0, 1001])
+def test_batch_context_count(n):
+    with pytest.raises(ValidationError):
+        BatchTopKRequest(contexts=[CONTEXT] * n, candidates=[CANDIDATE])
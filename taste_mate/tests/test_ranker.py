@@ -0,0 +1,73 @@
+import random
+
+import pytest
+from synthetic import RANKER_TAGS, make_candidates, make_contexts
+
+import reference_ranker
+from app import engine
+from app.engine import CandidateMatrix
+from app.models import Candidate, Context
+from app.ranker import compile_context, rule_based_top_k, score_candidate
+
+
+def _candidates(n: int, seed: int = 0, tagged_fraction: float = 1.0) -> list[Candidate]:
+    """합성 후보. tagged_fraction < 1이면 나머지 후보에서 랭커 태그를 빼서 가지치기가 실제로 일어나게 한다."""
+    rng = random.Random(seed)
+    out = []
+    for c in make_candidates(n, seed=seed):
+        if rng.random() >= tagged_fraction:
+            c["tags"] = [t for t in c["tags"] if t not in RANKER_TAGS]
+        out.append(Candidate.model_validate(c))
+    return out
+
+
+def _contexts(n: int, seed: int = 1) -> list[Context]:
+    return [Context.model_validate(c) for c in make_contexts(n, seed=seed)]
+
+
+def test_score_candidate_matches_reference():
+    candidates = _candidates(200)
+    for context in _contexts(50):
+        plan = compile_context(context)
+        for c in candidates:
+            assert plan.score(c) == reference_ranker.score_candidate(context, c)
+        c = candidates[0]
+        assert score_candidate(context, c) == reference_ranker.score_candidate(context, c)
+
+
+@pytest.mark.parametrize("k", [1, 5, 20, 500])
+def test_rule_based_top_k_matches_reference(k):
+    candidates = _candidates(300)
+    for context in _contexts(100):
+        assert rule_based_top_k(context, candidates, k) == reference_ranker.rule_based_top_k(context, candidates, k)
+
+
+def test_rule_based_top_k_empty():
+    assert rule_based_top_k(_contexts(1)[0], [], 5) == []
+
+
+@pytest.mark.parametrize("k", [1, 5, 20])
+def test_batch_top_k_matches_reference(k):
+    candidates = _candidates(300, seed=2)
+    contexts = _contexts(120, seed=3)
+    matrix = CandidateMatrix(candidates)
+    results = matrix.batch_top_k([compile_context(c) for c in contexts], k)
+    assert results == [reference_ranker.rule_based_top_k(c, candidates, k) for c in contexts]
+
+
+def test_batch_top_k_chunks(monkeypatch):
+    monkeypatch.setattr(engine, "BATCH_MAX_CELLS", 1000)  # 후보 300개 → plan 3개씩 나눠 채점
+    candidates = _candidates(300, seed=4)
+    contexts = _contexts(10, seed=5)
+    results = CandidateMatrix(candidates).batch_top_k([compile_context(c) for c in contexts], 5)
+    assert results == [reference_ranker.rule_based_top_k(c, candidates, 5) for c in contexts]
+
+
+@pytest.mark.parametrize("tagged_fraction", [0.0, 0.02, 0.1, 1.0])
+@pytest.mark.parametrize("k", [1, 5, 20])
+def test_pruned_top_k_matches_reference(monkeypatch, tagged_fraction, k):
+    monkeypatch.setattr(engine, "PRUNE_MIN_CANDIDATES", 0)  # 작은 카탈로그에서도 가지치기 경로로
+    candidates = _candidates(1500, seed=6, tagged_fraction=tagged_fraction)
+    matrix = CandidateMatrix(candidates)
+    for context in _contexts(60, seed=7):
+        assert matrix.top_k(compile_context(context), k) == reference_ranker.rule_based_top_k(context, candidates, k)
@@ -0,0 +1,112 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app import reason_cache
+from app.cache import TTLCache
+from app.models import ReasonResponse
+from app.reason_cache import ReasonCache, SqliteReasonStore, reason_key
+
+LIVE = ReasonResponse(selected_menu_id=3, reason_one_liner="추운 저녁에 든든하게 먹기 좋은 국물 메뉴예요", reason_tags=["국물"],
+                      reason_source="live")
+FALLBACK = LIVE.model_copy(update={"reason_source": "fallback"})
+
+
+def _cache(db) -> ReasonCache:
+    return ReasonCache(TTLCache(maxsize=100, ttl=300), str(db))
+
+
+def test_key_depends_on_prompt_model_and_temperature():
+    key = reason_key("prompt", "model", 0.3)
+    assert key == reason_key("prompt", "model", 0.3)
+    assert len({key, reason_key("prompt2", "model", 0.3), reason_key("prompt", "model2", 0.3),
+                reason_key("prompt", "model", 0.7)}) == 4
+
+
+def test_disk_hit_refills_memory(tmp_path):
+    db = tmp_path / "reasons.sqlite3"
+    _cache(db).put("k", LIVE)
+    restarted = _cache(db)  # 재시작: 메모리는 비었고 디스크에는 있음
+    assert len(restarted.memory) == 0
+    assert restarted.get("k") == LIVE.model_copy(update={"reason_source": None})
+    assert len(restarted.memory) == 1
+    restarted.get("k")
+    stats = restarted.stats()
+    assert (stats["memory_hits"], stats["disk_hits"], stats["hit_rate"]) == (1, 1, 1.0)
+
+
+def test_fallback_is_never_stored(tmp_path):
+    cache = _cache(tmp_path / "reasons.sqlite3")
+    cache.put("k", FALLBACK)
+    assert cache.get("k") is None
+    assert len(cache.memory) == 0
+    assert cache.disk.stats()["size"] == 0
+
+
+def test_sqlite_opens_lazily(tmp_path):
+    db = tmp_path / "sub" / "reasons.sqlite3"
+    cache = _cache(db)
+    assert cache.enabled
+    cache.stats()  # /metrics 렌더링도 DB를 열지 않는다
+    assert not db.exists()
+    cache.put("k", FALLBACK)  # 저장하지 않는 응답이라도 디스크 단 확인 전에 걸러짐
+    assert not db.exists()
+    assert cache.get("k") is None
+    assert db.exists()
+
+
+def test_unopenable_db_falls_back_to_memory(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    cache = _cache(blocker / "reasons.sqlite3")  # 부모가 파일이라 만들 수 없음
+    cache.put("k", LIVE)
+    assert cache.disk is None
+    assert cache.get("k") == LIVE
+
+
+def test_corrupt_row_is_a_miss_and_deleted(tmp_path):
+    cache = _cache(tmp_path / "reasons.sqlite3")
+    cache.disk.put("k", '{"selected_menu_id": "not a number"}')
+    assert asyncio.run(cache.aget("k")) is None
+    assert cache.disk.get("k") is None
+
+
+def test_async_roundtrip(tmp_path):
+    db = tmp_path / "reasons.sqlite3"
+
+    async def main():
+        await _cache(db).aput("k", LIVE)
+        return await _cache(db).aget("k")
+
+    assert asyncio.run(main()).reason_one_liner == LIVE.reason_one_liner
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(reason_cache, "time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+def test_disk_ttl(tmp_path, clock):
+    store = SqliteReasonStore(str(tmp_path / "reasons.sqlite3"), ttl=60, max_rows=100)
+    store.put("k", "{}")
+    clock[0] += 61
+    assert store.get("k") is None
+    assert store.stats()["expirations"] == 1
+
+
+def test_prune_drops_expired_then_least_recently_used(tmp_path, clock, monkeypatch):
+    monkeypatch.setattr(reason_cache, "_PRUNE_EVERY", 1)
+    store = SqliteReasonStore(str(tmp_path / "reasons.sqlite3"), ttl=60, max_rows=3)
+    store.put("old", "{}")
+    clock[0] += 61
+    for key in ("a", "b", "c"):
+        store.put(key, "{}")  # 첫 정리에서 만료된 old 삭제
+        clock[0] += 1
+    assert store.get("a") == "{}"  # a를 최근에 씀 → b가 가장 오래 안 쓴 행
+    store.put("d", "{}")  # 4개 > 3개: b 제거
+    assert [k for k in ("old", "a", "b", "c", "d") if store.get(k) is not None] == ["a", "c", "d"]
+    stats = store.stats()
+    assert (stats["expirations"], stats["evictions"]) == (1, 1)
@@ -0,0 +1,135 @@
+import asyncio
+import re
+import sys
+
+import pytest
+from synthetic import make_candidates
+
+import build_reason_table
+from app import llm, reason_table
+from app.engine import CandidateMatrix
+from app.models import Candidate, Context, ReasonResponse
+from app.ranker import compile_context
+from app.reason_table import ReasonTable, bucket_of, table_key, weather_class, write_table
+from app.serialization import dumps
+
+BASE = {"meal_slot": "점심", "hunger_level": 3, "mood": "피곤", "company": "친구", "effort_level": "보통",
+        "budget_range": "상관없음"}
+CANDIDATES = [Candidate.model_validate(c) for c in make_candidates(30)]
+
+
+def _context(**overrides) -> Context:
+    return Context.model_validate(dict(BASE, **overrides))
+
+
+@pytest.mark.parametrize("weather, expected", [
+    (None, "neutral"),
+    ({"condition": "clear", "temp_c": 20}, "neutral"),
+    ({"condition": "cloudy", "temp_c": 5}, "cold"),
+    ({"condition": "clear", "temp_c": 30}, "hot"),
+    ({"condition": "rain", "temp_c": 28}, "both"),
+])
+def test_weather_class(weather, expected):
+    assert weather_class(_context(weather=weather)) == expected
+
+
+def test_bucket_of():
+    assert bucket_of(_context()) == ("점심", "보통", "피곤", "neutral", "", "친구")
+    # 보통 날씨는 상태를 넣지 않는다 (날씨 없이 만든 사유)
+    assert bucket_of(_context(weather={"condition": "Clear", "temp_c": 20})) == bucket_of(_context())
+    assert bucket_of(_context(weather={"condition": "Rain", "temp_c": 12}))[3:5] == ("cold", "rain")
+    assert bucket_of(_context(mood="설렘"))[2] == reason_table.OTHER_MOOD
+    assert bucket_of(_context(company=" 가족 "))[5] == "가족"
+
+
+def _top(context: Context, k: int = 3) -> list:
+    return [CANDIDATES[i - 1] for i in CandidateMatrix(CANDIDATES).top_k(compile_context(context), k)]
+
+
+def test_write_and_lookup(tmp_path):
+    context = _context()
+    top = _top(context)
+    stored = ReasonResponse(selected_menu_id=top[1].menu_id, reason_one_liner="친구랑 점심에 가볍게 먹기 좋은 메뉴예요",
+                            reason_tags=["점심"], reason_source="live")
+    path = tmp_path / "table.bin"
+    write_table(path, {table_key(bucket_of(context), top): stored}, {"k": 3})
+    table = ReasonTable(str(path))
+    assert (len(table), table.meta["entries"], table.meta["k"]) == (1, 1, 3)
+
+    found = table.lookup(_context(hunger_level=5), top)  # 허기는 키에 없음
+    assert found.reason_source == "precomputed"
+    assert (found.selected_menu_id, found.reason_one_liner) == (stored.selected_menu_id, stored.reason_one_liner)
+    assert table.lookup(_context(company="혼자"), top) is None
+    assert table.lookup(context, list(reversed(top))) is None  # top-k 순서도 키에 들어감
+    assert table.stats()["hits"] == 1 and table.stats()["misses"] == 2
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "table.bin"
+    path.write_bytes(b"TMRTBL01" + bytes(16))
+    with pytest.raises(ValueError):
+        ReasonTable(str(path))
+
+
+def _reply(prompt: str) -> str:
+    menu_id = int(re.search(r"menu_id=(\d+)", prompt).group(1))
+    if menu_id % 7 == 0:
+        return "사유를 만들지 못했습니다"  # 파싱 실패 → fallback → 표에서 빠짐
+    return dumps({"selected_menu_id": menu_id, "reason_one_liner": f"{menu_id}번 메뉴가 지금 상황에 잘 어울려요, 추천해요",
+                  "reason_tags": ["추천"]})
+
+
+@pytest.fixture
+def built_table(tmp_path, monkeypatch, fake_backend):
+    catalog = tmp_path / "candidates.json"
+    catalog.write_text(dumps([c.model_dump() for c in CANDIDATES]), encoding="utf-8")
+    out = tmp_path / "table.bin"
+    fake_backend.reply = _reply
+    previous = reason_table.set_table(None)
+    monkeypatch.setattr(sys, "argv", ["build_reason_table.py", "--catalog", str(catalog), "--out", str(out),
+                                      "--k", "3", "--companies", "친구", "혼자"])
+    build_reason_table.main()
+    table = ReasonTable(str(out))
+    yield table
+    reason_table.set_table(previous)
+
+
+def test_build_round_trip(built_table):
+    assert built_table.meta["companies"] == ["친구", "혼자"]
+    assert built_table.meta["backend"] == "fake"
+    hits = 0
+    for weather in (None, {"condition": "cloudy", "temp_c": 2}, {"condition": "rain", "temp_c": 28}):
+        context = _context(weather=weather)
+        top = _top(context)
+        found = built_table.lookup(context, top)
+        if top[0].menu_id % 7 == 0:
+            assert found is None  # fallback 사유는 저장하지 않음
+            continue
+        hits += 1
+        assert found.selected_menu_id == top[0].menu_id
+        assert found.reason_one_liner.startswith(f"{top[0].menu_id}번")
+    assert hits
+    assert built_table.lookup(_context(company="가족"), _top(_context(company="가족"))) is None
+
+
+def _response(context, top):
+    top_k = [c.menu_id for c in top]
+    return asyncio.run(llm.acall_llm(context, top, top_k)), llm.call_llm(context, top, top_k)
+
+
+@pytest.mark.parametrize("miss_mode, source", [("llm", "live"), ("fallback", "fallback")])
+def test_miss_modes(built_table, monkeypatch, miss_mode, source):
+    monkeypatch.setattr(llm, "REASON_TABLE_MISS", miss_mode)
+    reason_table.set_table(built_table)
+    context = _context(company="가족")  # 표에 없는 동행
+    top = [c for c in _top(context) if c.menu_id % 7]
+    calls = len(llm.get_backend().prompts)
+    async_response, sync_response = _response(context, top)
+    assert async_response.reason_source == source
+    assert sync_response.reason_source in (source, "cached")
+    assert len(llm.get_backend().prompts) - calls == (1 if miss_mode == "llm" else 0)
+
+    hit_context = _context()
+    hit_top = _top(hit_context)
+    if hit_top[0].menu_id % 7:
+        assert {r.reason_source for r in _response(hit_context, hit_top)} == {"precomputed"}
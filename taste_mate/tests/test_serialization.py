@@ -0,0 +1,59 @@
+import json
+
+import pytest
+from synthetic import make_contexts
+
+from app import llm
+from app.models import Context
+from app.serialization import dumps, extract_json, loads
+
+REASON = {"selected_menu_id": 3, "reason_one_liner": "비 오는 날 따뜻한 국물", "reason_tags": ["국물"]}
+TEXT = json.dumps(REASON, ensure_ascii=False)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        TEXT,
+        f"  {TEXT}\n",
+        f"```json\n{TEXT}\n```",
+        f"```JSON \n{TEXT}```",
+        f"```\n{TEXT}\n```",
+        f"추천 결과입니다.\n```json\n{TEXT}\n```\n참고하세요.",
+        f"```json\n{TEXT}",  # 닫는 펜스가 잘림
+        f"추천: {TEXT} 이상입니다.",  # 펜스 없이 앞뒤 설명
+        f"{TEXT}\n위 메뉴를 추천합니다.",  # 뒤에 붙은 문장
+        f"{{잘못된 괄호}} 그리고 {TEXT}",  # 처음 { 는 파싱 안 됨 → 다음 { 부터
+    ],
+)
+def test_extract_json_object(text):
+    assert extract_json(text) == REASON
+
+
+def test_extract_json_array():
+    items = [{"item": 1, **REASON}, {"item": 2, **REASON}]
+    text = json.dumps(items, ensure_ascii=False)
+    assert extract_json(f"```json\n{text}\n```") == items
+    assert extract_json(f"배치 결과: {text}") == items
+
+
+@pytest.mark.parametrize("text", ["", "추천 메뉴는 첫 번째 후보입니다.", "```json\n```", TEXT[:-7]])
+def test_extract_json_nothing(text):
+    with pytest.raises(ValueError):
+        extract_json(text)
+
+
+def test_dumps_matches_stdlib_compact():
+    data = {"이름": "김치찌개", "tags": ("국물", "매운맛"), "price": 9000, "n": None}
+    assert dumps(data) == json.dumps(
+        {**data, "tags": list(data["tags"])}, ensure_ascii=False, separators=(",", ":")
+    )
+    assert loads(dumps(data))["tags"] == ["국물", "매운맛"]
+
+
+def test_verbose_prompt_context_keeps_stdlib_separators():
+    """verbose 프롬프트의 상황 JSON은 원래 문구(json.dumps 기본 구분자) 그대로."""
+    context = Context.model_validate(make_contexts(1, seed=2)[0])
+    expected = json.dumps(context.model_dump(), ensure_ascii=False)
+    assert llm._format_context(context) == expected
+    assert f"## 현재 상황(JSON)\n{expected}\n\n" in llm._build_prompt(context, [], "verbose")
@@ -0,0 +1,76 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.singleflight import AsyncSingleFlight, SingleFlight
+
+
+def test_coalesces_concurrent_calls():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "result"
+
+    results = []
+
+    def caller():
+        results.append(flight.do("key", work))
+
+    leader = threading.Thread(target=caller)
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=caller) for _ in range(4)]
+    for t in followers:
+        t.start()
+    time.sleep(0.2)  # 뒤따른 호출이 진행 중인 작업을 기다리기 시작하도록
+    release.set()
+    for t in [leader, *followers]:
+        t.join(5)
+
+    assert len(calls) == 1
+    assert sorted(results) == [("result", False)] + [("result", True)] * 4
+    assert flight.in_flight() == 0
+
+
+def test_exception_reaches_all_callers_and_clears_key():
+    flight = SingleFlight()
+
+    def boom():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        flight.do("key", boom)
+    assert flight.in_flight() == 0
+    assert flight.do("key", lambda: 1) == (1, False)
+
+
+def test_async_coalesces_and_survives_leader_cancel():
+    async def main():
+        flight = AsyncSingleFlight()
+        calls = []
+        release = asyncio.Event()
+
+        async def work():
+            calls.append(1)
+            await release.wait()
+            return "result"
+
+        leader = asyncio.create_task(flight.do("key", work))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("key", work))
+        await asyncio.sleep(0)
+        leader.cancel()  # 먼저 온 요청이 끊겨도 작업은 계속
+        release.set()
+        assert await follower == ("result", True)
+        assert calls == [1]
+        assert flight.in_flight() == 0
+
+    asyncio.run(main())
@@ -0,0 +1,99 @@
+import asyncio
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+from synthetic import make_candidates, make_contexts
+
+from app import main
+from app.serialization import dumps, loads
+
+CANDIDATES = make_candidates(8)
+REQUEST = {"context": make_contexts(1, seed=2)[0], "candidates": CANDIDATES, "k": 3}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, "log_reason_call", lambda *args, **kwargs: None)  # logs/에 쓰지 않게
+    with TestClient(main.app) as c:
+        yield c
+
+
+def _events(lines) -> list:
+    """SSE 줄 → [(event, data)]."""
+    events, name = [], None
+    for line in lines:
+        if line.startswith("event: "):
+            name = line[len("event: "):]
+        elif line.startswith("data: "):
+            events.append((name, loads(line[len("data: "):])))
+    return events
+
+
+async def _post_stream(path: str, body: dict, chunks: list) -> None:
+    """ASGI 앱을 직접 불러 응답 본문 조각을 보내지는 대로 chunks에 모은다 (TestClient는 본문을 다 모은 뒤 돌려줌)."""
+    payload = dumps(body).encode()
+    scope = {"type": "http", "http_version": "1.1", "method": "POST", "scheme": "http", "path": path,
+             "raw_path": path.encode(), "query_string": b"", "root_path": "", "server": ("test", 80),
+             "client": ("test", 1), "headers": [(b"content-type", b"application/json"),
+                                               (b"content-length", str(len(payload)).encode())]}
+    messages = [{"type": "http.request", "body": payload, "more_body": False}]
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            chunks.append(message.get("body", b"").decode())
+
+    await main.app(scope, receive, send)
+
+
+def test_top_k_is_sent_before_the_llm_answers(monkeypatch, fake_backend):
+    monkeypatch.setattr(main, "log_reason_call", lambda *args, **kwargs: None)
+    chunks = []
+
+    async def agenerate(prompt, model, config):
+        # top_k 이벤트가 이미 나간 뒤에 LLM이 답한다는 것을 확인
+        fake_backend.prompts.append("".join(chunks))
+        return dumps({"selected_menu_id": int(re.search(r"menu_id=(\d+)", prompt).group(1)),
+                      "reason_one_liner": "스트림으로 먼저 보여 준 후보 중에서 골랐어요", "reason_tags": ["추천"]})
+
+    fake_backend.agenerate = agenerate
+    asyncio.run(_post_stream("/v1/recommend/stream", REQUEST, chunks))
+
+    assert fake_backend.prompts and fake_backend.prompts[0].startswith("event: top_k")
+    events = _events("".join(chunks).splitlines())
+    assert [name for name, _ in events] == ["top_k", "reason"]
+    top_k, reason = events[0][1], events[1][1]
+    assert len(top_k["top_k"]) == 3
+    assert [c["menu_id"] for c in top_k["candidates"]] == top_k["top_k"]
+    assert reason["top_k_used"] == top_k["top_k"]
+    assert reason["selected_menu_id"] in top_k["top_k"]
+    assert reason["reason_source"] == "live"
+
+
+def test_stream_response_headers(client):
+    response = client.post("/v1/recommend/stream", json=REQUEST)
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.headers["cache-control"] == "no-cache"
+    assert [name for name, _ in _events(response.text.splitlines())] == ["top_k", "reason"]
+
+
+def test_reason_failure_sends_error_event(client, monkeypatch):
+    async def boom(*args, **kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(main, "acall_llm", boom)
+    response = client.post("/v1/recommend/stream", json=REQUEST)
+    assert response.status_code == 200
+    events = _events(response.text.splitlines())
+    assert [name for name, _ in events] == ["top_k", "error"]
+    assert events[1][1] == {"detail": "reason generation failed"}
+
+
+def test_ranking_errors_are_plain_http_errors(client):
+    response = client.post("/v1/recommend/stream", json={"context": REQUEST["context"], "catalog_id": "missing"})
+    assert response.status_code == 404
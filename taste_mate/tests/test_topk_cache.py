@@ -0,0 +1,128 @@
+import pytest
+from synthetic import make_candidates
+
+from app import cache as cache_module
+from app import ranker, topk_cache
+from app.cache import TTLCache
+from app.catalog import Catalog
+from app.models import Candidate, Context
+from app.ranker import compile_context
+
+BASE = {
+    "meal_slot": "저녁",
+    "hunger_level": 3,
+    "mood": "피곤",
+    "company": "혼자",
+    "effort_level": "보통",
+    "budget_range": "8000~12000",
+    "weather": {"condition": "cloudy", "temp_c": 5.0},
+}
+
+
+def _plan(**overrides):
+    return compile_context(Context.model_validate(dict(BASE, **overrides)))
+
+
+class CountingMatrix:
+    """catalog.matrix 대신 넣어 실제 채점 횟수를 센다."""
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+        self.plans = []
+
+    def top_k(self, plan, k):
+        self.plans.append(plan)
+        return self.matrix.top_k(plan, k)
+
+    def batch_top_k(self, plans, k):
+        self.plans += plans
+        return self.matrix.batch_top_k(plans, k)
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    c = TTLCache(maxsize=100, ttl=300)
+    monkeypatch.setattr(topk_cache, "cache", c)
+    return c
+
+
+def _catalog(seed: int = 0) -> Catalog:
+    catalog = Catalog.inline([Candidate.model_validate(c) for c in make_candidates(200, seed=seed)])
+    catalog.matrix = CountingMatrix(catalog.matrix)
+    return catalog
+
+
+def test_hit_skips_ranking(cache):
+    catalog = _catalog()
+    first = topk_cache.top_k(catalog, _plan(), 5)
+    assert topk_cache.top_k(catalog, _plan(), 5) == first
+    assert len(catalog.matrix.plans) == 1
+    assert cache.hits == 1
+
+
+def test_score_irrelevant_fields_share_key(cache):
+    catalog = _catalog()
+    topk_cache.top_k(catalog, _plan(), 5)
+    # 배고픔·동행·같은 추위 구간 안의 기온은 점수에 영향이 없다
+    topk_cache.top_k(catalog, _plan(hunger_level=5, company="친구", weather={"condition": "cloudy", "temp_c": 1.0}), 5)
+    assert len(catalog.matrix.plans) == 1
+
+
+@pytest.mark.parametrize("change", [
+    {"budget_range": "15000~25000"},
+    {"mood": "좋음"},
+    {"weather": {"condition": "clear", "temp_c": 30.0}},
+    {"recent_meals": [{"category": "한식", "menu": "국밥", "days_ago": 1}]},
+])
+def test_score_relevant_fields_miss(cache, change):
+    catalog = _catalog()
+    topk_cache.top_k(catalog, _plan(), 5)
+    topk_cache.top_k(catalog, _plan(**change), 5)
+    assert len(catalog.matrix.plans) == 2
+
+
+def test_k_and_candidates_are_in_key(cache):
+    catalog = _catalog()
+    topk_cache.top_k(catalog, _plan(), 5)
+    topk_cache.top_k(catalog, _plan(), 3)
+    other = _catalog(seed=1)
+    topk_cache.top_k(other, _plan(), 5)
+    assert len(catalog.matrix.plans) == 2
+    assert len(other.matrix.plans) == 1
+
+
+def test_table_change_invalidates(cache, monkeypatch):
+    catalog = _catalog()
+    topk_cache.top_k(catalog, _plan(), 5)
+    monkeypatch.setattr(ranker, "_TABLE_FINGERPRINT", "changed")
+    topk_cache.top_k(catalog, _plan(), 5)
+    assert len(catalog.matrix.plans) == 2
+
+
+def test_ttl_expiry(cache, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    catalog = _catalog()
+    topk_cache.top_k(catalog, _plan(), 5)
+    now[0] += 301
+    topk_cache.top_k(catalog, _plan(), 5)
+    assert len(catalog.matrix.plans) == 2
+    assert cache.expirations == 1
+
+
+def test_batch_ranks_only_misses(cache):
+    catalog = _catalog()
+    plans = [_plan(), _plan(mood="좋음"), _plan(budget_range="상관없음")]
+    topk_cache.top_k(catalog, plans[0], 5)
+    results = topk_cache.batch_top_k(catalog, plans, 5)
+    assert catalog.matrix.plans[1:] == plans[1:]
+    assert results == [catalog.matrix.matrix.top_k(p, 5) for p in plans]
+
+
+def test_disabled_cache_skips_fingerprint(monkeypatch):
+    monkeypatch.setattr(topk_cache, "cache", TTLCache(maxsize=0, ttl=300))
+    catalog = _catalog()
+    topk_cache.top_k(catalog, _plan(), 5)
+    topk_cache.top_k(catalog, _plan(), 5)
+    assert len(catalog.matrix.plans) == 2
+    assert "fingerprint" not in vars(catalog)
@@ -0,0 +1,88 @@
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+from synthetic import make_candidates, make_contexts
+
+from app import main, tracing
+from app.serialization import loads
+
+REQUEST = {"context": make_contexts(1, seed=2)[0], "candidates": make_candidates(8), "k": 3}
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+@pytest.fixture
+def trace_path(tmp_path, monkeypatch):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(tracing, "TRACE_PATH", str(path))
+    monkeypatch.setattr(tracing, "_writer", None)
+    monkeypatch.setattr(tracing, "TRACE_SAMPLE_RATE", 0.0)
+    monkeypatch.setattr(tracing, "TRACE_SLOW_MS", 0.0)
+    return path
+
+
+@pytest.fixture
+def client(trace_path):
+    with TestClient(main.app) as c:
+        yield c
+
+
+def _traces(path):
+    tracing.close_traces()
+    return [loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def _spans(trace: dict) -> list:
+    return trace["resourceSpans"][0]["scopeSpans"][0]["spans"]
+
+
+def test_request_id_echo(client):
+    response = client.get("/health", headers={"X-Request-ID": "client-req.42"})
+    assert response.headers["x-request-id"] == "client-req.42"
+
+
+@pytest.mark.parametrize("header", [None, "", "has space", "x" * 129, "semi;colon"])
+def test_missing_or_invalid_request_id_is_replaced(client, header):
+    headers = {} if header is None else {"X-Request-ID": header}
+    rid = client.get("/health", headers=headers).headers["x-request-id"]
+    assert rid != header
+    assert re.fullmatch(r"[0-9a-f]{32}", rid)
+
+
+def test_traceparent_continues_trace(client, trace_path, monkeypatch):
+    monkeypatch.setattr(tracing, "TRACE_SAMPLE_RATE", 1e-9)  # 추적은 켜고, 무작위 샘플링은 사실상 안 되게
+    response = client.post("/v1/top-k", json=REQUEST, headers={
+        "traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01", "X-Request-ID": "req-1",
+    })
+    assert response.status_code == 200
+    assert response.headers["x-request-id"] == "req-1"
+    client.post("/v1/top-k", json=REQUEST, headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-00"})  # 샘플링 안 됨
+
+    [trace] = _traces(trace_path)
+    root, *children = _spans(trace)
+    assert root["traceId"] == TRACE_ID
+    assert root["parentSpanId"] == PARENT_ID
+    assert root["name"] == "POST /v1/top-k"
+    assert {"key": "request.id", "value": {"stringValue": "req-1"}} in root["attributes"]
+    assert {"validation", "rank"} <= {s["name"] for s in children}
+    assert all(s["traceId"] == TRACE_ID and s["parentSpanId"] == root["spanId"] for s in children)
+
+
+def test_hex_request_id_becomes_trace_id(client, trace_path, monkeypatch):
+    monkeypatch.setattr(tracing, "TRACE_SAMPLE_RATE", 1.0)
+    client.get("/health", headers={"X-Request-ID": TRACE_ID.upper()})
+    [trace] = _traces(trace_path)
+    root = _spans(trace)[0]
+    assert root["traceId"] == TRACE_ID
+    assert "parentSpanId" not in root
+
+
+def test_nothing_written_when_tracing_off(client, trace_path):
+    assert not tracing.enabled()
+    response = client.post("/v1/top-k", json=REQUEST, headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"})
+    assert response.status_code == 200
+    assert "x-request-id" in response.headers
+    tracing.close_traces()
+    assert tracing._writer is None
+    assert not trace_path.exists()